@@ -3,7 +3,6 @@ import bmesh
 from mathutils import Vector
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 import tempfile
 import os
 import subprocess
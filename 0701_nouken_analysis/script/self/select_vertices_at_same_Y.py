@@ -1,36 +1,34 @@
 import bpy
-import bmesh
+import numpy as np
+import sys
 
-def select_vertices_at_same_height(tolerance=10):
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays, write_vertex_selection
+from pepper_analysis.selection import slab_mask
+
+def select_vertices_at_same_height(tolerance=0.3):
     obj = bpy.context.object
     if obj is None or obj.type != 'MESH':
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    coords, select = read_mesh_arrays(mesh)
     
     # 選択された頂点のY座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点のY座標を基準にする
-    target_y = selected_vertices[0].co.y
-
-    # すべての頂点を確認し、同じ高さの頂点を選択
-    for v in bm.verts:
-        if abs(v.co.y - target_y) < tolerance:
-            v.select = True
+    base_point = coords[selected_indices[0]]
+    target_y = base_point[1]
 
-    # メッシュの更新と選択反映
-    bm.to_mesh(mesh)
-    bm.free()
-    mesh.update()
+    # 同じ高さの頂点を選択に加え、選択状態を配列のまま書き込む（BMesh は作らない）
+    write_vertex_selection(mesh, select | slab_mask(coords, base_point, "y", tolerance))
     
     print(f"Vertices at height {target_y} selected.")
 
@@ -0,0 +1,92 @@
+import bpy
+import numpy as np
+import argparse
+import os
+import sys
+
+# --python で実行するので __file__ からリポジトリのルートを求める
+LIB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(LIB_PATH)
+from pepper_analysis.disk_cache import load_mesh_cached, cached_slab_index, cached_kdtree
+from pepper_analysis.batch import load_seed_points, run_batch, write_results_csv
+from pepper_analysis.parallel import run_batch_parallel
+
+# 使い方 (Blender をバックグラウンドで起動して実行):
+#   blender --background scan.blend --python batch_obst_dist_measure.py -- --seeds seeds.csv --output result.csv
+# --seeds を省略した場合は選択されているすべての頂点をシード点にする
+# --processes 2 以上で果実ごとの処理をプロセスプールで並列に実行する（Linux向け）
+
+### パラメータ ###
+# 投影
+TOLERANCE = 0.01 # [m] 選択した点からどの高さまでの頂点を収集するか
+DISTANCE_THRESHOLD = 0.05 # [m] 選択した点からどの距離までの頂点を収集するか
+IMAGE_SIZE = 100
+POINT_SIZE = 2 # [pixel] 投影する点のサイズ
+# ハフ変換
+DP = 1.2
+MIN_DIST = 15
+PARAM1 = 50
+PARAM2 = 30
+MIN_RADIUS = 10
+MAX_RADIUS = 25
+# 中心推定の方法 ("hough": 投影画像のハフ変換, "pyramid": 粗い画像 → 候補周辺の細かい画像の 2 段のハフ変換, "ransac": 点群に直接円をあてはめ)
+CENTER_METHOD = "hough"
+FIT_METHOD = "taubin" # RANSAC で選んだ点へのあてはめ方法 (kasa / pratt / taubin)
+# 障害物距離計算
+CORRECT_PARAM = 0.008 # 円の半径補正 (収穫物自身を障害物として検出することを防ぐ)
+APPROACH_ANGLE = 90 # [degree] アプローチする角度 x,yのワールド座標系
+
+def parse_args():
+    # Blender 自身の引数と区別するため "--" 以降だけを読む
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="複数の果実の障害物距離をまとめて計測する")
+    parser.add_argument("--seeds", help="シード点の CSV / JSON ファイル（省略時は選択頂点）")
+    parser.add_argument("--output", default="obst_dist_result.csv", help="結果を書き出す CSV ファイル")
+    parser.add_argument("--object", help="対象のメッシュオブジェクト名（省略時はアクティブオブジェクト）")
+    parser.add_argument("--method", default=CENTER_METHOD, choices=["hough", "pyramid", "ransac"], help="中心推定の方法")
+    parser.add_argument("--processes", type=int, default=1, help="並列に実行するプロセス数（0 で CPU のコア数）")
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+
+    obj = bpy.data.objects.get(args.object) if args.object else bpy.context.object
+    if obj is None or obj.type != 'MESH':
+        print("No mesh object selected.")
+        return
+
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得．座標から同じスキャンかを判定するキーも作る）
+    mesh = obj.data
+    cache_key, coords, select = load_mesh_cached(obj.name, mesh)
+
+    # シード点を取得
+    if args.seeds:
+        seed_ids, seed_points = load_seed_points(args.seeds)
+    else:
+        selected_indices = np.flatnonzero(select)
+        seed_ids = [str(i) for i in selected_indices.tolist()]
+        seed_points = coords[selected_indices].astype(np.float64)
+    if len(seed_points) == 0:
+        print("No seed points.")
+        return
+
+    # 索引は全シード点で共有する
+    z_index = cached_slab_index(cache_key, coords, axis=2)
+    params = dict(tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, point_size=POINT_SIZE,
+                  dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS,
+                  correct_param=CORRECT_PARAM, approach_angle=APPROACH_ANGLE, method=args.method, fit=FIT_METHOD)
+
+    if args.processes == 1:
+        kdtree = cached_kdtree(cache_key, coords)
+        rows = run_batch(z_index, seed_ids, seed_points, kdtree=kdtree, **params)
+    else:
+        # 頂点座標と索引は共有メモリ経由でワーカーに渡す
+        rows = run_batch_parallel(z_index, seed_ids, seed_points, processes=args.processes or None, **params)
+
+    write_results_csv(args.output, rows)
+    succeeded = sum(row["status"] == "ok" for row in rows)
+    print(f"{succeeded}/{len(rows)} fruits measured. Results saved to {args.output}")
+
+# スクリプトを実行（並列実行時にワーカーが読み込み直しても再実行しないよう保護）
+if __name__ == "__main__":
+    main()
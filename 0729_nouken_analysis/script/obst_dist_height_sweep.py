@@ -0,0 +1,88 @@
+import bpy
+import numpy as np
+import tempfile
+import csv
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.disk_cache import load_mesh_cached, cached_slab_index, cached_kdtree
+from pepper_analysis.pipeline import best_approach_index
+from pepper_analysis.sweep import slice_heights, height_sweep
+
+### パラメータ ###
+# 投影
+TOLERANCE = 0.01 # [m] 選択した点からどの高さまでの頂点を収集するか
+DISTANCE_THRESHOLD = 0.05 # [m] 選択した点からどの距離までの頂点を収集するか
+IMAGE_SIZE = 100
+POINT_SIZE = 2 # [pixel] 投影する点のサイズ
+# ハフ変換
+DP = 1.2
+MIN_DIST = 15
+PARAM1 = 50
+PARAM2 = 30
+MIN_RADIUS = 10
+MAX_RADIUS = 25
+# 中心推定の方法 ("hough": 投影画像のハフ変換, "pyramid": 粗い画像 → 候補周辺の細かい画像の 2 段のハフ変換, "ransac": 点群に直接円をあてはめ)
+CENTER_METHOD = "hough"
+FIT_METHOD = "taubin" # RANSAC で選んだ点へのあてはめ方法 (kasa / pratt / taubin)
+# 障害物距離計算
+CORRECT_PARAM = 0.008 # 円の半径補正 (収穫物自身を障害物として検出することを防ぐ)
+CLEARANCE_ANGLES = 360 # 全周のクリアランスを計算する方向の数
+# 高さ方向の掃引
+SWEEP_HEIGHT = 0.08 # [m] 選択した点を中心に計測する高さの範囲
+SWEEP_STEP = 0.01 # [m] 断面の間隔
+
+def main():
+
+    obj = bpy.context.object
+    if obj is None or obj.type != 'MESH':
+        print("No mesh object selected.")
+        return
+
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得．座標から同じスキャンかを判定するキーも作る）
+    mesh = obj.data
+    cache_key, coords, select = load_mesh_cached(obj.name, mesh)
+
+    # 選択された頂点のz座標を取得
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
+        print("No vertices selected.")
+        return
+
+    # 最初の選択頂点を基準点とする
+    base_point = coords[selected_indices[0]].astype(np.float64)
+
+    # 索引は全断面で共有する
+    z_index = cached_slab_index(cache_key, coords, axis=2)
+    kdtree = cached_kdtree(cache_key, coords)
+
+    # 断面ごとに中心推定と全周のクリアランスを計算
+    heights = slice_heights(base_point[2], SWEEP_HEIGHT, SWEEP_STEP)
+    angles, circles, clearance = height_sweep(z_index, base_point, heights, kdtree=kdtree, num_angles=CLEARANCE_ANGLES, tolerance=TOLERANCE, correct_param=CORRECT_PARAM,
+                                              distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, point_size=POINT_SIZE,
+                                              dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS,
+                                              method=CENTER_METHOD, fit=FIT_METHOD)
+
+    # 全断面で障害物が最も遠い方向（各方向の最小クリアランスが最大になる方向）
+    detected = ~np.isnan(clearance).all(axis=1)
+    if not detected.any():
+        print("No circles detected.")
+        return
+    min_clearance = clearance[detected].min(axis=0)
+    best = best_approach_index(min_clearance) # 障害物がない方向が複数あれば, その範囲が最も広いところの中央
+    print(f"{detected.sum()}/{len(heights)} slices detected.")
+    print(f"best_approach_angle= {np.degrees(angles[best])} [degree], clearance= {min_clearance[best] * 1000} [mm]")
+
+    # 高さ × 方向の表を一時ファイルに保存 [m]
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".csv", mode="w", newline="")
+    with temp_file:
+        writer = csv.writer(temp_file)
+        writer.writerow(["z", "center_x", "center_y", "radius"] + [f"{np.degrees(a):g}" for a in angles])
+        for z, world_circle, row in zip(heights, circles, clearance):
+            circle = world_circle[:3] if world_circle is not None else [None, None, None]
+            writer.writerow([z, *circle, *row])
+    print(f"Clearance table saved to {temp_file.name}")
+
+# スクリプトを実行
+main()
@@ -1,12 +1,19 @@
 import bpy
-import bmesh
-from mathutils import Vector
-import cv2
 import numpy as np
 import tempfile
 import os
 import subprocess #linuxで実行する用
-import math
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.lazy import lazy_import
+from pepper_analysis.disk_cache import load_mesh_cached, cached_slab_index
+from pepper_analysis.pipeline import projection_to_image, measure_fruit, clearance_profile, best_approach_index
+from pepper_analysis.profiling import Profiler, span
+from pepper_analysis.image_view import show_image
+
+cv2 = lazy_import("cv2") # 画像を描くときに読み込む
 
 ### パラメータ ###
 # 投影
@@ -21,153 +28,19 @@ PARAM1 = 50
 PARAM2 = 30
 MIN_RADIUS = 10
 MAX_RADIUS = 25
+# 中心推定の方法 ("hough": 投影画像のハフ変換, "pyramid": 粗い画像 → 候補周辺の細かい画像の 2 段のハフ変換, "ransac": 点群に直接円をあてはめ)
+CENTER_METHOD = "hough"
+FIT_METHOD = "taubin" # RANSAC で選んだ点へのあてはめ方法 (kasa / pratt / taubin)
 
 
 # 障害物距離計算
 CORRECT_PARAM = 0.008 # 円の半径補正 (収穫物自身を障害物として検出することを防ぐ)
 APPROACH_ANGLE = 90 # [degree] アプローチする角度 x,yのワールド座標系
-
-def projection_to_image(bm, base_vertex, target_z, tolerance, distance_threshold, image_size):
-
-
-    # 基準点のX-y座標
-    base_point_2d = Vector((base_vertex.co.x, base_vertex.co.y))
-
-    # 指定した高さにある頂点を収集し、基準点の近くのみに絞る
-    vertices_near_base = []
-    for v in bm.verts:
-        if abs(v.co.z - target_z) < tolerance:
-            point_2d = Vector((v.co.x, v.co.y))
-            if (point_2d - base_point_2d).length < distance_threshold:
-                vertices_near_base.append(v.co)
-    
-    if not vertices_near_base:
-        print("No vertices found near the base point at the target height.")
-        bm.free()
-        return
-    
-    # 2D座標への投影（X-y平面）
-    points_2d = [(int((v.x - base_vertex.co.x) / distance_threshold * image_size / 2 + image_size / 2), int((v.y - base_vertex.co.y) / distance_threshold * image_size / 2 + image_size / 2)) for v in vertices_near_base]
-
-    # 空の画像を作成して、ポイントを描画
-    image = np.zeros((image_size, image_size), dtype=np.uint8)
-    for point in points_2d:
-        cv2.circle(image, point, POINT_SIZE, 255, -1)
-        
-    # モデルにより調整
-    image = cv2.flip(image, 1) # 画像反転
-    image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE) # 画像を反時計回りに90°回転
-
-    return image
-
-def center_point_estimation(image, base_vertex, dp, min_dist, param1, param2, min_radius, max_radius):
-    # blur
-    image = cv2.GaussianBlur(image, ksize=(9,9), sigmaX=0, sigmaY=0)
-    
-    # canny
-    med_val = np.median(image)
-    sigma = 0.33  # 0.33
-    min_val = int(max(0, (1.0 - sigma) * med_val))
-    max_val = int(max(255, (1.0 + sigma) * med_val))
-    image = cv2.Canny(image, threshold1 = min_val, threshold2 = max_val)
-
-    # ハフ変換で円を検出
-    circles = cv2.HoughCircles(image, cv2.HOUGH_GRADIENT, dp=dp, minDist=min_dist, param1=param1, param2=param2, minRadius=min_radius, maxRadius=max_radius)
-    
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
-        for i, circle in enumerate(circles[0, :]):
-            center_x = circle[0]  # X座標をスケールに合わせて戻す
-            center_y = circle[1]  # y座標をスケールに合わせて戻す
-            radius = circle[2]    # 半径もスケールに合わせて戻す
-
-            # ワールド座標系に変換
-            world_center_x = (2*center_x - IMAGE_SIZE)*DISTANCE_THRESHOLD/IMAGE_SIZE + base_vertex.co.x
-            world_center_y = (2*center_y - IMAGE_SIZE)*DISTANCE_THRESHOLD/IMAGE_SIZE + base_vertex.co.y
-            world_radius = 2*radius*DISTANCE_THRESHOLD/IMAGE_SIZE
-    else:
-        print("No circles detected.")
-        return None
-
-    return [world_center_x, world_center_y, world_radius, center_x, center_y, radius]
-
-def point_between_lines_judgment(point, circle, angle): # 指定した角度の方向にある点のみ抽出
-    x,y = point
-    center_x = circle[0]
-    center_y = circle[1]
-    radius = circle[2]
-
-    line1 = math.cos(angle+math.pi/2)*(x - center_x) + math.sin(angle+math.pi/2)*(y - center_y) - radius
-    line2 = math.cos(angle+math.pi/2)*(x - center_x) + math.sin(angle+math.pi/2)*(y - center_y) + radius
-
-    obst_point = Vector((x, y))
-    center_point = Vector((center_x, center_y))
-    center_to_obst_vec = obst_point - center_point
-    dir_vec = Vector((math.cos(angle), math.sin(angle)))
-    limited_dir = center_to_obst_vec.dot(dir_vec)
-
-    return line1 <= 0 and line2 >= 0 and limited_dir > 0
-
-def min_dist(vertices, circle, angle):
-    min_distance = None
-
-    center_x = circle[0]
-    center_y = circle[1]
-
-    dir_vec = Vector((math.cos(angle), math.sin(angle)))
-    for v in vertices:
-        vec = Vector((v.x - center_x, v.y - center_y))
-        obst_distance = (vec.project(dir_vec)).length
-        if min_distance is None or obst_distance < min_distance:
-            min_distance = obst_distance
-
-    return min_distance
-
-def obst_dist_measure(bm, world_circle, target_z, approach_angle):
-
-    center_x = world_circle[0]
-    center_y = world_circle[1]
-    radius = world_circle[2]
-
-    center_point_2d = Vector((center_x, center_y))
-
-    # 指定した高さにある頂点を収集し、一方向のみに絞る
-    vertices_left = []
-    vertices_right = []
-    vertices_front = []
-    vertices_behind = []
-
-    for v in bm.verts:
-        if abs(v.co.z - target_z) < TOLERANCE: #高さ絞る
-            point_2d = Vector((v.co.x, v.co.y))
-            corrected_radius = radius + CORRECT_PARAM
-            if (point_2d - center_point_2d).length > corrected_radius: # 検知した円より外の点に絞る，0.01は要調整
-                if point_between_lines_judgment(point=[v.co.x, v.co.y], circle=world_circle, angle=approach_angle): # 円の手前側に絞る
-                    vertices_front.append(v.co)
-                if point_between_lines_judgment(point=[v.co.x, v.co.y], circle=world_circle, angle=approach_angle-math.pi/2): # 円の左側に絞る
-                    vertices_left.append(v.co)
-                if point_between_lines_judgment(point=[v.co.x, v.co.y], circle=world_circle, angle=approach_angle+math.pi): # 円の奥側に絞る
-                    vertices_behind.append(v.co)
-                if point_between_lines_judgment(point=[v.co.x, v.co.y], circle=world_circle, angle=approach_angle+math.pi/2): # 円の右側に絞る
-                    vertices_right.append(v.co)
-    
-    # 最小の距離を求める
-    front_obst_dist = min_dist(vertices_front, world_circle, approach_angle)
-    left_obst_dist = min_dist(vertices_left, world_circle, approach_angle-math.pi/2)
-    behind_obst_dist = min_dist(vertices_behind, world_circle, approach_angle+math.pi)
-    right_obst_dist = min_dist(vertices_right, world_circle, approach_angle+math.pi/2)
-
-
-    # [print(f"front point: ({v.x}, {v.y})") for v in vertices_front] #debug
-    # [print(f"right point: ({v.x}, {v.y})") for v in vertices_right] #debug
-    # [print(f"left point: ({v.x}, {v.y})") for v in vertices_left] #debug
-    # [print(f"behind point: ({v.x}, {v.y})") for v in vertices_behind] #debug
-
-    # print(len(vertices_right)) #debug
-    # print(len(vertices_front)) #debug
-    # print(len(vertices_behind)) #debug
-
-    return [left_obst_dist, right_obst_dist, front_obst_dist, behind_obst_dist]
+CLEARANCE_ANGLES = 360 # 全周のクリアランスを計算する方向の数 (0 で計算しない)
+# 処理時間の計測
+PROFILE = None # 処理ごとの時間を JSON Lines で出力 (None: 環境変数 PEPPER_PROFILE に従う, "stdout" または出力先のファイルパス)
+# 結果の画像の表示
+SHOW_MODE = "file" # "file": 一時ファイルに保存して外部のビューアで開く, "blender": Blender の Image Editor に直接表示（ファイルを書き出さない）
 
 def main():
 
@@ -176,41 +49,51 @@ def main():
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得．座標から同じスキャンかを判定するキーも作る）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    with span("read_mesh") as fields:
+        cache_key, coords, select = load_mesh_cached(obj.name, mesh)
+        fields["vertices"] = len(coords)
     
     # 選択された頂点のz座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点を基準点とする
-    base_vertex = selected_vertices[0]
-    target_z = base_vertex.co.z
-
-    center_image = projection_to_image(bm, base_vertex, target_z, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE)
-    world_circle = center_point_estimation(center_image, base_vertex, dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS)
-    if world_circle is None:
-        bm.free()
+    base_point = coords[selected_indices[0]].astype(np.float64)
+    target_z = base_point[2]
+
+    # Z座標でソートした索引を取得（投影2回と障害物計測で共有．同じスキャンなら保存済みの索引を再利用）
+    # 1 点だけの計測なので基準点近傍の頂点もこの索引で絞る（KD木は多数の点をまとめて計測するときだけ使う）
+    with span("slab_index"):
+        z_index = cached_slab_index(cache_key, coords, axis=2)
+
+    # 投影 → 中心推定 → 障害物距離計測（CENTER_METHOD が "ransac" なら投影せずに点群から中心推定）
+    with span("measure_fruit", method=CENTER_METHOD):
+        result = measure_fruit(z_index, base_point, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, point_size=POINT_SIZE,
+                               dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS,
+                               correct_param=CORRECT_PARAM, approach_angle=APPROACH_ANGLE, method=CENTER_METHOD, fit=FIT_METHOD)
+    if result is None:
         return
-    image = projection_to_image(bm, base_vertex, target_z, tolerance=TOLERANCE, distance_threshold=0.5, image_size=1000)
-    obst_dist = obst_dist_measure(bm, world_circle, target_z, approach_angle=math.radians(APPROACH_ANGLE))
+    world_circle, obst_dist = result
+    with span("overview_projection"):
+        image = projection_to_image(z_index, base_point, target_z, tolerance=TOLERANCE, distance_threshold=0.5, image_size=1000, point_size=POINT_SIZE) # 広範囲の投影はスラブ索引で絞る
     
-    # [m] から [mm] に変換
-    obst_dist_mm = [d * 1000 for d in obst_dist]
+    # [m] から [mm] に変換（障害物がない方向は None のまま）
+    # 中心のワールド座標は投影画像の転置を戻した値（以前の版は基準点からの x, y のずれが入れ替わっていたため, 同じ点でも値が変わる）
+    obst_dist_mm = [None if d is None else d * 1000 for d in obst_dist]
     print(world_circle)
     world_circle_mm = [d * 1000 for d in world_circle]
     print(world_circle)
 
-    cv2.putText(image, f"x= {world_circle[0]}, y= {world_circle[1]}, r= {world_circle[2]}", (0, 90), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
-    cv2.putText(image, f"left_obst_dist= {obst_dist[0]}", (0, 140), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
-    cv2.putText(image, f"right_obst_dist= {obst_dist[1]}", (0, 190), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
-    cv2.putText(image, f"front_obst_dist= {obst_dist[2]}", (0, 240), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
-    cv2.putText(image, f"behind_obst_dist= {obst_dist[3]}", (0, 290), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
+    with span("draw_text"):
+        cv2.putText(image, f"x= {world_circle[0]}, y= {world_circle[1]}, r= {world_circle[2]}", (0, 90), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
+        cv2.putText(image, f"left_obst_dist= {obst_dist[0]}", (0, 140), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
+        cv2.putText(image, f"right_obst_dist= {obst_dist[1]}", (0, 190), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
+        cv2.putText(image, f"front_obst_dist= {obst_dist[2]}", (0, 240), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
+        cv2.putText(image, f"behind_obst_dist= {obst_dist[3]}", (0, 290), cv2.FONT_HERSHEY_DUPLEX, 0.8, (255,255,255))
 
     print(f"x= {world_circle_mm[0]} [mm], y= {world_circle_mm[1]} [mm], r= {world_circle_mm[2]} [mm]")
     print(f"left_obst_dist= {obst_dist_mm[0]} [mm]")
@@ -218,17 +101,28 @@ def main():
     print(f"front_obst_dist= {obst_dist_mm[2]} [mm]")
     print(f"behind_obst_dist= {obst_dist_mm[3]} [mm]")
 
-    # 一時ファイルに画像を保存
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-    cv2.imwrite(temp_file.name, image)
-    print(f"2D projection image saved to {temp_file.name}")
-
-    # メッシュデータの解放
-    bm.free()
-
-    # 保存した画像を自動で開く
-    os.startfile(temp_file.name)  # Windowsの場合。macOSやLinuxでは代わりに適切なビューアで開く
-    # subprocess.run(["xdg-open", temp_file.name])  # Linuxの場合
-
-# スクリプトを実行
-main()
\ No newline at end of file
+    # 全周のクリアランスから最も障害物が遠い方向を求める
+    if CLEARANCE_ANGLES > 0:
+        with span("clearance_profile"):
+            angles, clearance = clearance_profile(z_index, world_circle, target_z, num_angles=CLEARANCE_ANGLES, tolerance=TOLERANCE, correct_param=CORRECT_PARAM)
+        best = best_approach_index(clearance) # 障害物がない方向が複数あれば, その範囲が最も広いところの中央
+        print(f"best_approach_angle= {np.degrees(angles[best])} [degree], clearance= {clearance[best] * 1000} [mm]")
+
+    if SHOW_MODE == "blender":
+        # bpy.data.images の画像に書き込んで Image Editor に表示
+        with span("show_image"):
+            show_image(image)
+    else:
+        # 一時ファイルに画像を保存
+        with span("write_png"):
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
+            cv2.imwrite(temp_file.name, image)
+        print(f"2D projection image saved to {temp_file.name}")
+
+        # 保存した画像を自動で開く
+        os.startfile(temp_file.name)  # Windowsの場合。macOSやLinuxでは代わりに適切なビューアで開く
+        # subprocess.run(["xdg-open", temp_file.name])  # Linuxの場合
+
+# スクリプトを実行（PROFILE が有効なら処理ごとの時間を出力）
+with Profiler("obst_dist_measure_angle", output=PROFILE):
+    main()
\ No newline at end of file
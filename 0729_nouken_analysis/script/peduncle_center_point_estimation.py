@@ -1,18 +1,27 @@
 import bpy
-import bmesh
-from mathutils import Vector
-import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 import tempfile
 import os
 import subprocess
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.lazy import lazy_import
+from pepper_analysis.disk_cache import load_mesh_cached, cached_slab_index
+from pepper_analysis.pipeline import collect_slice_points, rasterize_slice, edge_image, hough_circles, circles_to_world
+from pepper_analysis.profiling import Profiler, span
+from pepper_analysis.image_view import show_image
+
+cv2 = lazy_import("cv2") # 画像を描くときに読み込む
 
 ### パラメータ ###
 # 投影
 TOLERANCE = 0.01 # [m] 選択した点からどの高さまでの頂点を収集するか
 DISTANCE_THRESHOLD = 0.05 # [m] 選択した点からどの距離までの頂点を収集するか
 IMAGE_SIZE = 100
+POINT_SIZE = 3 # [pixel] 投影する点のサイズ
+ROTATE = False # 投影画像を回転しない (左右反転だけ)
 # ハフ変換
 DP = 1.2
 MIN_DIST = 15
@@ -23,6 +32,10 @@ MAX_RADIUS = 25
 
 # 円の半径補正
 CORRECT_PARAM = 0.008
+# 処理時間の計測
+PROFILE = None # 処理ごとの時間を JSON Lines で出力 (None: 環境変数 PEPPER_PROFILE に従う, "stdout" または出力先のファイルパス)
+# 結果の画像の表示
+SHOW_MODE = "file" # "file": 一時ファイルに保存して外部のビューアで開く, "blender": Blender の Image Editor に直接表示（ファイルを書き出さない）
 
 def center_point_estimation(tolerance=10, distance_threshold=100, image_size=500, dp=1.2, min_dist=20, param1=50, param2=30, min_radius=10, max_radius=100):
     obj = bpy.context.object
@@ -30,72 +43,42 @@ def center_point_estimation(tolerance=10, distance_threshold=100, image_size=500
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得．座標から同じスキャンかを判定するキーも作る）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    with span("read_mesh") as fields:
+        cache_key, coords, select = load_mesh_cached(obj.name, mesh)
+        fields["vertices"] = len(coords)
     
     # 選択された頂点のz座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点を基準点とする
-    base_vertex = selected_vertices[0]
-    target_z = base_vertex.co.z
+    base_point = coords[selected_indices[0]].astype(np.float64)
+    target_z = base_point[2]
 
-    # 基準点のX-y座標
-    base_point_2d = Vector((base_vertex.co.x, base_vertex.co.y))
+    # Z座標でソートした索引を取得（同じスキャンなら保存済みの索引を再利用）
+    with span("slab_index"):
+        z_index = cached_slab_index(cache_key, coords, axis=2)
 
     # 指定した高さにある頂点を収集し、基準点の近くのみに絞る
-    vertices_near_base = []
-    for v in bm.verts:
-        if abs(v.co.z - target_z) < tolerance:
-            point_2d = Vector((v.co.x, v.co.y))
-            if (point_2d - base_point_2d).length < distance_threshold:
-                vertices_near_base.append(v.co)
+    vertices_near_base = collect_slice_points(z_index, base_point, target_z, tolerance, distance_threshold, image_size=image_size)
     
-    if not vertices_near_base:
+    if len(vertices_near_base) == 0:
         print("No vertices found near the base point at the target height.")
-        bm.free()
         return
     
-    # 2D座標への投影（X-y平面）
-    points_2d = [(int((v.x - base_vertex.co.x) / distance_threshold * image_size / 2 + image_size / 2), int((v.y - base_vertex.co.y) / distance_threshold * image_size / 2 + image_size / 2)) for v in vertices_near_base]
-
-    # 空の画像を作成して、ポイントを描画
-    image = np.zeros((image_size, image_size), dtype=np.uint8)
-    for point in points_2d:
-        cv2.circle(image, point, 3, 255, -1)
-    image = cv2.flip(image, 1) # 画像反転
-
-    # blur
-    image = cv2.GaussianBlur(image, ksize=(9,9), sigmaX=0, sigmaY=0)
-    
-    # canny
-    med_val = np.median(image)
-    sigma = 0.33  # 0.33
-    min_val = int(max(0, (1.0 - sigma) * med_val))
-    max_val = int(max(255, (1.0 + sigma) * med_val))
-    image = cv2.Canny(image, threshold1 = min_val, threshold2 = max_val)
-
-    # ハフ変換で円を検出
-    circles = cv2.HoughCircles(image, cv2.HOUGH_GRADIENT, dp=dp, minDist=min_dist, param1=param1, param2=param2, minRadius=min_radius, maxRadius=max_radius)
+    # 投影 → ぼかし・エッジ → ハフ変換（円を描き込むのでエッジの画像も受け取る）
+    image = rasterize_slice(vertices_near_base, base_point, distance_threshold, image_size, point_size=POINT_SIZE, rotate=ROTATE)
+    image = edge_image(image, image_size=image_size)
+    circles = hough_circles(image, dp, min_dist, param1, param2, min_radius, max_radius, image_size=image_size)
     
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
-        for i, circle in enumerate(circles[0, :]):
-            center_x = circle[0]  # X座標をスケールに合わせて戻す
-            center_y = circle[1]  # y座標をスケールに合わせて戻す
-            radius = circle[2]    # 半径もスケールに合わせて戻す
-
-            # ワールド座標系に変換
-            world_center_x = (2*center_x - image_size)*distance_threshold/image_size + base_vertex.co.x
-            world_center_y = (2*center_y - image_size)*distance_threshold/image_size + base_vertex.co.y
-            world_radius = 2*radius*distance_threshold/image_size
-
+    # ワールド座標系に変換（投影画像の反転・回転を戻す）
+    world_circles = circles_to_world(circles, base_point, distance_threshold=distance_threshold, image_size=image_size, rotate=ROTATE)
+    if world_circles:
+        for world_center_x, world_center_y, world_radius, center_x, center_y, radius in world_circles:
             correct_radius = image_size / 2 / distance_threshold * (world_radius + CORRECT_PARAM)
 
             cv2.circle(image, [center_x, center_y], radius, 255, thickness=2)
@@ -105,20 +88,25 @@ def center_point_estimation(tolerance=10, distance_threshold=100, image_size=500
             # cv2.putText(image, f"[{round(radius,3)},{round(correct_radius,3)}]", (0, 90), cv2.FONT_HERSHEY_DUPLEX, 0.4, (255,255,255))
 
             cv2.circle(image, [center_x, center_y], 1, 255, -1)
+        print(f"x= {world_center_x * 1000} [mm], y= {world_center_y * 1000} [mm], r= {world_radius * 1000} [mm]")
     else:
         print("No circles detected.")
 
-    # 一時ファイルに画像を保存
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-    cv2.imwrite(temp_file.name, image)
-    print(f"2D projection image saved to {temp_file.name}")
-
-    # メッシュデータの解放
-    bm.free()
-
-    # 保存した画像を自動で開く
-    os.startfile(temp_file.name)  # Windowsの場合。macOSやLinuxでは代わりに適切なビューアで開く
-    # subprocess.run(["xdg-open", temp_file.name])  # Linuxの場合
-
-# スクリプトを実行
-center_point_estimation(tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_DIST, max_radius=MAX_RADIUS)
\ No newline at end of file
+    if SHOW_MODE == "blender":
+        # bpy.data.images の画像に書き込んで Image Editor に表示
+        with span("show_image"):
+            show_image(image)
+    else:
+        # 一時ファイルに画像を保存
+        with span("write_png"):
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
+            cv2.imwrite(temp_file.name, image)
+        print(f"2D projection image saved to {temp_file.name}")
+
+        # 保存した画像を自動で開く
+        os.startfile(temp_file.name)  # Windowsの場合。macOSやLinuxでは代わりに適切なビューアで開く
+        # subprocess.run(["xdg-open", temp_file.name])  # Linuxの場合
+
+# スクリプトを実行（PROFILE が有効なら処理ごとの時間を出力）
+with Profiler("peduncle_center_point_estimation", output=PROFILE):
+    center_point_estimation(tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_DIST, max_radius=MAX_RADIUS)
\ No newline at end of file
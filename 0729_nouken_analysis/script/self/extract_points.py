@@ -1,64 +1,64 @@
 import bpy
-import bmesh
 import math
+import numpy as np
+import sys
 from mathutils import Vector
 
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays
+from pepper_analysis.crop import behind_mask, delete_vertices, hide_vertices
+
 ANGLE = 0 # カメラ視点（ヨー方向） [degree]
 DISTANCE = 0.5 #選択点からカメラまでの距離 [m]
+CROP_DEPTH = 0.035 # 選択点よりこの距離以上奥（カメラから見て）の点を削除 [m]
+CROP_MODE = "delete" # "delete": 頂点を削除（元の動作）, "hide": 頂点を隠すだけ（ANGLE, CROP_DEPTH を変えて再実行できる．Alt+H で元に戻る）
 SCRIPT_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts/0729_nouken_analysis/script/self/points_distance.py" #実行後に開くスクリプトのパス
 
 def main():
 
     select_blender_mode(select_mode="object")
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
     obj = bpy.context.object
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    coords, select = read_mesh_arrays(mesh)
     
-    # 選択された頂点のx座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    # 選択された頂点を取得
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点を基準にする
-    target_x = selected_vertices[0].co.x
-    target_y = selected_vertices[0].co.y
-
-    angle =math.radians(ANGLE)
-    dir_vec = Vector((math.cos(angle), math.sin(angle)))
-
-    # 選択した点より後ろの点削除
-    for v in bm.verts:
-        vec = Vector((target_x - v.co.x, target_y - v.co.y))
-        distance = (vec.project(dir_vec)).length
-        if distance >= 0.035 and vec.project(dir_vec).dot(dir_vec) > 0:
-            bm.verts.remove(v)
+    base_point = coords[selected_indices[0]].astype(np.float64)
+
+    # 選択した点より後ろの点を求める（隠した頂点も含めた全頂点で計算し直す）
+    behind = behind_mask(coords, base_point, math.radians(ANGLE), CROP_DEPTH)
+    if CROP_MODE == "hide":
+        # メッシュは書き換えずに隠す
+        hide_vertices(mesh, behind)
+        print("Vertices hidden.")
+    else:
+        # 削除対象をまとめて一括削除
+        delete_vertices(mesh, behind)
+        print("Vertices deleted.")
 
     # カメラを生成
-    set_camera(selected_vertices)
-
-    # メッシュの更新と選択反映
-    bm.to_mesh(mesh)
-    bm.free()
-    mesh.update()
-    print("Vertices deleted.")
+    set_camera(base_point)
 
     # スクリプトを開く
     open_script(script_path=SCRIPT_PATH)
     select_blender_mode(select_mode="edit")
 
-def set_camera(selected_vertices):
+def set_camera(base_point):
 
     # カメラを作成
     camera_data = bpy.data.cameras.new(name="Target_Camera")
     camera_object = bpy.data.objects.new("Target_Camera", camera_data)
     bpy.context.collection.objects.link(camera_object)
 
-    center_world = selected_vertices[0].co
+    center_world = Vector(base_point)
 
     # ターゲットオブジェクトを作成してカメラの注視点にする
     bpy.ops.object.empty_add(type='PLAIN_AXES')
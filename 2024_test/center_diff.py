@@ -7,6 +7,11 @@ import tempfile
 # import os
 import subprocess
 import math
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.circle_fit import circle_fitting
 
 def distance(point1, point2):
     (x1, y1) = point1
@@ -14,29 +19,6 @@ def distance(point1, point2):
     dist = math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
     return(dist)
 
-def CircleFitting(x,y):
-    sumx  = sum(x)
-    sumy  = sum(y)
-    sumx2 = sum([ix ** 2 for ix in x])
-    sumy2 = sum([iy ** 2 for iy in y])
-    sumxy = sum([ix * iy for (ix,iy) in zip(x,y)])
-
-    F = np.array([[sumx2,sumxy,sumx],
-                  [sumxy,sumy2,sumy],
-                  [sumx,sumy,len(x)]])
-
-    G = np.array([[-sum([ix ** 3 + ix*iy **2 for (ix,iy) in zip(x,y)])],
-                  [-sum([ix ** 2 *iy + iy **3 for (ix,iy) in zip(x,y)])],
-                  [-sum([ix ** 2 + iy **2 for (ix,iy) in zip(x,y)])]])
-
-    T=np.linalg.inv(F).dot(G)
-
-    cxe=float(T[0]/-2)
-    cye=float(T[1]/-2)
-    re=math.sqrt(cxe**2+cye**2-T[2])
-    #print (cxe,cye,re)
-    return (cxe,cye,re)
-
 def line_detector(tolerance, distance_threshold, image_size):
     obj = bpy.context.object
     if obj is None or obj.type != 'MESH':
@@ -104,9 +86,12 @@ def line_detector(tolerance, distance_threshold, image_size):
         cv2.circle(image, point, 1, 255, -1)
 
     # 円のフィッティング
-    points_x = [x for x, y in points_2d]
-    points_y = [y for x, y in points_2d]
-    (cx,cy,r) = CircleFitting(points_x, points_y)
+    circle = circle_fitting(np.array(points_2d, dtype=np.float64))
+    if circle is None:
+        print("Circle fitting failed.")
+        bm.free()
+        return
+    (cx,cy,r) = circle
     print("cx =", cx, "cy =", cy, "r =", r)
 
     # 花柄の点とフィッティングした円の中心点の距離を計算
@@ -1,5 +1,4 @@
 import bpy
-import bmesh
 from mathutils import Vector
 import cv2
 import numpy as np
@@ -7,6 +6,12 @@ import numpy as np
 import tempfile
 import os
 import subprocess
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays, collect_points_near_base
+from pepper_analysis.raster import rasterize_points
 
 def extract_circles_near_point_with_hough_transform(tolerance=10, distance_threshold=100, image_size=500, dp=1.2, min_dist=20, param1=50, param2=30, min_radius=10, max_radius=100):
     obj = bpy.context.object
@@ -14,45 +19,32 @@ def extract_circles_near_point_with_hough_transform(tolerance=10, distance_thres
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    coords, select = read_mesh_arrays(mesh)
     
     # 選択された頂点のZ座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点を基準点とする
-    base_vertex = selected_vertices[0]
-    target_z = base_vertex.co.z
-
-    # 基準点のX-Y座標
-    base_point_2d = Vector((base_vertex.co.x, base_vertex.co.y))
+    base_point = coords[selected_indices[0]].astype(np.float64)
+    target_z = base_point[2]
 
     # 指定した高さにある頂点を収集し、基準点の近くのみに絞る
-    vertices_near_base = []
-    for v in bm.verts:
-        if abs(v.co.z - target_z) < tolerance:
-            point_2d = Vector((v.co.x, v.co.y))
-            if (point_2d - base_point_2d).length < distance_threshold:
-                vertices_near_base.append(v.co)
+    vertices_near_base = collect_points_near_base(coords, base_point, target_z, tolerance, distance_threshold, axis=2)
     
-    if not vertices_near_base:
+    if len(vertices_near_base) == 0:
         print("No vertices found near the base point at the target height.")
-        bm.free()
         return
     
     # 2D座標への投影（X-Y平面）
-    points_2d = [(int((v.x - base_vertex.co.x) / distance_threshold * image_size / 2 + image_size / 2), int((v.y - base_vertex.co.y) / distance_threshold * image_size / 2 + image_size / 2)) for v in vertices_near_base]
+    points_2d = ((vertices_near_base[:, [0, 1]] - base_point[[0, 1]]) / distance_threshold * image_size / 2 + image_size / 2).astype(np.int64)
 
-    # 空の画像を作成して、ポイントを描画
-    image = np.zeros((image_size, image_size), dtype=np.uint8)
-    for point in points_2d:
-        cv2.circle(image, point, 1, 255, -1)
+    # ポイントを描画（全点を一括で書き込み、円の形に膨張させる）
+    image = rasterize_points(points_2d, image_size, 1)
     
     # blur    
 #    image = cv2.GaussianBlur(image, ksize=(9,9), sigmaX=0, sigmaY=0)
@@ -90,9 +82,6 @@ def extract_circles_near_point_with_hough_transform(tolerance=10, distance_thres
     cv2.imwrite(temp_file.name, image)
     print(f"2D projection image saved to {temp_file.name}")
 
-    # メッシュデータの解放
-    bm.free()
-
     # 保存した画像を自動で開く
     subprocess.run(["xdg-open", temp_file.name])  # Linuxの場合
 
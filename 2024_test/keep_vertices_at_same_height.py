@@ -1,5 +1,12 @@
 import bpy
-import bmesh
+import numpy as np
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays
+from pepper_analysis.slab_index import get_slab_index
+from pepper_analysis.crop import delete_vertices
 
 def keep_vertices_at_same_height(tolerance=0.001):
     obj = bpy.context.object
@@ -7,30 +14,22 @@ def keep_vertices_at_same_height(tolerance=0.001):
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    coords, select = read_mesh_arrays(mesh)
     
     # 選択された頂点のZ座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点のZ座標を基準にする
-    target_z = selected_vertices[0].co.z
-
-    # 同じ高さにない頂点を削除対象にする
-    for v in bm.verts:
-        if abs(v.co.z - target_z) >= tolerance:
-            bm.verts.remove(v)
+    target_z = coords[selected_indices[0], 2]
 
-    # メッシュの更新と選択反映
-    bm.to_mesh(mesh)
-    bm.free()
-    mesh.update()
+    # Z座標でソートした索引から同じ高さの頂点を取得し、それ以外をまとめて削除する
+    z_index = get_slab_index(mesh.name, coords, axis=2)
+    delete_vertices(mesh, ~z_index.query_mask(target_z, tolerance))
     
     print(f"Vertices at height {target_z} kept, others deleted.")
 
@@ -1,6 +1,5 @@
 import bpy
 import bmesh
-from shapely.geometry import Polygon
 
 def projected_area():
     obj = bpy.context.object
@@ -35,7 +34,8 @@ def projected_area():
 
     #print(points)
 
-    # Polygonオブジェクトを作成
+    # Polygonオブジェクトを作成（shapely は面積を計算するときだけ読み込む）
+    from shapely.geometry import Polygon
     polygon = Polygon(points)
 
     # 面積を計算
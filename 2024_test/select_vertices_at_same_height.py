@@ -1,5 +1,12 @@
 import bpy
-import bmesh
+import numpy as np
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays, write_vertex_selection
+from pepper_analysis.slab_index import get_slab_index
+from pepper_analysis.selection import slab_mask
 
 def select_vertices_at_same_height(tolerance=10):
     obj = bpy.context.object
@@ -7,32 +14,27 @@ def select_vertices_at_same_height(tolerance=10):
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    coords, select = read_mesh_arrays(mesh)
     
     # 選択された頂点のZ座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点のZ座標を基準にする
-    target_z = selected_vertices[0].co.z
+    base_point = coords[selected_indices[0]]
+    target_z = base_point[2]
 
-    # すべての頂点を確認し、同じ高さの頂点を選択
-    for v in bm.verts:
-        if abs(v.co.z - target_z) < tolerance:
-            v.select = True
+    # Z座標でソートした索引から同じ高さの頂点を取得
+    z_index = get_slab_index(mesh.name, coords, axis=2)
 
-    # メッシュの更新と選択反映
-    bm.to_mesh(mesh)
-    bm.free()
-    mesh.update()
+    # 同じ高さの頂点を選択に加え、選択状態を配列のまま書き込む（BMesh は作らない）
+    write_vertex_selection(mesh, select | slab_mask(coords, base_point, "z", tolerance, slab_index=z_index))
     
     print(f"Vertices at height {target_z} selected.")
 
 # スクリプトを実行
-select_vertices_at_same_height(tolerance=10)
\ No newline at end of file
+select_vertices_at_same_height(tolerance=10)
@@ -0,0 +1,42 @@
+import bpy
+import numpy as np
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays, write_vertex_selection
+from pepper_analysis.selection import slab_mask
+
+### パラメータ ###
+NORMAL = "z" # 平面の法線. 軸 ("x", "y", "z") または任意の方向のベクトル (例: (1, 1, 0))
+TOLERANCE = 0.01 # [m] 選択した点を通る平面からの距離がこの値未満の頂点を選択
+EXTEND = True # True: 今の選択に加える, False: スラブ内の頂点だけを選択
+
+def select_vertices_in_slab(normal, tolerance, extend=True):
+    obj = bpy.context.object
+    if obj is None or obj.type != 'MESH':
+        print("No mesh object selected.")
+        return
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
+    mesh = obj.data
+    coords, select = read_mesh_arrays(mesh)
+
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
+        print("No vertices selected.")
+        bpy.ops.object.mode_set(mode='EDIT')
+        return
+
+    # 最初の選択頂点を通り、法線に垂直な平面の近くの頂点を選択（BMesh は作らない）
+    base_point = coords[selected_indices[0]]
+    in_slab = slab_mask(coords, base_point, normal, tolerance)
+    write_vertex_selection(mesh, select | in_slab if extend else in_slab)
+
+    print(f"{np.count_nonzero(in_slab)} vertices in the slab through {base_point.tolist()} selected.")
+    bpy.ops.object.mode_set(mode='EDIT')
+
+# スクリプトを実行
+select_vertices_in_slab(NORMAL, TOLERANCE, extend=EXTEND)
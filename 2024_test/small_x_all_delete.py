@@ -1,5 +1,11 @@
 import bpy
-import bmesh
+import numpy as np
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.mesh_access import read_mesh_arrays
+from pepper_analysis.crop import delete_vertices
 
 def keep_vertices_at_same_height():
     obj = bpy.context.object
@@ -7,30 +13,21 @@ def keep_vertices_at_same_height():
         print("No mesh object selected.")
         return
 
-    # メッシュデータの準備
+    # メッシュデータの準備（全頂点の座標と選択状態を配列で取得）
     mesh = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    coords, select = read_mesh_arrays(mesh)
     
     # 選択された頂点のx座標を取得
-    selected_vertices = [v for v in bm.verts if v.select]
-    if not selected_vertices:
+    selected_indices = np.flatnonzero(select)
+    if selected_indices.size == 0:
         print("No vertices selected.")
-        bm.free()
         return
 
     # 最初の選択頂点のx座標を基準にする
-    target_x = selected_vertices[0].co.x
-
-    # 同じ高さにない頂点を削除対象にする
-    for v in bm.verts:
-        if target_x >= v.co.x:
-            bm.verts.remove(v)
+    target_x = coords[selected_indices[0], 0]
 
-    # メッシュの更新と選択反映
-    bm.to_mesh(mesh)
-    bm.free()
-    mesh.update()
+    # 同じ高さにない頂点を削除対象にする（削除対象をまとめて求めて一括削除）
+    delete_vertices(mesh, target_x >= coords[:, 0])
     
     print(f"Vertices at height {target_x} kept, others deleted.")
 
@@ -0,0 +1,80 @@
+"""中心推定 (ハフ変換) の 8 つのパラメータの組み合わせごとに精度と速度を測り, 予算を満たす最速の設定を選ぶ
+
+synthetic.make_slices で正解の分かっている断面を作り, GRID のすべての組み合わせで estimate_circle を実行する.
+基準点は果実のまわりのランダムな方向に置く. 組み合わせごとに検出率, 中心の誤差の分布 (中央値, 90 / 95 パーセンタイル, 最大),
+基準点の方向ごとの予算以内の割合の最小値, 1 回あたりの処理時間を表示し,
+中心の誤差が予算 (既定 2 mm) 以内の断面が REQUIRED_RATE 以上ある組み合わせのうち最速のものを
+スクリプトの定数の形で表示する. 全組み合わせの結果は JSON に保存する.
+
+使い方: python benchmarks/bench_center_accuracy.py --slices 2000 --budget 2.0 --output bench_center_accuracy.json
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pepper_analysis.accuracy import KNOBS, REQUIRED_RATE, cheapest_within_budget, evaluate_grid, parameter_grid
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_slices
+
+### パラメータ ###
+NUM_SLICES = 1000
+# 評価する値 (ここにないパラメータは pipeline の既定値). 半径は [pixel] なので IMAGE_SIZE と合わせて選ぶ
+GRID = {
+    "image_size": [60, 80, 100],
+    "point_size": [1, 2],
+    "dp": [1.0, 1.2, 1.5],
+    "min_dist": [15],
+    "param1": [50],
+    "param2": [20, 30],
+    "min_radius": [6, 10],
+    "max_radius": [25, 30],
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="中心推定のパラメータごとの精度と速度を合成データで測る")
+    parser.add_argument("--slices", type=int, default=NUM_SLICES, help="評価に使う断面の数")
+    parser.add_argument("--budget", type=float, default=2.0, help="中心の誤差の予算 [mm]")
+    parser.add_argument("--rate", type=float, default=REQUIRED_RATE, help="予算以内に入るべき断面の割合")
+    parser.add_argument("--seed", type=int, default=0, help="合成データの乱数のシード")
+    parser.add_argument("--output", default="bench_center_accuracy.json", help="結果を書き出す JSON ファイル")
+    return parser.parse_args()
+
+
+def print_stats(stats):
+    error = "   -  " if stats["error_median_mm"] is None else f"{stats['error_median_mm']:6.2f}"
+    p95 = "   -  " if stats["error_p95_mm"] is None else f"{stats['error_p95_mm']:6.2f}"
+    params = " ".join(f"{name}={stats[name]}" for name in KNOBS)
+    print(f"{params}: detected= {stats['detection_rate']:.3f}, within_budget= {stats['within_budget_rate']:.3f} "
+          f"(worst seed angle {stats['worst_seed_angle_within_budget_rate']:.3f}), "
+          f"error= {error} / {p95} [mm] (median / p95), time= {stats['ms_per_call']:.3f} [ms/call]")
+
+
+def main():
+    args = parse_args()
+    slices = make_slices(args.slices, seed=args.seed)
+    z_index = SlabIndex(slices.coords, axis=2)
+    print(f"{len(parameter_grid(GRID))} combinations x {args.slices} slices")
+
+    results = evaluate_grid(z_index, slices, GRID, budget=args.budget / 1000, callback=print_stats)
+    best = cheapest_within_budget(results, required_rate=args.rate)
+
+    if best is None:
+        print(f"No combination keeps {args.rate:.0%} of the slices within {args.budget} mm.")
+    else:
+        print(f"Fastest combination within {args.budget} mm ({best['within_budget_rate']:.1%} of slices, {best['ms_per_call']:.3f} ms/call):")
+        for name in KNOBS:
+            print(f"{name.upper()} = {best[name]}")
+
+    report = dict(created=datetime.datetime.now().isoformat(timespec="seconds"), slices=args.slices, seed=args.seed,
+                  budget_mm=args.budget, required_rate=args.rate, grid=GRID, best=best, results=results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
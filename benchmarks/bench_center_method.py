@@ -0,0 +1,79 @@
+"""中心推定の方法 (ハフ変換 / 2 段のハフ変換 / RANSAC + 円のあてはめ) の速度と精度を比べる
+
+Blender を使わずに, 果実の断面 (ノイズ付きの円周) と葉・茎に見立てた点を並べた
+合成データを作り, pipeline.estimate_circle を方法ごとに実行して
+中心の誤差, 半径の誤差, 1 断面あたりの処理時間を表示する.
+シード点は果実の中心から SEED_OFFSET だけ, ランダムな方向にずらした位置に置く.
+
+使い方: python benchmarks/bench_center_method.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pepper_analysis.pipeline import estimate_circle
+from pepper_analysis.slab_index import SlabIndex
+
+### パラメータ ###
+NUM_FRUITS = 50 # 果実の数
+FRUIT_RADIUS = (0.025, 0.04) # [m] 果実の半径の範囲
+NOISE = 0.0005 # [m] 表面の点のばらつき
+VISIBLE_ARC = 0.7 # スキャンで見えている円周の割合
+CLUTTER_POINTS = 300 # 葉・茎の点の数
+SEED_OFFSET = 0.01 # [m] シード点を果実の中心からずらす量
+METHODS = [("hough", None), ("pyramid", None), ("ransac", "kasa"), ("ransac", "pratt"), ("ransac", "taubin")]
+# 合成データの半径に合わせて投影範囲を広げる
+CIRCLE_PARAMS = dict(distance_threshold=0.06, image_size=100, min_radius=15, max_radius=45, param2=20)
+
+
+def make_fruit(rng, center, radius):
+    """果実 1 個分の断面の点群 (高さ 0 の層) を作る"""
+    start = rng.uniform(0, 2 * np.pi)
+    t = start + rng.uniform(0, 2 * np.pi * VISIBLE_ARC, 2000)
+    ring = center + radius * np.column_stack([np.cos(t), np.sin(t)]) + rng.normal(0, NOISE, (len(t), 2))
+
+    # 葉 (果実の外の線分) と茎 (果実の近くの小さな塊)
+    leaf_start = center + rng.uniform(-2, 2, 2) * radius
+    leaf = leaf_start + rng.uniform(0, 1, (CLUTTER_POINTS, 1)) * rng.normal(0, radius, 2)
+    stem = center + rng.normal(0, radius * 0.1, (CLUTTER_POINTS // 3, 2))
+    points = np.vstack([ring, leaf, stem])
+    z = rng.uniform(-0.005, 0.005, (len(points), 1))
+    return np.hstack([points, z]).astype(np.float32)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    fruits = []
+    for i in range(NUM_FRUITS):
+        center = np.array([i * 0.5, 0.0])
+        radius = rng.uniform(*FRUIT_RADIUS)
+        fruits.append((center, radius, make_fruit(rng, center, radius)))
+    z_index = SlabIndex(np.vstack([points for _, _, points in fruits]), axis=2)
+    seed_angles = rng.uniform(0, 2 * np.pi, NUM_FRUITS)
+
+    for method, fit in METHODS:
+        center_errors = []
+        radius_errors = []
+        start = time.perf_counter()
+        for (center, radius, _), seed_angle in zip(fruits, seed_angles):
+            base_point = np.array([center[0] + SEED_OFFSET * np.cos(seed_angle), center[1] + SEED_OFFSET * np.sin(seed_angle), 0.0])
+            world_circle = estimate_circle(z_index, base_point, 0.0, method=method, fit=fit or "taubin", **CIRCLE_PARAMS)
+            if world_circle is None:
+                continue
+            center_errors.append(np.hypot(world_circle[0] - center[0], world_circle[1] - center[1]))
+            radius_errors.append(abs(world_circle[2] - radius))
+        elapsed = time.perf_counter() - start
+
+        name = method if fit is None else f"{method}+{fit}"
+        if center_errors:
+            print(f"{name:14s} detected= {len(center_errors)}/{NUM_FRUITS}, center_error= {np.median(center_errors) * 1000:.2f} [mm] (median), "
+                  f"radius_error= {np.median(radius_errors) * 1000:.2f} [mm] (median), time= {elapsed / NUM_FRUITS * 1000:.2f} [ms/slice]")
+        else:
+            print(f"{name:14s} detected= 0/{NUM_FRUITS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""ハフ変換のパラメータの掃引で, 途中の結果を使い回す場合 (param_sweep) と毎回すべて計算し直す場合の時間を比べる
+
+synthetic.make_slices の断面に対して GRID のすべての組み合わせで中心を推定し,
+両方の結果が一致することと, 段階ごとに計算した回数 / 使い回した回数を表示する.
+
+使い方: python benchmarks/bench_param_sweep.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pepper_analysis.param_sweep import STAGES, sweep
+from pepper_analysis.pipeline import estimate_circle
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_slices
+
+### パラメータ ###
+NUM_SLICES = 100
+GRID = {
+    "image_size": [80, 100],
+    "param2": [15, 20, 25, 30, 35],
+    "min_radius": [6, 8, 10, 12],
+    "max_radius": [25, 30],
+}
+
+
+def same_circle(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return np.allclose(a, b)
+
+
+def main():
+    slices = make_slices(NUM_SLICES)
+    z_index = SlabIndex(slices.coords, axis=2)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        combinations, results, sweeps = sweep(z_index, slices.seed_points, GRID)
+        cached = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = [[estimate_circle(z_index, seed_point, seed_point[2], **params) for seed_point in slices.seed_points] for params in combinations]
+        recompute = time.perf_counter() - start
+
+    match = all(same_circle(a, b) for row_a, row_b in zip(results, full) for a, b in zip(row_a, row_b))
+    print(f"{len(combinations)} combinations x {NUM_SLICES} slices, results match= {match}")
+    print(f"recompute= {recompute * 1000:.1f} [ms], cached= {cached * 1000:.1f} [ms], speedup= {recompute / cached:.2f}x")
+    for stage in STAGES:
+        computed = sum(slice_sweep.computed[stage.name] for slice_sweep in sweeps)
+        reused = sum(slice_sweep.reused[stage.name] for slice_sweep in sweeps)
+        print(f"{stage.name:10s} computed= {computed:6d}, reused= {reused:6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""元のスクリプト (BMesh の頂点を 1 つずつ回す版) と配列版のスクリプトの実行時間を並べて測る
+
+元のスクリプトは, 同じパスのスクリプトを書き換える前のリビジョン (既定は最初のコミット) から
+git で取り出したもので, パラメータも同じなので同じ処理の時間を比べられる.
+
+blender_standin を bpy, bmesh, mathutils の代わりに登録し, synthetic.make_plant で作った合成メッシュを
+アクティブなオブジェクトにして, 各スクリプトを Blender のテキストエディタから実行したときと同じく実行する.
+元の obst_dist_measure_angle.py は障害物のない方向があると止まるので, 株を囲む円筒を加えた (make_plant(enclosure=True))
+シーンを使う. 選択する頂点は 1 つ目の果実の seed_points (ランダムな方向の表面の点) に最も近い頂点.
+元のスクリプトの既知の不具合 (uint16 の回り込みや x, y の入れ替わり) は blender_standin.BASELINE_FIXES で直し,
+両方が同じ円から同じ処理をするようにする (結果が同じことは tests/test_script_equivalence.py で確かめる).
+結果の画像を開く処理 (os.startfile など) は行わない. 実行中に例外が出た場合は時間の代わりにエラーを記録し, 最後に一覧を表示する.
+配列版はメッシュの配列や索引をメモリ上にキャッシュするので, 1 回目と 2 回目以降の時間を分けて記録する.
+ディスクキャッシュと結果の画像は実行中だけの一時ディレクトリに置く (ユーザーのキャッシュを使わず, 終了時に消す).
+
+使い方: python benchmarks/bench_scripts.py --sizes 10000 100000 --baseline <リビジョン> --output bench_scripts.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin, disk_cache
+from pepper_analysis.synthetic import make_plant
+
+### パラメータ ###
+SIZES = [10000, 100000] # 頂点数
+REPEAT = 3 # 各スクリプトを実行する回数
+# 比べるスクリプト (元のスクリプトは同じパスの書き換える前のもの)
+SCRIPTS = [
+    "0729_nouken_analysis/script/center_point_estimation.py",
+    "0729_nouken_analysis/script/peduncle_center_point_estimation.py",
+    "0729_nouken_analysis/script/obst_dist_measure_angle.py",
+]
+# 元のスクリプトから除く行 (使っていない import. 配列版では削除済みで, matplotlib がない環境でも実行できるようにする)
+UNUSED_IMPORTS = ("import matplotlib.pyplot as plt",)
+
+
+def run_once(plant, seed_vertex, path):
+    """シーンを作り直してスクリプトを 1 回実行し, 時間 [s] を返す (スクリプトの出力は捨てる)"""
+    blender_standin.install()
+    blender_standin.new_mesh_object("Plant", plant.coords, plant.faces, select=[seed_vertex], select_history=[seed_vertex])
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        blender_standin.run_script(path)
+    return time.perf_counter() - start
+
+
+def bench_size(n_vertices, repeat, baseline):
+    plant = make_plant(n_vertices, enclosure=True)
+    seed_vertex = plant.nearest_vertex(plant.seed_points[0])
+    results = []
+    for path in SCRIPTS:
+        name = os.path.splitext(os.path.basename(path))[0]
+        original = blender_standin.script_at_revision(ROOT, path, baseline, remove_lines=UNUSED_IMPORTS, replace_lines=blender_standin.BASELINE_FIXES.get(path))
+        try:
+            for version, script in (("original", original), ("optimized", os.path.join(ROOT, path))):
+                result = dict(script=name, version=version, path=path, revision=baseline if version == "original" else "HEAD", vertices=len(plant))
+                try:
+                    times = [run_once(plant, seed_vertex, script) for _ in range(repeat)]
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                else:
+                    result.update(first_ms=round(times[0] * 1000, 3), best_ms=round(min(times) * 1000, 3))
+                results.append(result)
+        finally:
+            os.remove(original)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="元のスクリプトと配列版のスクリプトの実行時間を合成メッシュで比べる")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="メッシュの頂点数 (複数指定可)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="各スクリプトを実行する回数")
+    parser.add_argument("--baseline", help="元のスクリプトを取り出すリビジョン (省略時は最初のコミット)")
+    parser.add_argument("--output", default="bench_scripts.json", help="結果を書き出す JSON ファイル")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = args.baseline or blender_standin.baseline_revision(ROOT)
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # 配列版のディスクキャッシュとスクリプトが書き出す画像は一時ディレクトリに置く
+        os.environ["PEPPER_CACHE_DIR"] = cache_dir
+        disk_cache.CACHE_DIR = cache_dir
+        tempfile.tempdir = cache_dir
+        for n_vertices in args.sizes:
+            for result in bench_size(n_vertices, args.repeat, baseline):
+                if "error" in result:
+                    print(f"{result['script']:34s} {result['version']:9s} vertices= {result['vertices']:>8d}, failed: {result['error']}")
+                else:
+                    print(f"{result['script']:34s} {result['version']:9s} vertices= {result['vertices']:>8d}, "
+                          f"first= {result['first_ms']:10.3f} [ms], best= {result['best_ms']:10.3f} [ms]")
+                results.append(result)
+        blender_standin.uninstall()
+        tempfile.tempdir = None
+
+    failed = [result for result in results if "error" in result]
+    if failed:
+        print(f"{len(failed)} runs failed:")
+        for result in failed:
+            print(f"  {result['script']} ({result['version']}, vertices= {result['vertices']}): {result['error']}")
+
+    report = dict(created=datetime.datetime.now().isoformat(timespec="seconds"), repeat=args.repeat, baseline=baseline,
+                  environment=dict(python=platform.python_version(), numpy=np.__version__, platform=platform.platform()), results=results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""パイプラインの処理ごとの速度を頂点数を変えて測り, JSON に保存する
+
+synthetic.make_plant で作った合成メッシュ (1 万 〜 1000 万頂点) に対して,
+投影 (projection_to_image), 中心推定 (center_point_estimation), 障害物距離計測 (obst_dist_measure),
+小さなアイランドの検出 (remove_small_islands と同じ polygon_islands) の時間を測る.
+各処理を REPEAT 回繰り返した最小の時間を記録し, 実行環境と一緒に JSON に書き出す.
+結果のファイルを並べて比べれば, 処理速度が落ちていないかを確認できる.
+
+使い方: python benchmarks/bench_stages.py --sizes 10000 100000 1000000 10000000 --output bench_stages.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pepper_analysis.islands import polygon_islands
+from pepper_analysis.pipeline import (DISTANCE_THRESHOLD, IMAGE_SIZE, TOLERANCE, DP, MIN_DIST, PARAM1, PARAM2, MIN_RADIUS, MAX_RADIUS,
+                                      APPROACH_ANGLE, center_point_estimation, obst_dist_measure, projection_to_image)
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_plant
+
+### パラメータ ###
+SIZES = [10000, 100000, 1000000] # 頂点数
+NUM_FRUITS = 4
+REPEAT = 3 # 各処理を繰り返す回数 (最小の時間を記録)
+ISLAND_THRESHOLD = 20 # remove_small_mesh.py の THRESHOLD
+
+
+def best_time(func, repeat):
+    """func を repeat 回実行し, (最小の時間 [s], 最後の戻り値) を返す"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_size(n_vertices, repeat):
+    """頂点数 n_vertices のメッシュで各処理を測り, 処理ごとの結果の dict のリストを返す"""
+    plant = make_plant(n_vertices, num_fruits=NUM_FRUITS)
+    n = len(plant)
+    seeds = plant.seed_points
+    results = []
+
+    def record(stage, seconds, calls, **fields):
+        result = dict(stage=stage, vertices=n, calls=calls, ms=round(seconds * 1000, 3),
+                      ms_per_call=round(seconds * 1000 / calls, 3), mvertices_per_s=round(n * calls / seconds / 1e6, 3) if seconds > 0 else None)
+        result.update(fields)
+        results.append(result)
+
+    seconds, z_index = best_time(lambda: SlabIndex(plant.coords, axis=2), repeat)
+    record("slab_index", seconds, 1)
+
+    seconds, images = best_time(lambda: [projection_to_image(z_index, seed, seed[2], TOLERANCE, DISTANCE_THRESHOLD, IMAGE_SIZE) for seed in seeds], repeat)
+    record("projection_to_image", seconds, len(seeds))
+
+    def estimate_all():
+        return [None if image is None else center_point_estimation(image, seed, DP, MIN_DIST, PARAM1, PARAM2, MIN_RADIUS, MAX_RADIUS)
+                for image, seed in zip(images, seeds)]
+    seconds, circles = best_time(estimate_all, repeat)
+    record("center_point_estimation", seconds, len(seeds), detected=sum(circle is not None for circle in circles))
+
+    # 障害物距離は中心推定の誤差に左右されないよう正解の円で測る
+    true_circles = [[x, y, r] for (x, y), r in zip(plant.fruit_centers, plant.fruit_radii)]
+    seconds, _ = best_time(lambda: [obst_dist_measure(z_index, circle, seed[2], np.radians(APPROACH_ANGLE)) for circle, seed in zip(true_circles, seeds)], repeat)
+    record("obst_dist_measure", seconds, len(seeds))
+
+    polygon_index, edge_index, n_edges = plant.polygon_edges()
+    def find_small_islands():
+        labels, sizes = polygon_islands(len(plant.faces), n_edges, polygon_index, edge_index)
+        return np.flatnonzero(sizes[labels] <= ISLAND_THRESHOLD)
+    seconds, small_faces = best_time(find_small_islands, repeat)
+    record("remove_small_islands", seconds, 1, faces=len(plant.faces), small_faces=len(small_faces))
+
+    return results
+
+
+def environment():
+    """結果と一緒に保存する実行環境"""
+    info = dict(python=platform.python_version(), numpy=np.__version__, platform=platform.platform(), processor=platform.processor())
+    try:
+        import cv2
+        info["opencv"] = cv2.__version__
+    except ImportError:
+        info["opencv"] = None
+    try:
+        import scipy
+        info["scipy"] = scipy.__version__
+    except ImportError:
+        info["scipy"] = None
+    return info
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="合成メッシュでパイプラインの処理ごとの速度を測る")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="メッシュの頂点数 (複数指定可)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="各処理を繰り返す回数")
+    parser.add_argument("--output", default="bench_stages.json", help="結果を書き出す JSON ファイル")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = []
+    for n_vertices in args.sizes:
+        for result in bench_size(n_vertices, args.repeat):
+            print(f"{result['stage']:24s} vertices= {result['vertices']:>9d}, {result['ms_per_call']:10.3f} [ms/call], {result['mvertices_per_s']} [Mvertices/s]")
+            results.append(result)
+
+    report = dict(created=datetime.datetime.now().isoformat(timespec="seconds"), repeat=args.repeat, environment=environment(), results=results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
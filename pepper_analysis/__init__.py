@@ -0,0 +1 @@
+"""ピーマン解析スクリプト群の共通処理"""
@@ -0,0 +1,101 @@
+"""中心推定のパラメータごとの精度と速度の評価
+
+正解の分かっている断面 (synthetic.make_slices) に対して estimate_circle をパラメータの組み合わせごとに実行し,
+中心の誤差の分布, 検出率, 1 回あたりの処理時間をまとめる.
+精度の予算 (中心の誤差 budget [m] 以内の断面の割合が required_rate 以上) を満たす組み合わせのうち,
+最も速いものを選べる.
+"""
+import contextlib
+import io
+import itertools
+import time
+
+import numpy as np
+
+from pepper_analysis.pipeline import DISTANCE_THRESHOLD, IMAGE_SIZE, POINT_SIZE, DP, MIN_DIST, PARAM1, PARAM2, MIN_RADIUS, MAX_RADIUS, TOLERANCE, estimate_circle
+
+# 評価するパラメータ (estimate_circle の引数名) と既定値
+KNOBS = {"dp": DP, "min_dist": MIN_DIST, "param1": PARAM1, "param2": PARAM2, "min_radius": MIN_RADIUS, "max_radius": MAX_RADIUS,
+         "image_size": IMAGE_SIZE, "point_size": POINT_SIZE}
+ACCURACY_BUDGET = 0.002 # [m] 中心の誤差の予算
+REQUIRED_RATE = 0.95 # 予算以内に入る断面の割合 (検出できなかった断面は予算外に数える)
+SEED_ANGLE_BINS = 8 # 基準点の方向 (果実の中心から見た角度) ごとの誤差を集計する区間の数
+
+
+def parameter_grid(grid):
+    """{パラメータ名: 値のリスト} のすべての組み合わせを dict のリストで返す. grid にないパラメータは既定値"""
+    unknown = set(grid) - set(KNOBS)
+    if unknown:
+        raise ValueError(f"未対応のパラメータです: {sorted(unknown)}")
+    names = list(grid)
+    combinations = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(KNOBS)
+        params.update(zip(names, values))
+        combinations.append(params)
+    return combinations
+
+
+def evaluate(z_index, slices, params, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, budget=ACCURACY_BUDGET, method="hough", quiet=True):
+    """パラメータ params で全断面の中心を推定し, 誤差と処理時間の統計を dict で返す
+
+    誤差と時間の単位は [mm] と [ms]. 誤差の統計は検出できた断面だけで計算する.
+    基準点の方向による偏りが分かるよう, 0°, 45°, ... を中心とした SEED_ANGLE_BINS 個の区間ごとの
+    誤差の中央値と予算以内の割合も返す (断面がない区間は None).
+    quiet なら推定中の print (No circles detected. など) を出さない.
+    """
+    n = len(slices.seed_points)
+    errors = np.full(n, np.inf)
+    radius_errors = np.full(n, np.inf)
+    latencies = np.empty(n)
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with output:
+        for i, seed_point in enumerate(slices.seed_points):
+            start = time.perf_counter()
+            circle = estimate_circle(z_index, seed_point, seed_point[2], tolerance=tolerance, distance_threshold=distance_threshold, method=method, **params)
+            latencies[i] = time.perf_counter() - start
+            if circle is not None:
+                errors[i] = np.hypot(circle[0] - slices.fruit_centers[i, 0], circle[1] - slices.fruit_centers[i, 1])
+                radius_errors[i] = abs(circle[2] - slices.fruit_radii[i])
+
+    detected = np.isfinite(errors)
+    found = errors[detected] * 1000
+    stats = dict(params, slices=n, detection_rate=float(detected.mean()), within_budget_rate=float((errors <= budget).mean()),
+                 ms_per_call=float(latencies.mean() * 1000), p95_ms=float(np.percentile(latencies, 95) * 1000))
+    for name, q in (("median", 50), ("p90", 90), ("p95", 95), ("max", 100)):
+        stats[f"error_{name}_mm"] = float(np.percentile(found, q)) if len(found) else None
+    stats["radius_error_median_mm"] = float(np.median(radius_errors[detected]) * 1000) if len(found) else None
+
+    # 基準点の方向ごとの誤差
+    bin_width = 2 * np.pi / SEED_ANGLE_BINS
+    bins = (np.mod(slices.seed_angles + bin_width / 2, 2 * np.pi) // bin_width).astype(np.int64)
+    medians = []
+    rates = []
+    for b in range(SEED_ANGLE_BINS):
+        in_bin = bins == b
+        found_in_bin = errors[in_bin & detected] * 1000
+        medians.append(float(np.median(found_in_bin)) if len(found_in_bin) else None)
+        rates.append(float((errors[in_bin] <= budget).mean()) if in_bin.any() else None)
+    stats["error_median_by_seed_angle_mm"] = medians
+    stats["within_budget_rate_by_seed_angle"] = rates
+    stats["worst_seed_angle_within_budget_rate"] = min((rate for rate in rates if rate is not None), default=0.0)
+    return stats
+
+
+def evaluate_grid(z_index, slices, grid, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, budget=ACCURACY_BUDGET, method="hough", callback=None):
+    """grid のすべての組み合わせを evaluate し, 結果のリストを返す. callback があれば 1 組ごとに結果を渡す"""
+    results = []
+    for params in parameter_grid(grid):
+        stats = evaluate(z_index, slices, params, tolerance=tolerance, distance_threshold=distance_threshold, budget=budget, method=method)
+        if callback is not None:
+            callback(stats)
+        results.append(stats)
+    return results
+
+
+def cheapest_within_budget(results, required_rate=REQUIRED_RATE):
+    """予算以内の割合が全体でも基準点の方向ごとでも required_rate 以上の結果のうち, 1 回あたりの処理時間が最短のものを返す. なければ None"""
+    passing = [stats for stats in results if stats["within_budget_rate"] >= required_rate and stats["worst_seed_angle_within_budget_rate"] >= required_rate]
+    if not passing:
+        return None
+    return min(passing, key=lambda stats: stats["ms_per_call"])
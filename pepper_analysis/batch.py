@@ -0,0 +1,74 @@
+"""複数の果実の障害物距離をまとめて計測する
+
+基準点 (シード点) のリストを受け取り, 1 点ごとに pipeline.measure_fruit を実行して
+果実 1 個につき 1 行の結果を作る. シード点は CSV / JSON ファイルか選択頂点から与える.
+"""
+import csv
+import json
+import os
+
+import numpy as np
+
+from pepper_analysis.pipeline import measure_fruit
+
+# 結果の列 (長さの単位は [m])
+RESULT_FIELDS = ["id", "seed_x", "seed_y", "seed_z", "center_x", "center_y", "radius",
+                 "left_obst_dist", "right_obst_dist", "front_obst_dist", "behind_obst_dist", "status"]
+
+
+def load_seed_points(path):
+    """CSV または JSON ファイルからシード点を読み込み, (ids, (K, 3) 配列) を返す
+
+    CSV は x, y, z の列 (任意で id 列) を持つヘッダ付きの表.
+    JSON は [x, y, z] のリスト, または x, y, z (任意で id) を持つオブジェクトのリスト.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+        records = [r if isinstance(r, dict) else dict(zip("xyz", r)) for r in records]
+    elif ext == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+    else:
+        raise ValueError(f"対応していないファイル形式です: {path}")
+
+    ids = [str(r.get("id", i)) for i, r in enumerate(records)]
+    points = np.array([[float(r["x"]), float(r["y"]), float(r["z"])] for r in records], dtype=np.float64).reshape(-1, 3)
+    return ids, points
+
+
+def result_row(seed_id, seed_point, result):
+    """measure_fruit の結果を 1 行分の dict にする"""
+    row = dict.fromkeys(RESULT_FIELDS)
+    row["id"] = seed_id
+    row["seed_x"], row["seed_y"], row["seed_z"] = (float(v) for v in seed_point)
+    if result is None:
+        row["status"] = "failed"
+        return row
+
+    world_circle, obst_dist = result
+    row["center_x"], row["center_y"], row["radius"] = (float(v) for v in world_circle[:3])
+    row["left_obst_dist"], row["right_obst_dist"], row["front_obst_dist"], row["behind_obst_dist"] = obst_dist
+    row["status"] = "ok"
+    return row
+
+
+def run_batch(z_index, seed_ids, seed_points, kdtree=None, **params):
+    """全シード点について計測し, 結果の行のリストを返す
+
+    params は pipeline.measure_fruit のキーワード引数 (tolerance, dp, approach_angle など).
+    """
+    rows = []
+    for seed_id, seed_point in zip(seed_ids, seed_points):
+        result = measure_fruit(z_index, seed_point, kdtree=kdtree, **params)
+        rows.append(result_row(seed_id, seed_point, result))
+    return rows
+
+
+def write_results_csv(path, rows):
+    """結果の行を CSV に書き出す"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,165 @@
+"""Blender なしでスクリプトを実行するための bpy, bmesh, mathutils の代わり
+
+スクリプトが使う範囲 (bpy.context.object, Mesh の foreach_get / foreach_set, bm.from_mesh / to_mesh,
+bm.verts, select, link_edges, select_history, bmesh.ops.delete, mathutils.Vector / kdtree など) だけを
+NumPy 配列で実装している. install() で sys.modules に登録すると, 既存のスクリプトも
+配列版の処理もそのまま import / 実行でき, 同じメッシュで処理時間や結果を比べられる.
+
+使い方:
+    from pepper_analysis import blender_standin
+    blender_standin.install()
+    obj = blender_standin.new_mesh_object("Plant", coords, faces, select=select)
+    blender_standin.run_script("0729_nouken_analysis/script/center_point_estimation.py")
+
+書き換える前のスクリプトと比べるときは, script_at_revision で git の過去のリビジョン
+(既定は最初のコミット) のスクリプトを一時ファイルに取り出して run_script に渡す.
+BASELINE_FIXES を replace_lines に渡すと, 元のスクリプトの既知の不具合を直してから取り出す.
+"""
+import contextlib
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from pepper_analysis.blender_standin import bmesh, bpy, mathutils
+from pepper_analysis.blender_standin.mathutils import kdtree
+
+MODULES = {"bpy": bpy, "bmesh": bmesh, "mathutils": mathutils, "mathutils.kdtree": kdtree}
+
+
+def install(reset=True):
+    """sys.modules に bpy, bmesh, mathutils として登録する. reset ならシーンを空にする
+
+    すでに本物の Blender のモジュールが読み込まれている場合は何もしない.
+    """
+    current = sys.modules.get("bpy")
+    if current is not None and current is not bpy:
+        return current
+    sys.modules.update(MODULES)
+    if reset:
+        bpy.reset()
+    return bpy
+
+
+def uninstall():
+    """install で登録したモジュールを sys.modules から外す"""
+    for name, module in MODULES.items():
+        if sys.modules.get(name) is module:
+            del sys.modules[name]
+
+
+def new_mesh_object(name, coords, faces=(), edges=(), select=None, select_history=()):
+    """頂点座標と面からメッシュのオブジェクトを作り, シーンに追加してアクティブにする
+
+    select は選択する頂点の bool 配列かインデックスの列, select_history は選択した順の頂点のインデックス.
+    """
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(coords, edges, faces)
+    if select is not None:
+        select = np.asarray(select)
+        mask = select if select.dtype == bool else np.isin(np.arange(len(mesh.vertices)), select)
+        mesh.vertices.foreach_set("select", mask)
+    mesh.select_history = list(select_history)
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.collection.objects.link(obj)
+    for other in bpy.context.scene.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+    return obj
+
+
+@contextlib.contextmanager
+def _no_viewer():
+    """スクリプトが結果の画像を外部のビューアで開かないようにする"""
+    startfile = getattr(os, "startfile", None)
+    run = subprocess.run
+
+    def skip_viewer(args, *pargs, **kwargs):
+        if isinstance(args, (list, tuple)) and args and args[0] in ("xdg-open", "open"):
+            return subprocess.CompletedProcess(args, 0)
+        return run(args, *pargs, **kwargs)
+
+    os.startfile = lambda *args, **kwargs: None
+    subprocess.run = skip_viewer
+    try:
+        yield
+    finally:
+        subprocess.run = run
+        if startfile is None:
+            del os.startfile
+        else:
+            os.startfile = startfile
+
+
+# 元のスクリプトの既知の不具合 (配列版では修正済み) を直す行. script_at_revision の replace_lines に渡し, 同じ処理をさせて結果や時間を比べる.
+# 円の中心の画素を uint16 のまま計算するので, 中心が画像の左上側にあると値が回り込む
+_PIXEL_FIX = {
+    "center_x = circle[0]  # X座標をスケールに合わせて戻す": "center_x = int(circle[0])  # X座標をスケールに合わせて戻す",
+    "center_y = circle[1]  # y座標をスケールに合わせて戻す": "center_y = int(circle[1])  # y座標をスケールに合わせて戻す",
+    "radius = circle[2]    # 半径もスケールに合わせて戻す": "radius = int(circle[2])    # 半径もスケールに合わせて戻す",
+}
+# 投影画像の反転・回転を戻さずに中心のワールド座標を求めている
+BASELINE_FIXES = {
+    "0729_nouken_analysis/script/center_point_estimation.py": dict(_PIXEL_FIX, **{
+        "world_center_x = (2*center_x - image_size)*distance_threshold/image_size + base_vertex.co.x":
+            "world_center_x = (2*center_y - image_size)*distance_threshold/image_size + base_vertex.co.x",
+        "world_center_y = (2*center_y - image_size)*distance_threshold/image_size + base_vertex.co.y":
+            "world_center_y = (2*center_x - image_size)*distance_threshold/image_size + base_vertex.co.y",
+    }),
+    "0729_nouken_analysis/script/peduncle_center_point_estimation.py": dict(_PIXEL_FIX, **{
+        "world_center_x = (2*center_x - image_size)*distance_threshold/image_size + base_vertex.co.x":
+            "world_center_x = (2*(image_size - 1 - center_x) - image_size)*distance_threshold/image_size + base_vertex.co.x",
+    }),
+    "0729_nouken_analysis/script/obst_dist_measure_angle.py": dict(_PIXEL_FIX, **{
+        "world_center_x = (2*center_x - IMAGE_SIZE)*DISTANCE_THRESHOLD/IMAGE_SIZE + base_vertex.co.x":
+            "world_center_x = (2*center_y - IMAGE_SIZE)*DISTANCE_THRESHOLD/IMAGE_SIZE + base_vertex.co.x",
+        "world_center_y = (2*center_y - IMAGE_SIZE)*DISTANCE_THRESHOLD/IMAGE_SIZE + base_vertex.co.y":
+            "world_center_y = (2*center_x - IMAGE_SIZE)*DISTANCE_THRESHOLD/IMAGE_SIZE + base_vertex.co.y",
+    }),
+}
+
+
+def baseline_revision(repo):
+    """リポジトリ repo の最初のコミット (スクリプトを書き換える前の状態) のハッシュを返す"""
+    result = subprocess.run(["git", "-C", repo, "rev-list", "--max-parents=0", "HEAD"], capture_output=True, text=True, check=True)
+    return result.stdout.split()[-1]
+
+
+def script_at_revision(repo, path, revision=None, remove_lines=(), replace_lines=None):
+    """リポジトリ repo のリビジョン revision (省略時は baseline_revision) の path のスクリプトを一時ファイルに書き出し, そのパスを返す
+
+    path は repo からの相対パス. remove_lines に一致する行 (使っていない import など) は除き,
+    replace_lines ({元の行: 新しい行}, 前後の空白を除いて比べる) に一致する行はインデントを保ったまま置き換える.
+    一時ファイルは呼び出し側で消す.
+    """
+    revision = revision or baseline_revision(repo)
+    replace_lines = replace_lines or {}
+    result = subprocess.run(["git", "-C", repo, "show", f"{revision}:{path.replace(os.sep, '/')}"], capture_output=True, text=True, encoding="utf-8", check=True)
+    lines = []
+    for line in result.stdout.splitlines(keepends=True):
+        key = line.strip()
+        if key in remove_lines:
+            continue
+        if key in replace_lines:
+            line = line[:len(line) - len(line.lstrip())] + replace_lines[key] + "\n"
+        lines.append(line)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".py", delete=False) as f:
+        f.writelines(lines)
+    return f.name
+
+
+def run_script(path, viewer=False):
+    """スクリプトを Blender のテキストエディタから実行したときと同じく __main__ として実行し, 変数の dict を返す
+
+    viewer が False なら os.startfile / xdg-open による画像の表示は行わない.
+    """
+    install(reset=False)
+    with contextlib.ExitStack() as stack:
+        if not viewer:
+            stack.enter_context(_no_viewer())
+        return runpy.run_path(path, run_name="__main__")
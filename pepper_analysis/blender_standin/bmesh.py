@@ -0,0 +1,317 @@
+"""bmesh の代わり (new, from_edit_mesh, update_edit_mesh, ops.delete と BMesh の基本操作のみ)
+
+BMesh は Blender と同じく頂点, 辺, 面を 1 つずつのオブジェクトで持つ. そのため
+bm.from_mesh や bm.verts を回す処理の重さは, 配列で処理する場合との比較に使える.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from pepper_analysis.blender_standin.mathutils import Vector
+
+
+class BMVert:
+    __slots__ = ("co", "select", "hide", "index", "link_edges", "link_faces", "is_valid", "_source")
+
+    def __init__(self, co, select=False, hide=False, index=-1, source=-1):
+        self.co = co
+        self.select = select
+        self.hide = hide
+        self.index = index
+        self.link_edges = []
+        self.link_faces = []
+        self.is_valid = True
+        self._source = source
+
+    def select_set(self, select):
+        self.select = bool(select)
+
+    def __repr__(self):
+        return f"<BMVert index={self.index}>"
+
+
+class BMEdge:
+    __slots__ = ("verts", "select", "hide", "index", "link_faces", "is_valid")
+
+    def __init__(self, verts, select=False, hide=False, index=-1):
+        self.verts = verts
+        self.select = select
+        self.hide = hide
+        self.index = index
+        self.link_faces = []
+        self.is_valid = True
+
+    def other_vert(self, vert):
+        a, b = self.verts
+        if vert is a:
+            return b
+        if vert is b:
+            return a
+        return None
+
+    def select_set(self, select):
+        self.select = bool(select)
+
+    def __repr__(self):
+        return f"<BMEdge index={self.index}>"
+
+
+class BMFace:
+    __slots__ = ("verts", "edges", "select", "hide", "index", "is_valid")
+
+    def __init__(self, verts, edges, select=False, hide=False, index=-1):
+        self.verts = verts
+        self.edges = edges
+        self.select = select
+        self.hide = hide
+        self.index = index
+        self.is_valid = True
+
+    def select_set(self, select):
+        self.select = bool(select)
+
+    def __repr__(self):
+        return f"<BMFace index={self.index}>"
+
+
+class BMElemSeq:
+    """bm.verts などの代わり. 挿入順を保つ dict で持ち, remove は要素数によらず一定時間"""
+
+    def __init__(self):
+        self._items = {}
+        self._table = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __getitem__(self, index):
+        if self._table is None:
+            raise IndexError("BMElemSeq[index]: outdated internal index table, run ensure_lookup_table() first")
+        return self._table[index]
+
+    def ensure_lookup_table(self):
+        self._table = list(self._items)
+
+    def index_update(self):
+        for i, item in enumerate(self._items):
+            item.index = i
+
+    def _add(self, item):
+        self._items[item] = None
+        self._table = None
+        return item
+
+    def _discard(self, item):
+        del self._items[item]
+        item.is_valid = False
+        self._table = None
+
+
+class BMVertSeq(BMElemSeq):
+    def __init__(self, bm):
+        super().__init__()
+        self._bm = bm
+
+    def new(self, co=(0.0, 0.0, 0.0)):
+        return self._add(BMVert(Vector(co)))
+
+    def remove(self, vert):
+        self._bm._remove_vert(vert)
+
+
+class BMEdgeSeq(BMElemSeq):
+    def __init__(self, bm):
+        super().__init__()
+        self._bm = bm
+
+    def new(self, verts):
+        return self._bm._new_edge(tuple(verts))
+
+    def remove(self, edge):
+        self._bm._remove_edge(edge)
+
+
+class BMFaceSeq(BMElemSeq):
+    def __init__(self, bm):
+        super().__init__()
+        self._bm = bm
+
+    def new(self, verts):
+        return self._bm._new_face(list(verts))
+
+    def remove(self, face):
+        self._bm._remove_face(face)
+
+
+class BMesh:
+    """bmesh.types.BMesh の代わり"""
+
+    def __init__(self):
+        self.verts = BMVertSeq(self)
+        self.edges = BMEdgeSeq(self)
+        self.faces = BMFaceSeq(self)
+        self.select_history = []
+        self.is_valid = True
+        self._point_layers = {}
+
+    # 要素の追加と削除 (つながりの情報も合わせて更新する)
+    def _new_edge(self, verts, select=False, hide=False, index=-1):
+        edge = self.edges._add(BMEdge(verts, select, hide, index))
+        for vert in verts:
+            vert.link_edges.append(edge)
+        return edge
+
+    def _new_face(self, verts, edges=None, select=False, hide=False, index=-1):
+        if edges is None:
+            edges = [self._find_or_new_edge(a, b) for a, b in zip(verts, verts[1:] + verts[:1])]
+        face = self.faces._add(BMFace(verts, edges, select, hide, index))
+        for vert in verts:
+            vert.link_faces.append(face)
+        for edge in edges:
+            edge.link_faces.append(face)
+        return face
+
+    def _find_or_new_edge(self, a, b):
+        for edge in a.link_edges:
+            if edge.other_vert(a) is b:
+                return edge
+        return self._new_edge((a, b))
+
+    def _remove_face(self, face):
+        for vert in face.verts:
+            vert.link_faces.remove(face)
+        for edge in face.edges:
+            edge.link_faces.remove(face)
+        self.faces._discard(face)
+
+    def _remove_edge(self, edge):
+        for face in list(edge.link_faces):
+            self._remove_face(face)
+        for vert in edge.verts:
+            vert.link_edges.remove(edge)
+        self.edges._discard(edge)
+
+    def _remove_vert(self, vert):
+        for edge in list(vert.link_edges):
+            self._remove_edge(edge)
+        self.verts._discard(vert)
+
+    # メッシュとの変換
+    def from_mesh(self, mesh):
+        """メッシュの頂点, 辺, 面を追加する"""
+        vertices = mesh.vertices._arrays
+        verts = [self.verts._add(BMVert(Vector(co), select, hide, i, i))
+                 for i, (co, select, hide) in enumerate(zip(vertices["co"].tolist(), vertices["select"].tolist(), vertices["hide"].tolist()))]
+
+        edge_arrays = mesh.edges._arrays
+        edges = [self._new_edge((verts[a], verts[b]), select, hide, i)
+                 for i, ((a, b), select, hide) in enumerate(zip(edge_arrays["vertices"].tolist(), edge_arrays["select"].tolist(), edge_arrays["hide"].tolist()))]
+
+        polygons = mesh.polygons._arrays
+        loop_vertices = mesh.loops._arrays["vertex_index"].tolist()
+        loop_edges = mesh.loops._arrays["edge_index"].tolist()
+        for i, (start, total, select, hide) in enumerate(zip(polygons["loop_start"].tolist(), polygons["loop_total"].tolist(), polygons["select"].tolist(), polygons["hide"].tolist())):
+            self._new_face([verts[v] for v in loop_vertices[start:start + total]], [edges[e] for e in loop_edges[start:start + total]], select, hide, i)
+
+        self.select_history = [verts[i] for i in mesh.select_history]
+        self._point_layers = {attribute.name: attribute for attribute in mesh.attributes if attribute.domain == "POINT"}
+
+    def to_mesh(self, mesh):
+        """BMesh の内容でメッシュを置き換える"""
+        verts = list(self.verts)
+        vert_index = {vert: i for i, vert in enumerate(verts)}
+        edges = list(self.edges)
+        edge_index = {edge: i for i, edge in enumerate(edges)}
+        faces = list(self.faces)
+
+        coords = np.array([tuple(vert.co) for vert in verts], dtype=np.float32).reshape(-1, 3)
+        edge_vertices = np.array([(vert_index[a], vert_index[b]) for a, b in (edge.verts for edge in edges)], dtype=np.int32).reshape(-1, 2)
+        loop_total = np.array([len(face.verts) for face in faces], dtype=np.int32)
+        loop_start = np.cumsum(loop_total) - loop_total
+        loop_vertices = np.array([vert_index[vert] for face in faces for vert in face.verts], dtype=np.int32)
+        loop_edges = np.array([edge_index[edge] for face in faces for edge in face.edges], dtype=np.int32)
+        mesh._set_geometry(coords, edge_vertices, loop_start, loop_total, loop_vertices, loop_edges)
+
+        for elements, sequence in ((verts, mesh.vertices), (edges, mesh.edges), (faces, mesh.polygons)):
+            sequence.foreach_set("select", np.array([element.select for element in elements], dtype=bool))
+            sequence.foreach_set("hide", np.array([element.hide for element in elements], dtype=bool))
+
+        # 頂点の属性は残った頂点の分だけ引き継ぐ (追加した頂点は 0). それ以外の属性は消える
+        source = np.array([vert._source for vert in verts], dtype=np.int64)
+        old_layers = {name: layer for name, layer in self._point_layers.items()}
+        mesh.attributes = type(mesh.attributes)(mesh)
+        for name, layer in old_layers.items():
+            old_values = layer.data._arrays["value"]
+            attribute = mesh.attributes.new(name, layer.data_type, "POINT")
+            values = attribute.data._arrays["value"]
+            kept = source >= 0
+            values[kept] = old_values[source[kept]]
+
+        mesh.select_history = [vert_index[vert] for vert in self.select_history if isinstance(vert, BMVert) and vert in vert_index]
+
+    def free(self):
+        self.is_valid = False
+
+    def clear(self):
+        self.__init__()
+
+
+def new():
+    return BMesh()
+
+
+def from_edit_mesh(mesh):
+    """編集モードのメッシュの BMesh を返す (編集モードを抜けるか update_edit_mesh でメッシュに書き戻す)"""
+    if mesh._edit_bmesh is None:
+        bm = BMesh()
+        bm.from_mesh(mesh)
+        mesh._edit_bmesh = bm
+    return mesh._edit_bmesh
+
+
+def update_edit_mesh(mesh, loop_triangles=False, destructive=False):
+    if mesh._edit_bmesh is not None:
+        mesh._edit_bmesh.to_mesh(mesh)
+
+
+def _delete(bm, geom=(), context="VERTS"):
+    """bmesh.ops.delete の代わり (context は VERTS, EDGES, FACES, FACES_ONLY)"""
+    geom = list(geom)
+    if context == "VERTS":
+        for vert in geom:
+            if isinstance(vert, BMVert) and vert.is_valid:
+                bm._remove_vert(vert)
+    elif context == "EDGES":
+        edges = [edge for edge in geom if isinstance(edge, BMEdge) and edge.is_valid]
+        verts = {vert for edge in edges for vert in edge.verts}
+        for edge in edges:
+            bm._remove_edge(edge)
+        # 辺を消してつながりがなくなった頂点も消す
+        for vert in verts:
+            if vert.is_valid and not vert.link_edges:
+                bm.verts._discard(vert)
+    elif context in ("FACES", "FACES_ONLY"):
+        faces = [face for face in geom if isinstance(face, BMFace) and face.is_valid]
+        edges = {edge for face in faces for edge in face.edges}
+        for face in faces:
+            bm._remove_face(face)
+        if context == "FACES":
+            # 面を消して使われなくなった辺と頂点も消す
+            verts = {vert for edge in edges for vert in edge.verts}
+            for edge in edges:
+                if edge.is_valid and not edge.link_faces:
+                    bm._remove_edge(edge)
+            for vert in verts:
+                if vert.is_valid and not vert.link_edges:
+                    bm.verts._discard(vert)
+    else:
+        raise ValueError(f"delete: unsupported context '{context}'")
+    bm.select_history = [elem for elem in bm.select_history if elem.is_valid]
+    return {}
+
+
+ops = SimpleNamespace(delete=_delete)
+types = SimpleNamespace(BMesh=BMesh, BMVert=BMVert, BMEdge=BMEdge, BMFace=BMFace)
@@ -0,0 +1,437 @@
+"""bpy の代わり (スクリプトが使う context, data, ops, app と Mesh, Image のみ)
+
+Mesh の頂点, 辺, 面, ループは要素ごとのオブジェクトではなく NumPy 配列で持ち,
+foreach_get / foreach_set は配列をまとめて読み書きする. mesh.vertices[i] などの要素は
+配列の i 番目を読み書きするだけのオブジェクトで, v.co は座標をコピーした Vector を返す
+(v.co.x = ... のように成分だけ書き換えてもメッシュには反映されない).
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from pepper_analysis.blender_standin.mathutils import Matrix, Vector
+
+
+class _Element:
+    """メッシュの要素 1 つ. 属性の読み書きは配列の index 番目に対して行う"""
+
+    __slots__ = ("_sequence", "index")
+
+    def __init__(self, sequence, index):
+        object.__setattr__(self, "_sequence", sequence)
+        object.__setattr__(self, "index", index)
+
+    def __getattr__(self, name):
+        arrays = self._sequence._arrays
+        if name not in arrays:
+            raise AttributeError(name)
+        value = arrays[name][self.index]
+        if name == "co":
+            return Vector(value.tolist())
+        return tuple(value.tolist()) if value.ndim else value.item()
+
+    def __setattr__(self, name, value):
+        arrays = self._sequence._arrays
+        if name not in arrays:
+            raise AttributeError(name)
+        arrays[name][self.index] = value
+
+
+class MeshPolygon(_Element):
+    __slots__ = ()
+
+    @property
+    def vertices(self):
+        mesh = self._sequence._mesh
+        start = self.loop_start
+        return tuple(mesh.loops._arrays["vertex_index"][start:start + self.loop_total].tolist())
+
+
+class _ElementSequence:
+    """mesh.vertices などの代わり. 要素の属性を名前ごとの配列で持つ"""
+
+    def __init__(self, mesh, arrays, element=_Element):
+        self._mesh = mesh
+        self._arrays = arrays
+        self._element = element
+
+    def __len__(self):
+        return len(next(iter(self._arrays.values())))
+
+    def __getitem__(self, index):
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("bpy_prop_collection[index]: index out of range")
+        return self._element(self, index)
+
+    def __iter__(self):
+        return (self._element(self, i) for i in range(len(self)))
+
+    def _array(self, attr):
+        if attr not in self._arrays:
+            raise AttributeError(f"foreach_get/set: '{attr}' not found")
+        return self._arrays[attr]
+
+    def foreach_get(self, attr, seq):
+        values = self._array(attr).reshape(-1)
+        if len(seq) != values.size:
+            raise RuntimeError(f"internal error setting the array: expected {values.size} items, got {len(seq)}")
+        seq[:] = values if isinstance(seq, np.ndarray) else values.tolist()
+
+    def foreach_set(self, attr, seq):
+        array = self._array(attr)
+        values = np.asarray(seq).reshape(-1)
+        if values.size != array.size:
+            raise RuntimeError(f"internal error setting the array: expected {array.size} items, got {values.size}")
+        array[...] = values.reshape(array.shape)
+
+
+def _element_arrays(n, **columns):
+    """n 個の要素の配列の dict を作る. columns は 名前=(dtype, 1 要素あたりの数)"""
+    return {name: np.zeros((n, width) if width > 1 else n, dtype=dtype) for name, (dtype, width) in columns.items()}
+
+
+# 属性の型と配列の型 (dtype, 1 要素あたりの数)
+ATTRIBUTE_TYPES = {"BOOLEAN": (bool, 1), "FLOAT": (np.float32, 1), "INT": (np.int32, 1), "FLOAT_VECTOR": (np.float32, 3)}
+
+
+class Attribute:
+    def __init__(self, name, data_type, domain, n):
+        dtype, width = ATTRIBUTE_TYPES[data_type]
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        self.data = _ElementSequence(None, _element_arrays(n, value=(dtype, width)))
+
+
+class AttributeCollection:
+    """mesh.attributes の代わり. 頂点 (POINT) の属性だけ BMesh を経由しても残る"""
+
+    def __init__(self, mesh):
+        self._mesh = mesh
+        self._attributes = {}
+
+    def _domain_size(self, domain):
+        mesh = self._mesh
+        return {"POINT": len(mesh.vertices), "EDGE": len(mesh.edges), "FACE": len(mesh.polygons), "CORNER": len(mesh.loops)}[domain]
+
+    def new(self, name, type, domain):
+        attribute = Attribute(name, type, domain, self._domain_size(domain))
+        self._attributes[name] = attribute
+        return attribute
+
+    def get(self, name, default=None):
+        return self._attributes.get(name, default)
+
+    def remove(self, attribute):
+        del self._attributes[attribute.name]
+
+    def __getitem__(self, name):
+        return self._attributes[name]
+
+    def __contains__(self, name):
+        return name in self._attributes
+
+    def __iter__(self):
+        return iter(list(self._attributes.values()))
+
+    def __len__(self):
+        return len(self._attributes)
+
+
+class Mesh:
+    """bpy.types.Mesh の代わり"""
+
+    def __init__(self, name="Mesh"):
+        self.name = name
+        self.attributes = AttributeCollection(self)
+        # 編集モードで選択した順の頂点のインデックス (bmesh の select_history になる)
+        self.select_history = []
+        self._edit_bmesh = None
+        self._set_geometry(np.empty((0, 3), dtype=np.float32), np.empty((0, 2), dtype=np.int32),
+                           np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+
+    def _set_geometry(self, coords, edges, loop_start, loop_total, loop_vertices, loop_edges):
+        """頂点, 辺, 面, ループの配列を置き換える (選択と非表示は解除される)"""
+        self.vertices = _ElementSequence(self, _element_arrays(len(coords), co=(np.float32, 3), select=(bool, 1), hide=(bool, 1)))
+        self.vertices._arrays["co"][...] = coords
+        self.edges = _ElementSequence(self, _element_arrays(len(edges), vertices=(np.int32, 2), select=(bool, 1), hide=(bool, 1)))
+        self.edges._arrays["vertices"][...] = edges
+        self.polygons = _ElementSequence(self, _element_arrays(len(loop_start), loop_start=(np.int32, 1), loop_total=(np.int32, 1), select=(bool, 1), hide=(bool, 1)), MeshPolygon)
+        self.polygons._arrays["loop_start"][...] = loop_start
+        self.polygons._arrays["loop_total"][...] = loop_total
+        self.loops = _ElementSequence(self, _element_arrays(len(loop_vertices), vertex_index=(np.int32, 1), edge_index=(np.int32, 1)))
+        self.loops._arrays["vertex_index"][...] = loop_vertices
+        self.loops._arrays["edge_index"][...] = loop_edges
+
+    def from_pydata(self, vertices, edges, faces):
+        """頂点座標, 辺, 面 (頂点のインデックスの列) からメッシュを作る. 面の辺は自動で作る"""
+        coords = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        if isinstance(faces, np.ndarray):
+            loop_total = np.full(len(faces), faces.shape[1] if faces.ndim == 2 else 0, dtype=np.int64)
+            loop_vertices = faces.reshape(-1).astype(np.int64)
+        else:
+            loop_total = np.array([len(face) for face in faces], dtype=np.int64)
+            loop_vertices = np.array([index for face in faces for index in face], dtype=np.int64)
+        loop_start = np.cumsum(loop_total) - loop_total
+
+        # 面の各ループから次のループの頂点への辺
+        next_loop = np.arange(len(loop_vertices)) + 1
+        face_end = loop_start + loop_total
+        last = face_end[loop_total > 0] - 1
+        next_loop[last] = loop_start[loop_total > 0]
+        face_edges = np.column_stack([loop_vertices, loop_vertices[next_loop]]) if len(loop_vertices) else np.empty((0, 2), dtype=np.int64)
+        all_edges = np.vstack([np.asarray(edges, dtype=np.int64).reshape(-1, 2), face_edges])
+        keys = np.minimum(all_edges[:, 0], all_edges[:, 1]) * max(len(coords), 1) + np.maximum(all_edges[:, 0], all_edges[:, 1])
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # 辺の番号は最初に現れた順にする
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        edge_vertices = all_edges[first[order]]
+        loop_edges = rank[inverse.reshape(-1)][len(all_edges) - len(face_edges):]
+
+        self._set_geometry(coords, edge_vertices, loop_start, loop_total, loop_vertices, loop_edges)
+        # 頂点数が変わるので属性は作り直す
+        self.attributes = AttributeCollection(self)
+        self.select_history = []
+
+    def update(self, calc_edges=False):
+        pass
+
+
+class ImagePixels:
+    """image.pixels の代わり. RGBA の float を左下の画素から並べた 1 次元の配列"""
+
+    def __init__(self, n):
+        self.array = np.zeros(n, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        value = self.array[index]
+        return value.tolist() if isinstance(value, np.ndarray) else float(value)
+
+    def foreach_get(self, seq):
+        if len(seq) != len(self.array):
+            raise RuntimeError(f"internal error setting the array: expected {len(self.array)} items, got {len(seq)}")
+        seq[:] = self.array if isinstance(seq, np.ndarray) else self.array.tolist()
+
+    def foreach_set(self, seq):
+        values = np.asarray(seq, dtype=np.float32).reshape(-1)
+        if values.size != self.array.size:
+            raise RuntimeError(f"internal error setting the array: expected {self.array.size} items, got {values.size}")
+        self.array[...] = values
+
+
+class Image:
+    """bpy.types.Image の代わり (画素の読み書きと大きさの変更のみ)"""
+
+    def __init__(self, name, width=0, height=0, alpha=False):
+        self.name = name
+        self.size = [width, height]
+        self.alpha = alpha
+        self.colorspace_settings = SimpleNamespace(name="sRGB")
+        self.pixels = ImagePixels(width * height * 4)
+
+    def scale(self, width, height):
+        self.size = [width, height]
+        self.pixels = ImagePixels(width * height * 4)
+
+    def update(self):
+        pass
+
+
+class Area:
+    """画面のエリア. spaces.active に表示中の画像 (Image Editor) や視点 (3D ビュー) を持つ"""
+
+    def __init__(self, type):
+        self.type = type
+        self.spaces = SimpleNamespace(active=SimpleNamespace(image=None, region_3d=SimpleNamespace(view_perspective="PERSP")))
+
+    def tag_redraw(self):
+        pass
+
+
+class Camera:
+    def __init__(self, name="Camera"):
+        self.name = name
+        self.lens = 50.0
+
+
+class _Constraints(list):
+    def new(self, type):
+        constraint = SimpleNamespace(type=type, target=None, track_axis=None, up_axis=None)
+        self.append(constraint)
+        return constraint
+
+
+class Object:
+    """bpy.types.Object の代わり"""
+
+    def __init__(self, name, object_data=None):
+        self.name = name
+        self.data = object_data
+        if isinstance(object_data, Mesh):
+            self.type = "MESH"
+        elif isinstance(object_data, Camera):
+            self.type = "CAMERA"
+        else:
+            self.type = "EMPTY"
+        self.mode = "OBJECT"
+        self.location = Vector((0.0, 0.0, 0.0))
+        self.rotation_euler = Vector((0.0, 0.0, 0.0))
+        self.matrix_world = Matrix()
+        self.constraints = _Constraints()
+        self._select = False
+
+    def select_set(self, state):
+        self._select = bool(state)
+
+    def select_get(self):
+        return self._select
+
+    def __repr__(self):
+        return f"<Object '{self.name}'>"
+
+
+class _IDCollection:
+    """bpy.data.objects などの代わり (名前で引ける ID のコレクション)"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._items = {}
+
+    def new(self, name, *args, **kwargs):
+        # 名前が重複したら Blender と同じく .001 などを付ける
+        unique = name
+        count = 0
+        while unique in self._items:
+            count += 1
+            unique = f"{name}.{count:03d}"
+        item = self._factory(unique, *args, **kwargs)
+        self._items[unique] = item
+        return item
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def remove(self, item, do_unlink=True):
+        del self._items[item.name]
+
+    def __getitem__(self, name):
+        return self._items[name]
+
+    def __contains__(self, name):
+        return name in self._items
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _CollectionObjects(list):
+    def link(self, obj):
+        if obj not in self:
+            self.append(obj)
+
+    def unlink(self, obj):
+        self.remove(obj)
+
+
+class Scene:
+    def __init__(self):
+        self.collection = SimpleNamespace(objects=_CollectionObjects())
+        self.camera = None
+
+    @property
+    def objects(self):
+        return list(self.collection.objects)
+
+
+class Context:
+    """bpy.context の代わり. アクティブなオブジェクトは view_layer.objects.active"""
+
+    def __init__(self):
+        self.scene = Scene()
+        self.view_layer = SimpleNamespace(objects=SimpleNamespace(active=None))
+        self.screen = SimpleNamespace(areas=[Area("VIEW_3D"), Area("IMAGE_EDITOR")])
+
+    @property
+    def object(self):
+        return self.view_layer.objects.active
+
+    active_object = object
+
+    @property
+    def collection(self):
+        return self.scene.collection
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.objects if obj.select_get()]
+
+    @property
+    def mode(self):
+        obj = self.object
+        return "EDIT_MESH" if obj is not None and obj.mode == "EDIT" else "OBJECT"
+
+
+class BlendData:
+    def __init__(self):
+        self.objects = _IDCollection(Object)
+        self.meshes = _IDCollection(Mesh)
+        self.cameras = _IDCollection(Camera)
+        self.images = _IDCollection(Image)
+        self.texts = []
+
+
+def _mode_set(mode="OBJECT", toggle=False):
+    obj = context.object
+    if obj is None:
+        raise RuntimeError("Operator bpy.ops.object.mode_set.poll() failed, context is incorrect")
+    if obj.mode == "EDIT" and mode != "EDIT" and obj.type == "MESH" and obj.data._edit_bmesh is not None:
+        # 編集モードを抜けるときに編集中の BMesh をメッシュに書き戻す
+        obj.data._edit_bmesh.to_mesh(obj.data)
+        obj.data._edit_bmesh = None
+    obj.mode = mode
+    return {"FINISHED"}
+
+
+def _empty_add(type="PLAIN_AXES", location=(0.0, 0.0, 0.0)):
+    obj = data.objects.new("Empty", None)
+    obj.location = Vector(location)
+    context.collection.objects.link(obj)
+    for other in context.scene.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+    return {"FINISHED"}
+
+
+def _text_open(filepath=""):
+    data.texts.append(filepath)
+    return {"FINISHED"}
+
+
+def reset():
+    """シーンとデータを空にする"""
+    global context, data
+    context = Context()
+    data = BlendData()
+
+
+context = None
+data = None
+reset()
+ops = SimpleNamespace(
+    object=SimpleNamespace(mode_set=_mode_set, empty_add=_empty_add),
+    text=SimpleNamespace(open=_text_open),
+)
+app = SimpleNamespace(version=(4, 2, 0), background=True)
+types = SimpleNamespace(Mesh=Mesh, Object=Object, Camera=Camera, Image=Image)
@@ -0,0 +1,159 @@
+"""mathutils の代わり (スクリプトが使う Vector, Matrix, kdtree のみ)"""
+import math
+
+from pepper_analysis.blender_standin.mathutils import kdtree
+
+
+class Vector:
+    """mathutils.Vector の代わり. 成分は float のリストで持つ"""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._values = [float(value) for value in values]
+
+    # 成分
+    def _get(index):
+        return property(lambda self: self._values[index], lambda self, value: self._values.__setitem__(index, float(value)))
+    x = _get(0)
+    y = _get(1)
+    z = _get(2)
+    w = _get(3)
+    del _get
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __repr__(self):
+        return "Vector((" + ", ".join(f"{value:.4f}" for value in self._values) + "))"
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and self._values == other._values
+
+    __hash__ = None
+
+    # 演算
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self._values, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self._values, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self._values)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector(a / scalar for a in self._values)
+
+    def __neg__(self):
+        return Vector(-a for a in self._values)
+
+    def __matmul__(self, other):
+        return self.dot(other)
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self._values, other))
+
+    def cross(self, other):
+        ax, ay, az = self._values
+        bx, by, bz = other
+        return Vector((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+
+    def project(self, other):
+        other = Vector(other)
+        return other * (self.dot(other) / other.length_squared)
+
+    def angle(self, other, fallback=None):
+        lengths = self.length * Vector(other).length
+        if lengths == 0:
+            if fallback is None:
+                raise ValueError("Vector.angle(other): zero length vectors have no valid angle")
+            return fallback
+        return math.acos(max(-1.0, min(1.0, self.dot(other) / lengths)))
+
+    @property
+    def length(self):
+        return math.sqrt(self.length_squared)
+
+    @property
+    def length_squared(self):
+        return sum(a * a for a in self._values)
+
+    def normalized(self):
+        length = self.length
+        return Vector(self._values) if length == 0 else self / length
+
+    def normalize(self):
+        self._values = self.normalized()._values
+
+    def copy(self):
+        return Vector(self._values)
+
+    def to_tuple(self, precision=-1):
+        return tuple(self._values if precision < 0 else (round(a, precision) for a in self._values))
+
+    def to_2d(self):
+        return Vector(self._values[:2])
+
+    def to_3d(self):
+        return Vector((self._values + [0.0, 0.0, 0.0])[:3])
+
+
+class Matrix:
+    """mathutils.Matrix の代わり (4x4 の行列とベクトルの積と to_scale のみ)"""
+
+    def __init__(self, rows=((1.0, 0.0, 0.0, 0.0), (0.0, 1.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, 0.0, 0.0, 1.0))):
+        self.rows = [[float(value) for value in row] for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    def __getitem__(self, index):
+        return Vector(self.rows[index])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return "Matrix(" + ", ".join(str(tuple(row)) for row in self.rows) + ")"
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            columns = list(zip(*other.rows))
+            return Matrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in self.rows])
+        # 3 次元のベクトルは同次座標 (w = 1) として平行移動も適用する
+        values = list(other)
+        size = len(self.rows)
+        homogeneous = len(values) == size - 1
+        if homogeneous:
+            values.append(1.0)
+        result = [sum(a * b for a, b in zip(row, values)) for row in self.rows]
+        return Vector(result[:-1] if homogeneous else result)
+
+    def to_scale(self):
+        return Vector(math.sqrt(sum(self.rows[i][j] ** 2 for i in range(3))) for j in range(3))
+
+    def to_translation(self):
+        return Vector(row[3] for row in self.rows[:3])
+
+    @property
+    def translation(self):
+        return self.to_translation()
+
+    def copy(self):
+        return Matrix(self.rows)
+
+
+__all__ = ["Vector", "Matrix", "kdtree"]
@@ -0,0 +1,71 @@
+"""mathutils.kdtree の代わり
+
+insert で集めた座標から, balance で scipy の cKDTree (なければ全点の NumPy 判定) を作る.
+find, find_n, find_range の戻り値は Blender と同じ (co, index, dist) の形.
+"""
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree as _ScipyKDTree
+except ImportError:
+    _ScipyKDTree = None
+
+
+class KDTree:
+    """mathutils.kdtree.KDTree の代わり"""
+
+    def __init__(self, size):
+        self.size = size
+        self._coords = []
+        self._indices = []
+        self._points = None
+        self._index_array = None
+        self._tree = None
+
+    def insert(self, co, index):
+        if len(self._coords) >= self.size:
+            raise ValueError("KDTree: size exceeded")
+        self._coords.append(tuple(co))
+        self._indices.append(index)
+        self._points = None
+
+    def balance(self):
+        self._points = np.array(self._coords, dtype=np.float64).reshape(-1, 3)
+        self._index_array = np.array(self._indices, dtype=np.int64)
+        self._tree = _ScipyKDTree(self._points) if _ScipyKDTree is not None and len(self._points) else None
+
+    def _check(self):
+        if self._points is None:
+            raise RuntimeError("KDTree must be balanced before calling find()")
+
+    def _result(self, positions, distances):
+        from pepper_analysis.blender_standin.mathutils import Vector
+        return [(Vector(self._points[i]), int(self._index_array[i]), float(d)) for i, d in zip(positions, distances)]
+
+    def find_n(self, co, n):
+        self._check()
+        co = np.asarray(tuple(co), dtype=np.float64)
+        n = min(n, len(self._points))
+        if n == 0:
+            return []
+        if self._tree is not None:
+            distances, positions = self._tree.query(co, k=n)
+            return self._result(np.atleast_1d(positions), np.atleast_1d(distances))
+        distances = np.linalg.norm(self._points - co, axis=1)
+        positions = np.argsort(distances, kind="stable")[:n]
+        return self._result(positions, distances[positions])
+
+    def find(self, co):
+        found = self.find_n(co, 1)
+        return found[0] if found else (None, None, None)
+
+    def find_range(self, co, radius):
+        self._check()
+        co = np.asarray(tuple(co), dtype=np.float64)
+        if self._tree is not None:
+            positions = np.asarray(self._tree.query_ball_point(co, radius), dtype=np.int64)
+        else:
+            positions = np.flatnonzero(np.linalg.norm(self._points - co, axis=1) <= radius)
+        distances = np.linalg.norm(self._points[positions] - co, axis=1)
+        order = np.argsort(distances, kind="stable")
+        return self._result(positions[order], distances[order])
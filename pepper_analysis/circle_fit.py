@@ -0,0 +1,208 @@
+"""点群への円のあてはめ
+
+circle_fitting は最小二乗法 (Kåsa 法) で x² + y² + A x + B y + C = 0 の A, B, C を求め,
+中心 (-A/2, -B/2), 半径 sqrt(A²/4 + B²/4 - C) を返す.
+円弧の一部しか見えていない場合に半径が小さく出にくい Pratt 法, Taubin 法と,
+外れ値 (葉や茎の点) を除く RANSAC も用意する.
+桁落ちを防ぐため, 点群ごとに重心を原点に移してから解く.
+"""
+import numpy as np
+
+MAX_BATCH_ROWS = 1 << 16 # circle_fitting_batch で一度に QR 分解する行の数の上限 (点群数 × 最大点数)
+RANK_TOLERANCE = 1e-10 # R の対角成分の最大値に対してこれより小さい対角成分があれば解けないとみなす
+
+
+def circle_fitting(points):
+    """(N, 2) の点群に円をあてはめ, (cx, cy, r) を返す. 点が 3 個未満か一直線上なら None"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return None
+
+    mean = points.mean(axis=0)
+    x = points[:, 0] - mean[0]
+    y = points[:, 1] - mean[1]
+
+    design = np.column_stack([x, y, np.ones_like(x)])
+    (a, b, c), _, rank, _ = np.linalg.lstsq(design, -(x * x + y * y), rcond=None)
+    if rank < 3:
+        return None
+
+    cx = -a / 2
+    cy = -b / 2
+    r = np.sqrt(cx * cx + cy * cy - c)
+    return float(cx + mean[0]), float(cy + mean[1]), float(r)
+
+
+def circle_fitting_batch(points, offsets):
+    """複数の点群にまとめて円をあてはめる
+
+    points は全点群をつなげた (M, 2) 配列, offsets は各点群の開始位置と末尾を並べた
+    (K + 1,) 配列で, k 番目の点群は points[offsets[k]:offsets[k + 1]].
+    (K, 3) の配列 [cx, cy, r] を返す. 点が 3 個未満の点群や解けない点群の行は NaN.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    num_sets = len(counts)
+    result = np.full((num_sets, 3), np.nan)
+
+    valid = counts >= 3
+    if not valid.any():
+        return result
+
+    # 空の点群があると reduceat が正しく足し合わせないので, 有効な点群だけを取り出す
+    starts = offsets[:-1][valid]
+    valid_counts = counts[valid]
+    take = np.repeat(starts - np.concatenate([[0], np.cumsum(valid_counts)[:-1]]), valid_counts) + np.arange(valid_counts.sum())
+    points = points[take]
+    segment_starts = np.concatenate([[0], np.cumsum(valid_counts)[:-1]])
+
+    # 点群ごとに重心を原点に移す
+    mean = np.add.reduceat(points, segment_starts, axis=0) / valid_counts[:, None]
+    centered = points - np.repeat(mean, valid_counts, axis=0)
+    x = centered[:, 0]
+    y = centered[:, 1]
+    rr = x * x + y * y
+
+    # 点群ごとの設計行列 [x, y, 1] と右辺 -(x² + y²) を, 点の少ない順に (点群数 × 最大点数) の 0 埋めした配列に並べ,
+    # 単独のあてはめ (lstsq) と同じく QR 分解で解く (0 の行は解を変えない). 配列が大きくなりすぎないよう点群を分ける
+    solution = np.full((len(valid_counts), 3), np.nan)
+    order = np.argsort(valid_counts, kind="stable")
+    sorted_counts = valid_counts[order]
+    start = 0
+    while start < len(order):
+        rows = (np.arange(start, len(order)) - start + 1) * sorted_counts[start:]
+        end = start + max(1, int(np.searchsorted(rows, MAX_BATCH_ROWS, side="right")))
+        chunk = order[start:end]
+        chunk_counts = valid_counts[chunk]
+
+        set_index = np.repeat(np.arange(len(chunk)), chunk_counts)
+        row_index = np.arange(chunk_counts.sum()) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        point_index = np.repeat(segment_starts[chunk], chunk_counts) + row_index
+        design = np.zeros((len(chunk), chunk_counts.max(), 3))
+        design[set_index, row_index] = np.column_stack([x[point_index], y[point_index], np.ones(len(point_index))])
+        rhs = np.zeros(design.shape[:2])
+        rhs[set_index, row_index] = -rr[point_index]
+
+        q, r = np.linalg.qr(design)
+        qtb = np.einsum("kli,kl->ki", q, rhs)
+        # 点が一直線に並ぶなどで解けない (R の対角成分が 0 に近い) 点群は NaN のままにする
+        diagonal = np.abs(np.diagonal(r, axis1=1, axis2=2))
+        solvable = diagonal.min(axis=1) > RANK_TOLERANCE * diagonal.max(axis=1)
+        if solvable.any():
+            solution[chunk[solvable]] = np.linalg.solve(r[solvable], qtb[solvable][..., None])[..., 0]
+        start = end
+
+    cx = -solution[:, 0] / 2
+    cy = -solution[:, 1] / 2
+    with np.errstate(invalid="ignore"):
+        r = np.sqrt(cx * cx + cy * cy - solution[:, 2])
+    result[valid] = np.column_stack([cx + mean[:, 0], cy + mean[:, 1], r])
+    return result
+
+
+def _circle_from_algebraic(a, centroid):
+    """A (x² + y²) + B x + C y + D = 0 の係数から (cx, cy, r) を求める"""
+    if a[0] == 0:
+        return None
+    cx, cy = -a[1:3] / a[0] / 2 + centroid
+    r = np.sqrt(a[1] ** 2 + a[2] ** 2 - 4 * a[0] * a[3]) / abs(a[0]) / 2
+    return float(cx), float(cy), float(r)
+
+
+def circle_fitting_pratt(points):
+    """Pratt 法で (N, 2) の点群に円をあてはめ, (cx, cy, r) を返す. 点が 3 個未満なら None"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return None
+
+    centroid = points.mean(axis=0)
+    x = points[:, 0] - centroid[0]
+    y = points[:, 1] - centroid[1]
+    design = np.column_stack([x * x + y * y, x, y, np.ones_like(x)])
+    if len(design) < 4:
+        # 特異値を 4 個そろえるため 0 の行を足す (正規方程式は変わらない)
+        design = np.vstack([design, np.zeros((4 - len(design), 4))])
+    _, s, vh = np.linalg.svd(design, full_matrices=False)
+    v = vh.T
+
+    if s[-1] / s[0] < 1e-12:
+        # 全点がちょうど円上にある
+        a = v[:, 3]
+    else:
+        # 制約 B² + C² - 4AD = 1 のもとで誤差を最小にする一般化固有値問題
+        w = v * s
+        b_inv = np.array([[0, 0, 0, -0.5], [0, 1, 0, 0], [0, 0, 1, 0], [-0.5, 0, 0, 0]])
+        eigenvalues, eigenvectors = np.linalg.eigh(w.T @ b_inv @ w)
+        a = v @ (eigenvectors[:, np.argsort(eigenvalues)[1]] / s)
+    return _circle_from_algebraic(a, centroid)
+
+
+def circle_fitting_taubin(points):
+    """Taubin 法で (N, 2) の点群に円をあてはめ, (cx, cy, r) を返す. 点が 3 個未満なら None"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return None
+
+    centroid = points.mean(axis=0)
+    x = points[:, 0] - centroid[0]
+    y = points[:, 1] - centroid[1]
+    z = x * x + y * y
+    z_mean = z.mean()
+    if z_mean == 0:
+        return None
+    _, _, vh = np.linalg.svd(np.column_stack([(z - z_mean) / (2 * np.sqrt(z_mean)), x, y]), full_matrices=False)
+    a = vh[2].copy()
+    a[0] = a[0] / (2 * np.sqrt(z_mean))
+    return _circle_from_algebraic(np.array([a[0], a[1], a[2], -z_mean * a[0]]), centroid)
+
+
+# あてはめ方法の名前と関数
+FIT_METHODS = {
+    "kasa": circle_fitting,
+    "pratt": circle_fitting_pratt,
+    "taubin": circle_fitting_taubin,
+}
+
+
+def ransac_circle_fitting(points, fit="taubin", iterations=256, threshold=0.002, min_radius=0.0, max_radius=np.inf, seed=0):
+    """RANSAC で外れ値を除いて円をあてはめる
+
+    3 点から作る円の候補を iterations 個まとめて計算し, 円周から threshold 以内にある点
+    (インライア) が最も多い候補を選ぶ. そのインライアに fit (kasa / pratt / taubin) で
+    円をあてはめ直し, (cx, cy, r, インライア数) を返す. 半径が min_radius 〜 max_radius の
+    円が見つからなければ None.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return None
+    rng = np.random.default_rng(seed)
+
+    # 3 点を通る円 (外接円) を全候補まとめて求める
+    sample = points[rng.integers(0, len(points), size=(iterations, 3))]
+    p1, p2, p3 = sample[:, 0], sample[:, 1], sample[:, 2]
+    b = p2 - p1
+    c = p3 - p1
+    d = 2 * (b[:, 0] * c[:, 1] - b[:, 1] * c[:, 0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bb = (b * b).sum(axis=1)
+        cc = (c * c).sum(axis=1)
+        ux = (c[:, 1] * bb - b[:, 1] * cc) / d
+        uy = (b[:, 0] * cc - c[:, 0] * bb) / d
+    radius = np.hypot(ux, uy)
+    ok = np.isfinite(radius) & (radius >= min_radius) & (radius <= max_radius)
+    if not ok.any():
+        return None
+    centers = p1[ok] + np.column_stack([ux[ok], uy[ok]])
+    radius = radius[ok]
+
+    # 候補ごとのインライア数 (候補数 × 点数)
+    dist = np.hypot(points[:, 0] - centers[:, 0, None], points[:, 1] - centers[:, 1, None])
+    inlier_counts = (np.abs(dist - radius[:, None]) < threshold).sum(axis=1)
+    best = np.argmax(inlier_counts)
+    inliers = np.abs(dist[best] - radius[best]) < threshold
+
+    circle = FIT_METHODS[fit](points[inliers])
+    if circle is None or not (min_radius <= circle[2] <= max_radius):
+        circle = (float(centers[best, 0]), float(centers[best, 1]), float(radius[best]))
+    return (*circle, int(inliers.sum()))
@@ -0,0 +1,102 @@
+"""頂点の切り抜き (クロップ)
+
+削除する頂点を NumPy の bool 配列 (マスク) でまとめて求め, bmesh.ops.delete を
+1 回だけ呼んで削除する. 頂点を 1 つずつ bm.verts.remove する場合と結果は同じ
+(頂点につながる辺と面も消える).
+メッシュを書き換えずに, 同じマスクで頂点を隠す (hide) こともできる. この場合は
+マスクを計算し直すだけで切り抜きの範囲を変えられ, reveal_vertices で元に戻せる.
+"""
+import numpy as np
+
+from pepper_analysis.lazy import lazy_import
+
+bmesh = lazy_import("bmesh")
+
+# 隠していない (残した) 頂点を記録する頂点属性の名前
+KEEP_ATTRIBUTE = "crop_keep"
+
+
+def behind_mask(coords, base_point, angle, depth):
+    """カメラの方向 angle [rad] から見て, 基準点より depth [m] 以上奥にある頂点を True にした配列を返す
+
+    カメラは基準点から (cos(angle), sin(angle)) の方向 (XY 平面) にあるものとし,
+    基準点から各頂点へのずれをその方向に射影した長さで判定する.
+    """
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    offset = base_point[:2] - coords[:, :2].astype(np.float64)
+    return offset @ direction >= depth
+
+
+def delete_vertices(mesh, delete_mask):
+    """delete_mask が True の頂点を 1 回の bmesh.ops.delete で削除し, 削除した頂点の数を返す"""
+    delete_indices = np.flatnonzero(delete_mask)
+    if delete_indices.size == 0:
+        return 0
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.verts.ensure_lookup_table()
+    bmesh.ops.delete(bm, geom=[bm.verts[i] for i in delete_indices.tolist()], context='VERTS')
+
+    # メッシュの更新
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+    return int(delete_indices.size)
+
+
+def _polygon_any(mesh, vertex_mask):
+    """面ごとに, vertex_mask が True の頂点を 1 つでも含むかを返す"""
+    n_polygons = len(mesh.polygons)
+    if n_polygons == 0:
+        return np.zeros(0, dtype=bool)
+    loop_start = np.empty(n_polygons, dtype=np.int64)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+
+    # ループは面ごとに連続しているので, 面の先頭から次の面の先頭までを集計する
+    order = np.argsort(loop_start, kind="stable")
+    counts = np.add.reduceat(vertex_mask[loop_vertices].astype(np.int64), loop_start[order])
+    result = np.empty(n_polygons, dtype=bool)
+    result[order] = counts > 0
+    return result
+
+
+def hide_vertices(mesh, hide_mask, attribute=KEEP_ATTRIBUTE):
+    """hide_mask が True の頂点を削除せずに隠す (オブジェクトモードで実行する)
+
+    隠した頂点を含む辺と面も隠し, 隠したものの選択は外す. 全頂点の hide を書き直すので,
+    範囲を変えて何度実行してもよい. 残した頂点は bool の頂点属性 attribute に記録する.
+    """
+    hide_mask = np.asarray(hide_mask, dtype=bool)
+    edge_vertices = np.empty(len(mesh.edges) * 2, dtype=np.int64)
+    mesh.edges.foreach_get("vertices", edge_vertices)
+    hide_masks = (
+        (mesh.vertices, hide_mask),
+        (mesh.edges, hide_mask[edge_vertices].reshape(-1, 2).any(axis=1)),
+        (mesh.polygons, _polygon_any(mesh, hide_mask)),
+    )
+    for elements, hide in hide_masks:
+        select = np.empty(len(elements), dtype=bool)
+        elements.foreach_get("select", select)
+        elements.foreach_set("hide", hide)
+        elements.foreach_set("select", select & ~hide)
+
+    if attribute:
+        keep = mesh.attributes.get(attribute)
+        if keep is None:
+            keep = mesh.attributes.new(attribute, 'BOOLEAN', 'POINT')
+        keep.data.foreach_set("value", ~hide_mask)
+    mesh.update()
+    return int(hide_mask.sum())
+
+
+def reveal_vertices(mesh, attribute=KEEP_ATTRIBUTE):
+    """hide_vertices で隠した頂点, 辺, 面をすべて表示し, 記録した属性を消す"""
+    mesh.vertices.foreach_set("hide", np.zeros(len(mesh.vertices), dtype=bool))
+    mesh.edges.foreach_set("hide", np.zeros(len(mesh.edges), dtype=bool))
+    mesh.polygons.foreach_set("hide", np.zeros(len(mesh.polygons), dtype=bool))
+    if attribute and mesh.attributes.get(attribute) is not None:
+        mesh.attributes.remove(mesh.attributes[attribute])
+    mesh.update()
@@ -0,0 +1,165 @@
+"""頂点座標と索引のキャッシュ
+
+同じスキャンに対してスクリプトを何度も実行するとき, 高さ方向の索引を .npy に保存しておき,
+次回からは読み込むだけにする. .npy はメモリマップで開く.
+頂点座標は毎回 foreach_get でまとめて読み (索引を作るよりずっと速い), 同じプロセス内では読んだ配列を使い回す.
+KD 木はファイルに保存せず, プロセス内でだけ保持する (必要になったときに座標から作る).
+キーはオブジェクト名, 頂点数, 一部の頂点 (FINGERPRINT_SAMPLES 個) の座標と全頂点の座標の合計のハッシュ.
+標本に入らない頂点を動かしても合計が変わるので検出できる (合計が偶然変わらない編集は検出できないので, そのときは clear_cache() で消す).
+保存先はユーザーごとのキャッシュディレクトリ (他のユーザーが書き込める一時ディレクトリは使わない).
+"""
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+
+from pepper_analysis.kdtree import PointKDTree
+from pepper_analysis.mesh_access import read_vertex_coords, read_vertex_selection
+from pepper_analysis.slab_index import SlabIndex
+
+
+def _user_cache_dir():
+    """ユーザーごとのキャッシュディレクトリ (Windows は %LOCALAPPDATA%, それ以外は $XDG_CACHE_HOME か ~/.cache)"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pepper_analysis")
+
+
+# 環境変数 PEPPER_CACHE_DIR で保存先を変えられる
+CACHE_DIR = os.environ.get("PEPPER_CACHE_DIR", _user_cache_dir())
+FINGERPRINT_SAMPLES = 1024 # キーの計算に使う頂点の数
+MAX_ENTRIES = 8 # 保存しておくメッシュの数 (古いものから消す)
+MEMORY_ENTRIES = 2 # メモリ上に保持しておくメッシュの数 (古いものから捨てる)
+
+# 同じプロセス内では読み込んだ配列や作った索引をそのまま使い回す (キー → {項目名: 値})
+_memory_cache = OrderedDict()
+
+
+def _sample_indices(count, samples=FINGERPRINT_SAMPLES):
+    """頂点数 count から等間隔に標本のインデックスを選ぶ"""
+    return np.unique(np.linspace(0, count - 1, min(count, samples)).astype(np.int64))
+
+
+def fingerprint(name, count, sample, checksum):
+    """オブジェクト名, 頂点数, 標本の座標, 全頂点の座標の合計からキーの文字列を作る"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(name.encode("utf-8"))
+    h.update(np.int64(count).tobytes())
+    h.update(np.ascontiguousarray(sample, dtype=np.float32).tobytes())
+    h.update(np.ascontiguousarray(checksum, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def array_fingerprint(name, coords):
+    """(N, 3) の座標配列からキーを作る"""
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+    return fingerprint(name, len(coords), coords[_sample_indices(len(coords))], coords.sum(axis=0, dtype=np.float64))
+
+
+def mesh_fingerprint(name, mesh):
+    """メッシュの全頂点の座標を foreach_get でまとめて読んでキーを作る (array_fingerprint と同じ値になる)"""
+    return array_fingerprint(name, read_vertex_coords(mesh))
+
+
+def _memory_entry(key):
+    """メモリ上のキャッシュからキーの項目の dict を返す. 保持するメッシュが MEMORY_ENTRIES を超えたら古いものを捨てる"""
+    entry = _memory_cache.get(key)
+    if entry is None:
+        entry = _memory_cache[key] = {}
+        while len(_memory_cache) > MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+    else:
+        _memory_cache.move_to_end(key)
+    return entry
+
+
+def _entry_path(key, filename, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, key, filename)
+
+
+def _load_array(path):
+    """保存済みの配列をメモリマップで開く. なければ None"""
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def _save(path, write):
+    """一時ファイルに書いてから置き換える (途中で止まっても壊れたファイルを残さない)"""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            write(f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Failed to write cache: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _prune(cache_dir=None):
+    """保存しているメッシュが MAX_ENTRIES を超えたら古いものから消す"""
+    cache_dir = cache_dir or CACHE_DIR
+    entries = [os.path.join(cache_dir, d) for d in os.listdir(cache_dir)]
+    entries = sorted((e for e in entries if os.path.isdir(e)), key=os.path.getmtime, reverse=True)
+    for entry in entries[MAX_ENTRIES:]:
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+def load_mesh_cached(name, mesh):
+    """(key, coords, select) を返す
+
+    coords はメッシュから一度に読んだ座標で, キーの計算にも同じ配列を使う. 同じプロセスで同じキーのメッシュを
+    読んだことがあれば, 索引などと対応する前回の配列を返す. 選択状態は実行のたびに変わるので毎回メッシュから読む.
+    """
+    coords = read_vertex_coords(mesh)
+    key = array_fingerprint(name, coords)
+    entry = _memory_entry(key)
+    coords = entry.setdefault("coords", coords)
+    return key, coords, read_vertex_selection(mesh)
+
+
+def cached_slab_index(key, coords, axis=2, cache_dir=None):
+    """load_mesh_cached のキーに対応する高さ方向の索引を返す. なければ作って保存する"""
+    entry = _memory_entry(key)
+    index = entry.get(("slab", axis))
+    if index is not None:
+        return index
+
+    order_path = _entry_path(key, f"order_{axis}.npy", cache_dir)
+    values_path = _entry_path(key, f"sorted_{axis}.npy", cache_dir)
+    order = _load_array(order_path)
+    sorted_values = _load_array(values_path)
+    if order is None or sorted_values is None:
+        index = SlabIndex(coords, axis=axis)
+        _save(order_path, lambda f: np.save(f, index.order))
+        _save(values_path, lambda f: np.save(f, index.sorted_values))
+        _prune(cache_dir)
+    else:
+        index = SlabIndex.from_arrays(coords, order, sorted_values, axis=axis)
+    entry[("slab", axis)] = index
+    return index
+
+
+def cached_kdtree(key, coords):
+    """load_mesh_cached のキーに対応する KD 木を返す
+
+    木はファイルから読み込まず (pickle は使わない), 同じプロセスで初めて使うときに座標から作って保持する.
+    """
+    entry = _memory_entry(key)
+    tree = entry.get("kdtree")
+    if tree is None:
+        tree = entry["kdtree"] = PointKDTree(coords)
+    return tree
+
+
+def clear_cache(cache_dir=None):
+    """保存したすべてのキャッシュを消す"""
+    _memory_cache.clear()
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
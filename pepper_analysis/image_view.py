@@ -0,0 +1,60 @@
+"""結果の画像を Blender の Image データブロックに直接書き込んで表示する
+
+PNG を一時ファイルに保存して外部のビューアで開く代わりに, NumPy の画像を
+bpy.data.images の同じ名前の画像に pixels.foreach_set で書き込み, Image Editor に表示する.
+画像は実行のたびに使い回すので, ファイルの入出力も外部のプロセスの起動も起きない.
+"""
+import numpy as np
+
+from pepper_analysis.lazy import lazy_import
+
+bpy = lazy_import("bpy")
+
+# 結果の画像のデータブロック名
+IMAGE_NAME = "pepper_analysis_result"
+
+
+def to_rgba(image):
+    """OpenCV の画像 (グレースケール (H, W) か BGR (H, W, 3), uint8) を Blender の pixels の並び (下の行から, RGBA, float32) にする"""
+    image = np.asarray(image)
+    if image.ndim == 2:
+        image = image[:, :, None].repeat(3, axis=2)
+    rgba = np.ones((image.shape[0], image.shape[1], 4), dtype=np.float32)
+    rgba[:, :, :3] = image[:, :, 2::-1] # BGR → RGB
+    if image.dtype == np.uint8:
+        rgba[:, :, :3] /= 255
+    return rgba[::-1] # Blender の画像は左下が原点
+
+
+def write_image(image, name=IMAGE_NAME):
+    """画像を bpy.data.images[name] に書き込み, その Image を返す (なければ作り, 大きさが違えば合わせる)"""
+    rgba = to_rgba(image)
+    height, width = rgba.shape[:2]
+    blender_image = bpy.data.images.get(name)
+    if blender_image is None:
+        blender_image = bpy.data.images.new(name, width=width, height=height, alpha=False)
+        # 画素の値をそのまま表示する (色空間の変換をしない)
+        blender_image.colorspace_settings.name = "Non-Color"
+    elif tuple(blender_image.size) != (width, height):
+        blender_image.scale(width, height)
+
+    blender_image.pixels.foreach_set(rgba.reshape(-1))
+    blender_image.update()
+    return blender_image
+
+
+def show_image(image, name=IMAGE_NAME):
+    """画像を bpy.data.images[name] に書き込み, 開いている Image Editor に表示する
+
+    Image Editor がなければ画像の書き込みだけを行い, False を返す.
+    """
+    blender_image = write_image(image, name=name)
+    screen = bpy.context.screen
+    areas = screen.areas if screen is not None else []
+    area = next((a for a in areas if a.type == 'IMAGE_EDITOR'), None)
+    if area is None:
+        print(f"Image Editor が見つかりません。画像は bpy.data.images['{blender_image.name}'] に保存しました。")
+        return False
+    area.spaces.active.image = blender_image
+    area.tag_redraw()
+    return True
@@ -0,0 +1,74 @@
+"""メッシュのアイランド (辺でつながった面のまとまり) の検出
+
+面と辺の接続を Mesh.polygons / Mesh.loops の foreach_get で配列として読み込み,
+連結成分をまとめて求める. scipy があれば scipy.sparse.csgraph を使い,
+なければ NumPy の union-find (親の付け替えとポインタジャンプの繰り返し) で求める.
+"""
+import numpy as np
+
+try:
+    from scipy.sparse import coo_matrix as _coo_matrix
+    from scipy.sparse.csgraph import connected_components as _csgraph_components
+except ImportError:
+    _csgraph_components = None
+
+
+def read_polygon_edges(mesh):
+    """(各ループの面のインデックス, 各ループの辺のインデックス) を返す"""
+    n_polygons = len(mesh.polygons)
+    loop_start = np.empty(n_polygons, dtype=np.int64)
+    loop_total = np.empty(n_polygons, dtype=np.int64)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    edge_index = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get("edge_index", edge_index)
+
+    # 面ごとのループ loop_start, loop_start + 1, ... を並べる
+    loop_index = np.repeat(loop_start - np.cumsum(loop_total) + loop_total, loop_total) + np.arange(loop_total.sum())
+    polygon_index = np.repeat(np.arange(n_polygons), loop_total)
+    return polygon_index, edge_index[loop_index]
+
+
+def connected_components(n, a, b):
+    """n 個の節点と辺 (a[i], b[i]) のグラフの連結成分のラベルを (n,) の配列で返す"""
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    if _csgraph_components is not None:
+        graph = _coo_matrix((np.ones(len(a), dtype=np.int8), (a, b)), shape=(n, n))
+        return _csgraph_components(graph, directed=False)[1]
+
+    parent = np.arange(n)
+    while True:
+        # 辺の両端の根を比べ, 大きい方の根を小さい方の根につなぐ
+        root_a = parent[a]
+        root_b = parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        np.minimum.at(parent, np.maximum(root_a, root_b)[differ], np.minimum(root_a, root_b)[differ])
+        # すべての節点が根を直接指すまでたどる
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return np.unique(parent, return_inverse=True)[1].reshape(-1)
+
+
+def face_islands(mesh):
+    """面ごとのアイランドのラベルと, アイランドごとの面の数を返す
+
+    辺を共有する面を同じアイランドとみなす (面と辺を節点にした 2 部グラフの連結成分).
+    """
+    polygon_index, edge_index = read_polygon_edges(mesh)
+    return polygon_islands(len(mesh.polygons), len(mesh.edges), polygon_index, edge_index)
+
+
+def polygon_islands(n_polygons, n_edges, polygon_index, edge_index):
+    """face_islands の計算部分. 各ループの面と辺のインデックスの配列からアイランドを求める"""
+    labels = connected_components(n_polygons + n_edges, polygon_index, n_polygons + edge_index)[:n_polygons]
+
+    # 面を持たない辺だけの成分を除いてラベルを詰める
+    _, labels = np.unique(labels, return_inverse=True)
+    labels = labels.reshape(-1)
+    return labels, np.bincount(labels)
@@ -0,0 +1,72 @@
+"""頂点座標の KD 木による近傍探索
+
+Blender 上では mathutils.kdtree, それ以外では scipy.spatial.cKDTree を使う.
+どちらも使えない場合は全頂点を NumPy で判定する (結果は同じ).
+木の構築は全頂点に比例して重いので, 多数の基準点をまとめて計測するときだけ使う
+(1 点だけなら SlabIndex で高さを絞る方が速い. 作成済みの木は disk_cache.cached_kdtree で使い回す).
+"""
+import math
+
+import numpy as np
+
+try:
+    from mathutils.kdtree import KDTree as _BlenderKDTree
+except ImportError:
+    _BlenderKDTree = None
+
+try:
+    from scipy.spatial import cKDTree as _ScipyKDTree
+except ImportError:
+    _ScipyKDTree = None
+
+
+class PointKDTree:
+    """(N, 3) の頂点座標に対する KD 木"""
+
+    def __init__(self, coords):
+        self.coords = coords
+        if _BlenderKDTree is not None:
+            self.backend = "mathutils"
+            self._tree = _BlenderKDTree(len(coords))
+            for i, co in enumerate(coords.tolist()):
+                self._tree.insert(co, i)
+            self._tree.balance()
+        elif _ScipyKDTree is not None:
+            self.backend = "scipy"
+            self._tree = _ScipyKDTree(coords)
+        else:
+            self.backend = "numpy"
+            self._tree = None
+
+    def __len__(self):
+        return len(self.coords)
+
+    def find_range(self, center, radius):
+        """center から radius 以内にある頂点のインデックスを返す (3次元の球)"""
+        if self.backend == "mathutils":
+            found = self._tree.find_range(tuple(center), radius)
+            return np.array([index for _, index, _ in found], dtype=np.int64)
+        if self.backend == "scipy":
+            return np.asarray(self._tree.query_ball_point(center, radius), dtype=np.int64)
+        offset = self.coords.astype(np.float64) - np.asarray(center, dtype=np.float64)
+        return np.flatnonzero(np.einsum("ij,ij->i", offset, offset) <= radius * radius)
+
+    def query_cylinder(self, center, radius, tolerance, axis=2):
+        """円柱内の頂点のインデックスを返す
+
+        axis 方向の差が tolerance 未満, 残り 2 軸の平面上で center からの距離が
+        radius 未満の頂点を返す. 円柱を囲む球で候補を絞ってから厳密に判定する.
+        """
+        center = np.asarray(center, dtype=np.float64)
+        plane = [i for i in range(3) if i != axis]
+
+        # 円柱を囲む球 (丸め誤差の分だけ少し大きめ) で候補を取得
+        bound = math.hypot(radius, tolerance) * (1 + 1e-6)
+        candidates = self.find_range(center, bound)
+
+        # 高さと平面上の距離を厳密に判定
+        points = self.coords[candidates]
+        in_slab = np.abs(points[:, axis] - np.float32(center[axis])) < tolerance
+        offset = points[:, plane].astype(np.float64) - center[plane]
+        near = np.hypot(offset[:, 0], offset[:, 1]) < radius
+        return candidates[in_slab & near]
@@ -0,0 +1,29 @@
+"""重い依存モジュールの遅延読み込み
+
+cv2 などは読み込むだけで時間がかかるので, モジュールの先頭では lazy_import で代わりの
+オブジェクトを作っておき, 属性を初めて参照したときに本物を import する.
+RANSAC のように OpenCV を使わない経路や, ワーカーの起動時には読み込まずに済む.
+"""
+import importlib
+
+
+class LazyModule:
+    """属性を参照したときに name のモジュールを import する代理オブジェクト"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """name のモジュールを遅延読み込みする代理オブジェクトを返す"""
+    return LazyModule(name)
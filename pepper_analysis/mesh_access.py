@@ -0,0 +1,63 @@
+"""メッシュの頂点データを NumPy 配列としてまとめて取得する
+
+BMesh を作って頂点を 1 つずつ回す代わりに, Mesh.vertices.foreach_get で
+全頂点の座標と選択状態を連続した配列に一括で読み込む.
+"""
+import numpy as np
+
+
+def read_vertex_coords(mesh):
+    """全頂点の座標を (N, 3) の float32 配列で返す"""
+    n = len(mesh.vertices)
+    coords = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    return coords.reshape(n, 3)
+
+
+def read_vertex_selection(mesh):
+    """全頂点の選択状態を (N,) の bool 配列で返す"""
+    select = np.empty(len(mesh.vertices), dtype=bool)
+    mesh.vertices.foreach_get("select", select)
+    return select
+
+
+def write_vertex_selection(mesh, select):
+    """全頂点の選択状態を (N,) の bool 配列から書き込む (オブジェクトモードで実行する)"""
+    mesh.vertices.foreach_set("select", np.asarray(select, dtype=bool))
+    mesh.update()
+
+
+def read_mesh_arrays(mesh):
+    """頂点座標と選択状態をまとめて返す
+
+    選択状態はオブジェクトモードで同期されたものが読み込まれる (bm.from_mesh と同じ).
+    """
+    return read_vertex_coords(mesh), read_vertex_selection(mesh)
+
+
+def collect_points_near_base(coords, base_point, target, tolerance, distance_threshold, axis=2, slab_index=None, kdtree=None):
+    """指定した高さ (axis 方向の座標 target) にあり, 基準点の近くにある頂点を返す
+
+    axis 方向の差が tolerance 未満, 残り 2 軸の平面上で基準点からの距離が
+    distance_threshold 未満の頂点を (K, 3) の float64 配列で返す.
+    同じ axis の SlabIndex を渡した場合は全頂点を走査せずに索引から高さを絞る.
+    KD 木 (PointKDTree) を渡した場合は円柱内の頂点を木から直接取得する.
+    """
+    plane = [i for i in range(3) if i != axis]
+
+    if kdtree is not None:
+        center = np.array(base_point, dtype=np.float64)
+        center[axis] = target
+        return coords[kdtree.query_cylinder(center, distance_threshold, tolerance, axis=axis)].astype(np.float64)
+
+    # 指定した高さにある頂点を収集
+    if slab_index is not None:
+        points = coords[slab_index.query(target, tolerance)].astype(np.float64)
+    else:
+        in_slab = np.abs(coords[:, axis] - np.float32(target)) < tolerance
+        points = coords[in_slab].astype(np.float64)
+
+    # 基準点の近くのみに絞る
+    offset = points[:, plane] - np.asarray(base_point, dtype=np.float64)[plane]
+    near = np.hypot(offset[:, 0], offset[:, 1]) < distance_threshold
+    return points[near]
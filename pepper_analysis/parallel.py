@@ -0,0 +1,82 @@
+"""複数の果実の計測をプロセスプールで並列に実行する
+
+頂点座標と高さ方向の索引は multiprocessing.shared_memory に 1 度だけ置き,
+各ワーカーはそれを参照するだけなので, タスクごとにメッシュ全体を pickle しない.
+ハフ変換 (OpenCV) を含む果実ごとの処理がコア数分並列に動く.
+
+Linux (fork) での実行を想定している. spawn の環境ではワーカーがメインスクリプトを
+読み込み直すので, 実行するスクリプトは `if __name__ == "__main__":` で保護すること.
+"""
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pepper_analysis.batch import result_row
+from pepper_analysis.lazy import lazy_import
+from pepper_analysis.pipeline import CENTER_METHOD, measure_fruit
+from pepper_analysis.slab_index import SlabIndex
+
+cv2 = lazy_import("cv2")
+
+# ワーカープロセス内の状態
+_worker_index = None
+_worker_params = None
+_worker_shms = []
+
+
+def _share_array(array):
+    """配列を共有メモリにコピーし, (SharedMemory, ワーカーに渡す情報) を返す"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_array(spec):
+    """共有メモリ上の配列を参照する"""
+    name, shape, dtype = spec
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.12 以前. リソーストラッカーは親プロセスと共有なので, 解放は親の unlink に任せる
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _init_worker(coords_spec, order_spec, values_spec, axis, params):
+    global _worker_index, _worker_params, _worker_shms
+
+    # プロセス数だけ並列にするので OpenCV 内部のスレッドは使わない (OpenCV を使わない方法なら読み込まない)
+    if params.get("method", CENTER_METHOD) != "ransac":
+        cv2.setNumThreads(1)
+
+    attached = [_attach_array(spec) for spec in (coords_spec, order_spec, values_spec)]
+    _worker_shms = [shm for shm, _ in attached]
+    coords, order, sorted_values = (array for _, array in attached)
+    _worker_index = SlabIndex.from_arrays(coords, order, sorted_values, axis=axis)
+    _worker_params = params
+
+
+def _measure_seed(task):
+    seed_id, seed_point = task
+    result = measure_fruit(_worker_index, seed_point, **_worker_params)
+    return result_row(seed_id, seed_point, result)
+
+
+def run_batch_parallel(z_index, seed_ids, seed_points, processes=None, chunksize=4, **params):
+    """batch.run_batch と同じ結果をプロセスプールで並列に計算する
+
+    processes を省略した場合は CPU のコア数だけワーカーを起動する.
+    ワーカーでは KD 木を作らず, 共有した高さ方向の索引だけで頂点を絞る.
+    """
+    shared = [_share_array(array) for array in (z_index.coords, z_index.order, z_index.sorted_values)]
+    specs = [spec for _, spec in shared]
+    tasks = list(zip(seed_ids, np.asarray(seed_points, dtype=np.float64).tolist()))
+    try:
+        with mp.Pool(processes, initializer=_init_worker, initargs=(*specs, z_index.axis, params)) as pool:
+            rows = pool.map(_measure_seed, tasks, chunksize=chunksize)
+    finally:
+        for shm, _ in shared:
+            shm.close()
+            shm.unlink()
+    return rows
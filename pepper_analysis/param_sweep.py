@@ -0,0 +1,148 @@
+"""ハフ変換のパラメータを変えて中心推定を繰り返すときに, 途中の結果を使い回す
+
+中心推定を段階 (Stage) の依存関係のグラフとして表す.
+
+    points     (tolerance, distance_threshold)          断面の頂点の収集
+    projection (distance_threshold, image_size, point_size) ← points      投影画像
+    edges      ()                                        ← projection  ぼかし + Canny
+    hough      (dp, min_dist, param1, param2, min_radius, max_radius) ← edges
+    circle     (distance_threshold, image_size)          ← hough       ワールド座標への変換
+
+各段階の結果は (その段階のパラメータの値, 上流の段階のキー) をキーにして保持するので,
+PARAM2 や MIN_RADIUS だけを変えたときは hough と circle だけを計算し直し, 投影や Canny は使い回す.
+保持する結果は呼び出し側が書き換えても壊れないよう, 配列は読み取り専用に, リストはタプルにしておく.
+"""
+import itertools
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from pepper_analysis.pipeline import (DISTANCE_THRESHOLD, IMAGE_SIZE, POINT_SIZE, DP, MIN_DIST, PARAM1, PARAM2, MIN_RADIUS, MAX_RADIUS, TOLERANCE,
+                                      circle_to_world, collect_slice_points, edge_image, hough_circles, rasterize_slice)
+
+# パラメータの既定値
+DEFAULT_PARAMS = {"tolerance": TOLERANCE, "distance_threshold": DISTANCE_THRESHOLD, "image_size": IMAGE_SIZE, "point_size": POINT_SIZE,
+                  "dp": DP, "min_dist": MIN_DIST, "param1": PARAM1, "param2": PARAM2, "min_radius": MIN_RADIUS, "max_radius": MAX_RADIUS}
+# 段階ごとに保持する結果の数の上限 (古いものから捨てる)
+MAX_ENTRIES = 64
+
+
+class Stage:
+    """中心推定の 1 段階. func(slice_, *上流の結果, **params) で結果を計算する"""
+
+    def __init__(self, name, params, inputs, func):
+        self.name = name
+        self.params = params
+        self.inputs = inputs
+        self.func = func
+
+
+def _points(slice_, tolerance, distance_threshold):
+    points = collect_slice_points(slice_.z_index, slice_.base_point, slice_.target_z, tolerance, distance_threshold, kdtree=slice_.kdtree)
+    return points if len(points) else None
+
+
+def _projection(slice_, points, distance_threshold, image_size, point_size):
+    if points is None:
+        return None
+    return rasterize_slice(points, slice_.base_point, distance_threshold, image_size, point_size=point_size)
+
+
+def _edges(slice_, projection):
+    return None if projection is None else edge_image(projection)
+
+
+def _hough(slice_, edges, dp, min_dist, param1, param2, min_radius, max_radius):
+    return None if edges is None else hough_circles(edges, dp, min_dist, param1, param2, min_radius, max_radius)
+
+
+def _circle(slice_, circles, distance_threshold, image_size):
+    if circles is None:
+        return None
+    return circle_to_world(circles, slice_.base_point, distance_threshold=distance_threshold, image_size=image_size)
+
+
+def _freeze(result):
+    """保持する結果を書き換えられないようにする (配列は読み取り専用, リストはタプル)"""
+    if isinstance(result, np.ndarray):
+        result.setflags(write=False)
+    elif isinstance(result, list):
+        result = tuple(result)
+    return result
+
+
+# 上流から順に並べた依存関係のグラフ
+STAGES = (
+    Stage("points", ("tolerance", "distance_threshold"), (), _points),
+    Stage("projection", ("distance_threshold", "image_size", "point_size"), ("points",), _projection),
+    Stage("edges", (), ("projection",), _edges),
+    Stage("hough", ("dp", "min_dist", "param1", "param2", "min_radius", "max_radius"), ("edges",), _hough),
+    Stage("circle", ("distance_threshold", "image_size"), ("hough",), _circle),
+)
+
+
+class SliceSweep:
+    """1 つの断面 (基準点と高さ) について, 段階ごとの結果を保持しながら中心推定を繰り返す"""
+
+    def __init__(self, z_index, base_point, target_z=None, kdtree=None, stages=STAGES, max_entries=MAX_ENTRIES):
+        self.z_index = z_index
+        self.base_point = np.asarray(base_point, dtype=np.float64)
+        self.target_z = self.base_point[2] if target_z is None else target_z
+        self.kdtree = kdtree
+        self.stages = stages
+        self.max_entries = max_entries
+        self._cache = {stage.name: OrderedDict() for stage in stages}
+        # 段階ごとに計算した回数と使い回した回数
+        self.computed = Counter()
+        self.reused = Counter()
+
+    def run(self, **params):
+        """params (省略したものは既定値) で中心を推定し, center_point_estimation と同じ形式の結果か None を返す
+
+        前回までと同じ値になる段階は計算せず, 保持している結果を使う. 返すリストは毎回新しく作る.
+        """
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"未対応のパラメータです: {sorted(unknown)}")
+        values = dict(DEFAULT_PARAMS, **params)
+
+        keys = {}
+        results = {}
+        for stage in self.stages:
+            key = (tuple(values[name] for name in stage.params), tuple(keys[name] for name in stage.inputs))
+            keys[stage.name] = key
+            cache = self._cache[stage.name]
+            if key in cache:
+                cache.move_to_end(key)
+                self.reused[stage.name] += 1
+            else:
+                cache[key] = _freeze(stage.func(self, *(results[name] for name in stage.inputs), **{name: values[name] for name in stage.params}))
+                self.computed[stage.name] += 1
+                if len(cache) > self.max_entries:
+                    cache.popitem(last=False)
+            results[stage.name] = cache[key]
+        result = results[self.stages[-1].name]
+        return list(result) if isinstance(result, tuple) else result
+
+    def clear(self):
+        for cache in self._cache.values():
+            cache.clear()
+
+
+def stage_order(grid, stages=STAGES):
+    """grid のパラメータ名を, 上流の段階で使うものから順に並べる"""
+    order = [name for stage in stages for name in stage.params]
+    return sorted(grid, key=lambda name: order.index(name) if name in order else len(order))
+
+
+def sweep(z_index, seed_points, grid, kdtree=None, max_entries=MAX_ENTRIES):
+    """grid ({パラメータ名: 値のリスト}) のすべての組み合わせで各基準点の中心を推定する
+
+    上流の段階のパラメータほど外側のループにして, 下流の段階だけが変わる組み合わせを続けて計算する.
+    (組み合わせの dict のリスト, 組み合わせ × 基準点 の結果のリスト, 基準点ごとの SliceSweep) を返す.
+    """
+    names = stage_order(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    sweeps = [SliceSweep(z_index, seed_point, kdtree=kdtree, max_entries=max_entries) for seed_point in seed_points]
+    results = [[slice_sweep.run(**params) for slice_sweep in sweeps] for params in combinations]
+    return combinations, results, sweeps
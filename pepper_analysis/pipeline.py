@@ -0,0 +1,389 @@
+"""果実 1 個分の障害物距離計測パイプライン
+
+投影 (projection_to_image) → ハフ変換による中心推定 (center_point_estimation)
+→ 4 方向の障害物距離計測 (obst_dist_measure) を, 頂点座標の配列に対して行う.
+中心推定は投影せずにワールド座標の点群へ RANSAC で円をあてはめる方法 (method="ransac") や,
+粗い画像で候補を探してから周辺だけを細かく投影し直す方法 (method="pyramid") も選べる.
+bpy には依存しないので, Blender の UI からもバッチ処理からも同じ関数を使う.
+ハフ変換の経路の各段階 (collect_slice_points → rasterize_slice → edge_image → hough_circles → circle_to_world) は
+個別にも呼べ, param_sweep で途中の結果を使い回したり, 中心推定のスクリプトで途中の画像に描き込んだりするのに使う.
+"""
+import math
+
+import numpy as np
+
+from pepper_analysis.circle_fit import ransac_circle_fitting
+from pepper_analysis.lazy import lazy_import
+from pepper_analysis.mesh_access import collect_points_near_base
+from pepper_analysis.profiling import span
+from pepper_analysis.raster import rasterize_points
+
+cv2 = lazy_import("cv2")
+
+### パラメータ（既定値） ###
+# 投影
+TOLERANCE = 0.01 # [m] 選択した点からどの高さまでの頂点を収集するか
+DISTANCE_THRESHOLD = 0.05 # [m] 選択した点からどの距離までの頂点を収集するか
+IMAGE_SIZE = 100
+POINT_SIZE = 2 # [pixel] 投影する点のサイズ
+# ハフ変換
+DP = 1.2
+MIN_DIST = 15
+PARAM1 = 50
+PARAM2 = 30
+MIN_RADIUS = 10
+MAX_RADIUS = 25
+# 中心推定の方法 ("hough": 投影画像のハフ変換, "pyramid": 粗い画像 → 候補周辺の細かい画像の 2 段のハフ変換,
+# "ransac": ワールド座標の点群に円をあてはめ)
+CENTER_METHOD = "hough"
+COARSE_SIZE = 64 # [pixel] pyramid の 1 段目の画像サイズ
+REFINE_SIZE = 200 # [pixel] pyramid の 2 段目 (候補の周辺) の画像サイズ
+REFINE_WINDOW = 1.5 # pyramid の 2 段目で投影する範囲 (候補の円の半径に対する倍率)
+REFINE_PARAM2 = 10 # pyramid の 2 段目のハフ変換の投票数の閾値 (候補は 1 つで半径の範囲も狭いので低くする)
+FIT_METHOD = "taubin" # RANSAC で選んだ点へのあてはめ方法 (kasa / pratt / taubin)
+RANSAC_ITERATIONS = 256
+RANSAC_THRESHOLD = 0.002 # [m] 円周からこの距離以内の点を円上の点とみなす
+# 障害物距離計算
+CORRECT_PARAM = 0.008 # 円の半径補正 (収穫物自身を障害物として検出することを防ぐ)
+APPROACH_ANGLE = 90 # [degree] アプローチする角度 x,yのワールド座標系
+
+# 方向ごとの判定で一度に作る配列の要素数の上限 (方向数 × 点数)
+MAX_SECTOR_ELEMENTS = 1 << 22
+
+
+def collect_slice_points(z_index, base_point, target_z, tolerance, distance_threshold, kdtree=None, image_size=IMAGE_SIZE):
+    """高さ target_z の断面のうち, 基準点から distance_threshold 以内の頂点を返す (KD木があれば円柱内の点を木から取得)"""
+    with span("collect_points", image_size=image_size) as fields:
+        vertices_near_base = collect_points_near_base(z_index.coords, base_point, target_z, tolerance, distance_threshold, slab_index=z_index, kdtree=kdtree)
+        fields["vertices"] = len(vertices_near_base)
+    return vertices_near_base
+
+
+def rasterize_slice(vertices_near_base, base_point, distance_threshold, image_size, point_size=POINT_SIZE, rotate=True):
+    """断面の頂点を基準点を中心とした image_size の画像に投影する
+
+    画像は左右反転し, rotate=True なら反時計回りに 90° 回転する (反転と回転を合わせると転置になる).
+    """
+    with span("rasterize", image_size=image_size):
+        # 2D座標への投影（X-y平面）
+        points_2d = ((vertices_near_base[:, :2] - base_point[:2]) / distance_threshold * image_size / 2 + image_size / 2).astype(np.int64)
+
+        # ポイントを描画（全点を一括で書き込み、円の形に膨張させる）
+        image = rasterize_points(points_2d, image_size, point_size)
+
+        # モデルにより調整
+        image = cv2.flip(image, 1) # 画像反転
+        if rotate:
+            image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE) # 画像を反時計回りに90°回転
+
+    return image
+
+
+def projection_to_image(z_index, base_point, target_z, tolerance, distance_threshold, image_size, kdtree=None, point_size=POINT_SIZE, rotate=True):
+
+    # 指定した高さにある頂点を収集し、基準点の近くのみに絞る
+    vertices_near_base = collect_slice_points(z_index, base_point, target_z, tolerance, distance_threshold, kdtree=kdtree, image_size=image_size)
+
+    if len(vertices_near_base) == 0:
+        print("No vertices found near the base point at the target height.")
+        return
+
+    return rasterize_slice(vertices_near_base, base_point, distance_threshold, image_size, point_size=point_size, rotate=rotate)
+
+
+def edge_image(image, image_size=IMAGE_SIZE):
+    """投影画像をぼかし, Canny でエッジの画像にする"""
+    with span("blur_canny", image_size=image_size):
+        # blur
+        image = cv2.GaussianBlur(image, ksize=(9,9), sigmaX=0, sigmaY=0)
+
+        # canny
+        med_val = np.median(image)
+        sigma = 0.33  # 0.33
+        min_val = int(max(0, (1.0 - sigma) * med_val))
+        max_val = int(max(255, (1.0 + sigma) * med_val))
+        image = cv2.Canny(image, threshold1 = min_val, threshold2 = max_val)
+    return image
+
+
+def hough_circles(edges, dp, min_dist, param1, param2, min_radius, max_radius, image_size=IMAGE_SIZE):
+    """エッジの画像からハフ変換で円を検出する. cv2.HoughCircles の戻り値 (見つからなければ None) を返す"""
+    with span("hough", image_size=image_size) as fields:
+        circles = cv2.HoughCircles(edges, cv2.HOUGH_GRADIENT, dp=dp, minDist=min_dist, param1=param1, param2=param2, minRadius=min_radius, maxRadius=max_radius)
+        fields["circles"] = 0 if circles is None else circles.shape[1]
+    return circles
+
+
+def circles_to_world(circles, base_point, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, rotate=True):
+    """検出した円それぞれを [world_center_x, world_center_y, world_radius, center_x, center_y, radius] に変換したリストを返す
+
+    center_x, center_y, radius は投影画像 (rasterize_slice の反転・回転後) の画素の値で, ワールド座標は RANSAC と同じくそのままの位置.
+    rotate は投影したときと同じ値にする. 円がなければ空のリスト.
+    """
+    world_circles = []
+    if circles is None:
+        return world_circles
+
+    circles = np.uint16(np.around(circles))
+    for i, circle in enumerate(circles[0, :]):
+        center_x = int(circle[0])  # X座標をスケールに合わせて戻す
+        center_y = int(circle[1])  # y座標をスケールに合わせて戻す
+        radius = int(circle[2])    # 半径もスケールに合わせて戻す
+
+        # ワールド座標系に変換
+        if rotate:
+            # 投影画像は反転・回転で転置されているため, 画像の y (行) がワールドの x, 画像の x (列) がワールドの y に対応する
+            world_center_x = (2*center_y - image_size)*distance_threshold/image_size + base_point[0]
+            world_center_y = (2*center_x - image_size)*distance_threshold/image_size + base_point[1]
+        else:
+            # 投影画像は左右反転しているため, 画像の x (列) を反転してからワールドの x に戻す
+            world_center_x = (2*(image_size - 1 - center_x) - image_size)*distance_threshold/image_size + base_point[0]
+            world_center_y = (2*center_y - image_size)*distance_threshold/image_size + base_point[1]
+        world_radius = 2*radius*distance_threshold/image_size
+        world_circles.append([world_center_x, world_center_y, world_radius, center_x, center_y, radius])
+
+    return world_circles
+
+
+def circle_to_world(circles, base_point, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, rotate=True):
+    """検出した円 (複数あれば最後のもの) を circles_to_world と同じ形式に変換する. 円がなければ None"""
+    world_circles = circles_to_world(circles, base_point, distance_threshold=distance_threshold, image_size=image_size, rotate=rotate)
+    if not world_circles:
+        print("No circles detected.")
+        return None
+
+    return world_circles[-1]
+
+
+def center_point_estimation(image, base_point, dp, min_dist, param1, param2, min_radius, max_radius, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE, rotate=True):
+    edges = edge_image(image, image_size=image_size)
+
+    # ハフ変換で円を検出
+    circles = hough_circles(edges, dp, min_dist, param1, param2, min_radius, max_radius, image_size=image_size)
+
+    return circle_to_world(circles, base_point, distance_threshold=distance_threshold, image_size=image_size, rotate=rotate)
+
+
+def refine_circle_hough(z_index, base_point, target_z, kdtree=None, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE,
+                        point_size=POINT_SIZE, dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS,
+                        coarse_size=COARSE_SIZE, refine_size=REFINE_SIZE):
+    """2 段のハフ変換で円を推定する
+
+    1 段目は image_size の代わりに coarse_size の画像で候補を 1 つ探す (画素単位のパラメータは縮尺を合わせる).
+    2 段目は候補の中心のまわり (半径の REFINE_WINDOW 倍) だけを refine_size の画像に投影し,
+    候補の半径 ± 1 段目の 2 画素の範囲で円を探し直す. 点の大きさは image_size の画像と同じ [m] になるよう拡大する.
+    戻り値は center_point_estimation と同じ形式で, 画素の値は 2 段目の画像のもの.
+    2 段目で見つからなければ 1 段目の結果を返し, そのときの画素の値は 1 段目 (coarse_size) の画像のもの.
+
+    合成データ (synthetic.make_slices, 既定のパラメータ) での中心の誤差は中央値 約 0.5 mm, 90 パーセンタイル 約 1.3 mm
+    (1 段だけのハフ変換は中央値 約 1.9 mm).
+    """
+    scale = coarse_size / image_size
+    coarse_image = projection_to_image(z_index, base_point, target_z, tolerance=tolerance, distance_threshold=distance_threshold, image_size=coarse_size, kdtree=kdtree, point_size=point_size)
+    if coarse_image is None:
+        return None
+    # 円の候補は最も投票の多い 1 つだけにする (min_dist を画像サイズにする)
+    coarse = center_point_estimation(coarse_image, base_point, dp=dp, min_dist=coarse_size, param1=param1, param2=max(1, param2 * scale),
+                                     min_radius=int(min_radius * scale), max_radius=int(np.ceil(max_radius * scale)), distance_threshold=distance_threshold, image_size=coarse_size)
+    if coarse is None:
+        return None
+
+    # 候補の中心を 2 段目の投影の中心にする
+    window_center = np.array(base_point, dtype=np.float64)
+    window_center[:2] = coarse[:2]
+    coarse_pixel = 2 * distance_threshold / coarse_size
+    window = coarse[2] * REFINE_WINDOW + coarse_pixel
+
+    refine_pixel = 2 * window / refine_size
+    refine_point_size = max(1, int(round(point_size * (2 * distance_threshold / image_size) / refine_pixel)))
+    refine_image = projection_to_image(z_index, window_center, target_z, tolerance=tolerance, distance_threshold=window, image_size=refine_size, kdtree=kdtree, point_size=refine_point_size)
+    if refine_image is None:
+        return coarse
+    refine = center_point_estimation(refine_image, window_center, dp=dp, min_dist=refine_size, param1=param1, param2=REFINE_PARAM2,
+                                     min_radius=max(1, int((coarse[2] - 2 * coarse_pixel) / refine_pixel)), max_radius=int(np.ceil((coarse[2] + 2 * coarse_pixel) / refine_pixel)),
+                                     distance_threshold=window, image_size=refine_size)
+    if refine is None:
+        return coarse
+    return refine
+
+
+def fit_circle_points(z_index, base_point, target_z, kdtree=None, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE,
+                      min_radius=MIN_RADIUS, max_radius=MAX_RADIUS, fit=FIT_METHOD, iterations=RANSAC_ITERATIONS, threshold=RANSAC_THRESHOLD):
+    """高さ target_z の断面の点群に RANSAC で円をあてはめ, [world_center_x, world_center_y, world_radius] を返す
+
+    画像を作らずにワールド座標のまま推定する. 半径の範囲 min_radius, max_radius は
+    ハフ変換と同じ [pixel] で指定し, distance_threshold と image_size から [m] に直す.
+    """
+    with span("collect_points") as fields:
+        vertices_near_base = collect_points_near_base(z_index.coords, base_point, target_z, tolerance, distance_threshold, slab_index=z_index, kdtree=kdtree)
+        fields["vertices"] = len(vertices_near_base)
+
+    if len(vertices_near_base) == 0:
+        print("No vertices found near the base point at the target height.")
+        return None
+
+    pixel_size = 2 * distance_threshold / image_size
+    with span("ransac_fit", fit=fit):
+        circle = ransac_circle_fitting(vertices_near_base[:, :2], fit=fit, iterations=iterations, threshold=threshold,
+                                       min_radius=min_radius * pixel_size, max_radius=max_radius * pixel_size)
+    if circle is None:
+        print("No circles detected.")
+        return None
+
+    world_center_x, world_center_y, world_radius, _ = circle
+    return [world_center_x, world_center_y, world_radius]
+
+
+def sector_min_dist(points_2d, circle, angles):
+    """各方向 (angles [rad]) について, 円の幅の帯に入る点までの最短距離を配列で返す
+
+    点を -angle だけ回転した座標 (x', y') に変換し, |y'| <= 半径 かつ x' > 0 の点を
+    その方向の障害物とみなす. 全方向・全点を配列演算でまとめて判定する.
+    帯に点がない方向の距離は np.inf.
+    """
+    center_x = circle[0]
+    center_y = circle[1]
+    radius = circle[2]
+
+    dx = points_2d[:, 0] - center_x
+    dy = points_2d[:, 1] - center_y
+    min_distance = np.full(len(angles), np.inf)
+
+    # 方向数 × 点数 の配列が大きくなりすぎないよう, 方向を分けて計算する
+    step = max(1, MAX_SECTOR_ELEMENTS // max(len(dx), 1))
+    for start in range(0, len(angles), step):
+        chunk = angles[start:start + step]
+        cos = np.array([math.cos(angle) for angle in chunk])[:, None]
+        sin = np.array([math.sin(angle) for angle in chunk])[:, None]
+        cos_perp = np.array([math.cos(angle+math.pi/2) for angle in chunk])[:, None]
+        sin_perp = np.array([math.sin(angle+math.pi/2) for angle in chunk])[:, None]
+
+        # x' は指定方向に射影した距離, y' は指定方向と垂直な成分
+        x_rot = cos*dx + sin*dy
+        y_rot = cos_perp*dx + sin_perp*dy
+        in_band = (np.abs(y_rot) <= radius) & (x_rot > 0)
+
+        # 最小の距離を求める
+        min_distance[start:start + len(chunk)] = np.where(in_band, x_rot, np.inf).min(axis=1, initial=np.inf)
+
+    return min_distance
+
+
+def sector_obst_dist(points_2d, circle, angles):
+    """sector_min_dist の結果をリストで返す. 帯に点がない方向は None"""
+    return [float(d) if np.isfinite(d) else None for d in sector_min_dist(points_2d, circle, angles)]
+
+
+def obstacle_points(z_index, world_circle, target_z, tolerance=TOLERANCE, correct_param=CORRECT_PARAM):
+    """指定した高さにあり, 検知した円 (半径を補正) より外側にある頂点の XY 座標を返す"""
+    center_x = world_circle[0]
+    center_y = world_circle[1]
+    radius = world_circle[2]
+
+    # 指定した高さにある頂点を収集
+    with span("obstacle_points") as fields:
+        in_slab = z_index.query(target_z, tolerance) #高さ絞る
+        points_2d = z_index.coords[in_slab, :2].astype(np.float64)
+        corrected_radius = radius + correct_param
+        outside = np.hypot(points_2d[:, 0] - center_x, points_2d[:, 1] - center_y) > corrected_radius # 検知した円より外の点に絞る，0.01は要調整
+        fields["vertices"] = len(points_2d)
+        fields["obstacles"] = int(outside.sum())
+    return points_2d[outside]
+
+
+def obst_dist_measure(z_index, world_circle, target_z, approach_angle, tolerance=TOLERANCE, correct_param=CORRECT_PARAM):
+
+    points_2d = obstacle_points(z_index, world_circle, target_z, tolerance=tolerance, correct_param=correct_param)
+
+    # 円の左側，右側，手前側，奥側の4方向をまとめて判定
+    angles = [approach_angle-math.pi/2, approach_angle+math.pi/2, approach_angle, approach_angle+math.pi]
+    with span("sector_dist", angles=len(angles)):
+        left_obst_dist, right_obst_dist, front_obst_dist, behind_obst_dist = sector_obst_dist(points_2d, world_circle, angles)
+
+    return [left_obst_dist, right_obst_dist, front_obst_dist, behind_obst_dist]
+
+
+def clearance_profile(z_index, world_circle, target_z, num_angles=360, tolerance=TOLERANCE, correct_param=CORRECT_PARAM):
+    """全周 num_angles 方向の障害物までの距離 (クリアランス) を求める
+
+    角度は x 軸から反時計回りに 0, 360/num_angles, ... [degree] で, APPROACH_ANGLE と同じ座標系.
+    (angles [rad], clearance [m]) を返す. 障害物がない方向の clearance は np.inf.
+    """
+    points_2d = obstacle_points(z_index, world_circle, target_z, tolerance=tolerance, correct_param=correct_param)
+    angles = np.arange(num_angles) * (2 * math.pi / num_angles)
+    with span("sector_dist", angles=num_angles):
+        return angles, sector_min_dist(points_2d, world_circle, angles)
+
+
+def best_approach_index(clearance):
+    """clearance_profile のクリアランスから, 障害物が最も遠い方向のインデックスを返す
+
+    障害物がない方向 (inf) があれば, inf が続く最も広い範囲 (360° をまたいでつながる) の中央の方向を返す.
+    全方向に障害物がなければ 0.
+    """
+    clearance = np.asarray(clearance)
+    free = np.isposinf(clearance)
+    if not free.any():
+        return int(np.argmax(clearance))
+    if free.all():
+        return 0
+
+    # 障害物のある方向が先頭になるよう回し, inf が続く範囲の [始まり, 終わり) を求める
+    shift = int(np.argmin(free))
+    rolled = np.concatenate([[False], np.roll(free, -shift), [False]])
+    edges = np.flatnonzero(np.diff(rolled.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    widest = int(np.argmax(ends - starts))
+    center = (starts[widest] + ends[widest] - 1) // 2
+    return int((center + shift) % len(clearance))
+
+
+def estimate_circle(z_index, base_point, target_z, kdtree=None, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE,
+                    point_size=POINT_SIZE, dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS,
+                    method=CENTER_METHOD, fit=FIT_METHOD, ransac_iterations=RANSAC_ITERATIONS, ransac_threshold=RANSAC_THRESHOLD,
+                    coarse_size=COARSE_SIZE, refine_size=REFINE_SIZE):
+    """高さ target_z の断面で果実の円を推定する. 求まらなければ None
+
+    method="hough" は断面を投影してハフ変換で, method="pyramid" は粗い画像と候補周辺の細かい画像の
+    2 段のハフ変換で, method="ransac" は点群に直接円をあてはめて推定する.
+    戻り値の先頭 3 要素はどの方法でも同じ座標系の [world_center_x, world_center_y, world_radius].
+    """
+    if method == "ransac":
+        return fit_circle_points(z_index, base_point, target_z, kdtree=kdtree, tolerance=tolerance, distance_threshold=distance_threshold, image_size=image_size,
+                                 min_radius=min_radius, max_radius=max_radius, fit=fit, iterations=ransac_iterations, threshold=ransac_threshold)
+    if method == "pyramid":
+        return refine_circle_hough(z_index, base_point, target_z, kdtree=kdtree, tolerance=tolerance, distance_threshold=distance_threshold, image_size=image_size,
+                                   point_size=point_size, dp=dp, min_dist=min_dist, param1=param1, param2=param2, min_radius=min_radius, max_radius=max_radius,
+                                   coarse_size=coarse_size, refine_size=refine_size)
+    if method != "hough":
+        raise ValueError(f"未対応の中心推定方法です: {method}")
+
+    center_image = projection_to_image(z_index, base_point, target_z, tolerance=tolerance, distance_threshold=distance_threshold, image_size=image_size, kdtree=kdtree, point_size=point_size)
+    if center_image is None:
+        return None
+    return center_point_estimation(center_image, base_point, dp=dp, min_dist=min_dist, param1=param1, param2=param2, min_radius=min_radius, max_radius=max_radius,
+                                   distance_threshold=distance_threshold, image_size=image_size)
+
+
+def measure_fruit(z_index, base_point, kdtree=None, tolerance=TOLERANCE, distance_threshold=DISTANCE_THRESHOLD, image_size=IMAGE_SIZE,
+                  point_size=POINT_SIZE, dp=DP, min_dist=MIN_DIST, param1=PARAM1, param2=PARAM2, min_radius=MIN_RADIUS, max_radius=MAX_RADIUS,
+                  correct_param=CORRECT_PARAM, approach_angle=APPROACH_ANGLE,
+                  method=CENTER_METHOD, fit=FIT_METHOD, ransac_iterations=RANSAC_ITERATIONS, ransac_threshold=RANSAC_THRESHOLD,
+                  coarse_size=COARSE_SIZE, refine_size=REFINE_SIZE):
+    """基準点 1 つについて投影, 中心推定, 障害物距離計測をまとめて行う
+
+    approach_angle は [degree]. 中心が求まらなかった場合は None を返す.
+    戻り値は (world_circle, [left, right, front, behind]) で, 単位は [m].
+    """
+    base_point = np.asarray(base_point, dtype=np.float64)
+    target_z = base_point[2]
+
+    world_circle = estimate_circle(z_index, base_point, target_z, kdtree=kdtree, tolerance=tolerance, distance_threshold=distance_threshold, image_size=image_size,
+                                   point_size=point_size, dp=dp, min_dist=min_dist, param1=param1, param2=param2, min_radius=min_radius, max_radius=max_radius,
+                                   method=method, fit=fit, ransac_iterations=ransac_iterations, ransac_threshold=ransac_threshold,
+                                   coarse_size=coarse_size, refine_size=refine_size)
+    if world_circle is None:
+        return None
+    obst_dist = obst_dist_measure(z_index, world_circle, target_z, approach_angle=math.radians(approach_angle), tolerance=tolerance, correct_param=correct_param)
+
+    return world_circle, obst_dist
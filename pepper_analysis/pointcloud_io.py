@@ -0,0 +1,109 @@
+"""PLY / OBJ ファイルから頂点座標を読み込む (Blender なしで解析するため)
+
+バイナリ PLY は頂点の部分を np.memmap で開き, x, y, z が float32 (この環境と同じバイト順) だけの場合はコピーせずに
+(N, 3) の配列として返す. それ以外 (他のプロパティがある, 型やバイト順が違う) は x, y, z を取り出して float32 に変換する. ASCII PLY と OBJ は頂点の行だけを np.loadtxt で読む.
+戻り値はどれも mesh_access.read_vertex_coords と同じ (N, 3) の float32 配列.
+"""
+import os
+
+import numpy as np
+
+# PLY のプロパティの型と NumPy の型
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+PLY_FORMATS = {"binary_little_endian": "<", "binary_big_endian": ">", "ascii": None}
+
+
+def _read_ply_header(f):
+    """PLY のヘッダを読み, (形式, 要素のリスト, ヘッダのバイト数) を返す
+
+    要素は (名前, 個数, [(プロパティ名, 型 or None)]) のリストで, リスト型のプロパティは型を None にする.
+    """
+    if f.readline().strip() != b"ply":
+        raise ValueError("PLY ファイルではありません")
+    file_format = None
+    elements = []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("PLY のヘッダが end_header で終わっていません")
+        words = line.decode("ascii", errors="replace").split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "end_header":
+            break
+        if words[0] == "format":
+            if words[1] not in PLY_FORMATS:
+                raise ValueError(f"未対応の PLY 形式です: {words[1]}")
+            file_format = words[1]
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == "property":
+            if words[1] == "list":
+                elements[-1][2].append((words[-1], None))
+            else:
+                elements[-1][2].append((words[-1], PLY_TYPES[words[1]]))
+    return file_format, elements, f.tell()
+
+
+def load_ply(path):
+    """PLY ファイルの頂点座標を (N, 3) の float32 配列で返す"""
+    with open(path, "rb") as f:
+        file_format, elements, header_size = _read_ply_header(f)
+
+        names = [name for name, _, _ in elements]
+        if "vertex" not in names:
+            raise ValueError("PLY に vertex 要素がありません")
+        vertex = names.index("vertex")
+        count = elements[vertex][1]
+        properties = elements[vertex][2]
+        if any(dtype is None for _, dtype in properties):
+            raise ValueError("vertex 要素のリスト型プロパティには対応していません")
+        property_names = [name for name, _ in properties]
+
+        if file_format == "ascii":
+            # vertex より前の要素の行を飛ばす (要素 1 つにつき 1 行)
+            for _ in range(sum(n for _, n, _ in elements[:vertex])):
+                f.readline()
+            columns = [property_names.index(axis) for axis in "xyz"]
+            return np.loadtxt(f, dtype=np.float32, max_rows=count, usecols=columns, ndmin=2).reshape(-1, 3)
+
+    # vertex より前の要素は固定長の場合だけ飛ばせる
+    byte_order = PLY_FORMATS[file_format]
+    offset = header_size
+    for _, n, props in elements[:vertex]:
+        if any(dtype is None for _, dtype in props):
+            raise ValueError("vertex より前にリスト型プロパティを持つ要素がある PLY には対応していません")
+        offset += n * np.dtype([(name, byte_order + dtype) for name, dtype in props]).itemsize
+
+    dtype = np.dtype([(name, byte_order + t) for name, t in properties])
+    vertices = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+    # x, y, z がこの順に並び, どれもファイルのバイト順の float32 で, それがこの環境の float32 と同じなら memmap をそのまま (N, 3) として使う
+    float32 = np.dtype(byte_order + "f4")
+    if (property_names == ["x", "y", "z"] and all(dtype[axis] == float32 for axis in "xyz")
+            and dtype.itemsize == 12 and float32 == np.dtype(np.float32)):
+        return vertices.view(np.float32).reshape(count, 3)
+    return np.column_stack([vertices["x"], vertices["y"], vertices["z"]]).astype(np.float32)
+
+
+def load_obj(path):
+    """OBJ ファイルの頂点 (v 行) の座標を (N, 3) の float32 配列で返す"""
+    with open(path, "rb") as f:
+        lines = [line[2:] for line in f if line.startswith(b"v ")]
+    if not lines:
+        return np.empty((0, 3), dtype=np.float32)
+    return np.loadtxt(lines, dtype=np.float32, usecols=(0, 1, 2), ndmin=2)
+
+
+def load_point_cloud(path):
+    """拡張子に応じて PLY / OBJ を読み込み, (N, 3) の float32 配列を返す"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".ply":
+        return load_ply(path)
+    if ext == ".obj":
+        return load_obj(path)
+    raise ValueError(f"対応していないファイル形式です: {path}")
@@ -0,0 +1,110 @@
+"""処理ごとの時間計測
+
+スクリプトの実行全体を Profiler で囲み, 各処理を span("処理名") で囲むと,
+処理ごとの時間 [ms] と頂点数などの値を JSON Lines (1 処理 1 行 + 合計の行) で出力する.
+Profiler が有効でないときの span は何もしないので, パッケージ内の関数にも埋め込んでおける.
+
+span は入れ子にでき (例: measure_fruit の中の collect_points), 内側の時間は外側の時間にも含まれる.
+各行には id, 外側の span の id (parent, 合計の行は id 0), 深さ (depth, 合計の行は 0, そのすぐ内側は 1) を付ける.
+処理ごとの時間を足し合わせるときは depth が 1 の行だけを足すか, parent で木をたどる.
+別のスレッドで始まった span は, そのとき Profiler のスレッドで開いている最も内側の span の子とする.
+
+出力先は Profiler の output 引数か環境変数 PEPPER_PROFILE で指定する.
+未指定, "" または "0" なら計測しない. "1" または "stdout" なら標準出力, それ以外はファイルに追記する.
+"""
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+PROFILE_ENV = "PEPPER_PROFILE"
+
+# 計測中の Profiler (なければ None)
+_active = None
+
+
+class Profiler:
+    """スクリプト 1 回分の処理時間を記録し, 終了時に JSON Lines で出力する"""
+
+    def __init__(self, name, output=None):
+        self.name = name
+        self.output = os.environ.get(PROFILE_ENV, "") if output is None else output
+        self.enabled = self.output not in ("", "0")
+        self.run_id = uuid.uuid4().hex[:8]
+        self.records = []
+        self._lock = threading.Lock()
+        self._previous = None
+        self._start = None
+        self._ids = itertools.count(1)
+        # 開いている span の (id, depth) の並び. Profiler を開始したスレッドは _main_stack, それ以外はスレッドごと
+        self._owner = None
+        self._main_stack = []
+        self._local = threading.local()
+
+    def __enter__(self):
+        global _active
+        if self.enabled:
+            self._previous = _active
+            _active = self
+            self._owner = threading.get_ident()
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        if self.enabled:
+            _active = self._previous
+            self._record("total", time.perf_counter() - self._start, {"error": exc_type.__name__} if exc_type else {}, 0, None, 0)
+            self.emit()
+        return False
+
+    def _record(self, stage, seconds, fields, span_id, parent, depth):
+        record = {"script": self.name, "run": self.run_id, "stage": stage, "ms": round(seconds * 1000, 3), "id": span_id, "parent": parent, "depth": depth}
+        record.update(fields)
+        with self._lock:
+            self.records.append(record)
+
+    def _stack(self):
+        """このスレッドで開いている span の並び"""
+        if threading.get_ident() == self._owner:
+            return self._main_stack
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, stage, **fields):
+        """囲んだ処理の時間を stage として記録する. 返す dict に値を入れると一緒に出力する"""
+        stack = self._stack()
+        # このスレッドで開いている span がなければ, Profiler のスレッドで開いている span の中にあるとみなす
+        outer = stack or self._main_stack
+        parent, parent_depth = outer[-1] if outer else (0, 0)
+        span_id = next(self._ids)
+        stack.append((span_id, parent_depth + 1))
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            stack.pop()
+            self._record(stage, time.perf_counter() - start, fields, span_id, parent, parent_depth + 1)
+
+    def emit(self):
+        """記録を JSON Lines で出力する"""
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=float) + "\n" for record in self.records)
+        if self.output in ("1", "stdout"):
+            print(lines, end="")
+        else:
+            with open(self.output, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+def span(stage, **fields):
+    """計測中の Profiler があれば stage の時間を記録する. なければ何もしない"""
+    profiler = _active
+    if profiler is None:
+        return contextlib.nullcontext(fields)
+    return profiler.span(stage, **fields)
@@ -0,0 +1,28 @@
+"""平面に平行な薄い層 (スラブ) に入る頂点の選択
+
+基準点を通り法線 normal に垂直な平面からの距離が tolerance 未満の頂点を NumPy で判定する.
+法線は座標軸 ("x", "y", "z") か任意の方向のベクトルで指定する.
+選択状態は mesh_access.write_vertex_selection で foreach_set により書き込み, BMesh は作らない.
+"""
+import numpy as np
+
+# 軸の名前とインデックス
+AXES = {"x": 0, "y": 1, "z": 2}
+
+
+def slab_mask(coords, point, normal, tolerance, slab_index=None):
+    """point を通り normal に垂直な平面からの距離が tolerance 未満の頂点を True にした配列を返す
+
+    normal に軸 ("x", "y", "z" または 0, 1, 2) を指定した場合はその座標の差で判定し,
+    同じ軸の SlabIndex を渡せば索引から取り出す. ベクトルを指定した場合は正規化して距離を求める.
+    """
+    if isinstance(normal, (str, int, np.integer)):
+        axis = AXES[normal.lower()] if isinstance(normal, str) else int(normal)
+        if slab_index is not None and slab_index.axis == axis:
+            return slab_index.query_mask(point[axis], tolerance)
+        return np.abs(coords[:, axis] - np.float32(point[axis])) < tolerance
+
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    offset = coords.astype(np.float64) - np.asarray(point, dtype=np.float64)
+    return np.abs(offset @ normal) < tolerance
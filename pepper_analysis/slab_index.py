@@ -0,0 +1,62 @@
+"""高さ方向にソートした頂点の索引
+
+頂点を 1 つの軸 (通常は Z) の座標でソートしておき, 指定した高さ ± 許容誤差の
+範囲 (スラブ) にある頂点を searchsorted で O(log N + k) で取り出す.
+索引はメッシュごとに 1 度だけ作り, 同じ高さへの複数回の問い合わせで使い回す.
+"""
+import numpy as np
+
+
+class SlabIndex:
+    """座標配列を axis 方向でソートした索引"""
+
+    def __init__(self, coords, axis=2):
+        self.coords = coords
+        self.axis = axis
+        self.order = np.argsort(coords[:, axis], kind="stable")
+        self.sorted_values = np.ascontiguousarray(coords[self.order, axis])
+
+    @classmethod
+    def from_arrays(cls, coords, order, sorted_values, axis=2):
+        """作成済みのソート結果から索引を作る (共有メモリ上の配列をそのまま使う場合など)"""
+        index = cls.__new__(cls)
+        index.coords = coords
+        index.axis = axis
+        index.order = order
+        index.sorted_values = sorted_values
+        return index
+
+    def __len__(self):
+        return len(self.order)
+
+    def query(self, target, tolerance):
+        """|座標 - target| < tolerance を満たす頂点のインデックスを返す"""
+        target = np.float32(target)
+
+        # 丸め誤差を考慮して少し広めに二分探索し, 範囲内だけ厳密に判定する
+        margin = tolerance * 1e-3
+        lo = np.searchsorted(self.sorted_values, target - tolerance - margin, side="left")
+        hi = np.searchsorted(self.sorted_values, target + tolerance + margin, side="right")
+        candidates = self.order[lo:hi]
+        inside = np.abs(self.sorted_values[lo:hi] - target) < tolerance
+        return candidates[inside]
+
+    def query_mask(self, target, tolerance):
+        """query の結果を全頂点分の bool 配列で返す"""
+        mask = np.zeros(len(self.order), dtype=bool)
+        mask[self.query(target, tolerance)] = True
+        return mask
+
+
+# メッシュ名と軸ごとに作成済みの索引を保持する (Blender 上ではスクリプトを再実行しても残る)
+_index_cache = {}
+
+
+def get_slab_index(name, coords, axis=2):
+    """作成済みの索引を返す. 頂点座標が変わっていれば作り直す"""
+    key = (name, axis)
+    index = _index_cache.get(key)
+    if index is None or not np.array_equal(index.coords, coords):
+        index = SlabIndex(coords, axis=axis)
+        _index_cache[key] = index
+    return index
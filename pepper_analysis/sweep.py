@@ -0,0 +1,43 @@
+"""果実の高さ方向に断面を重ねて障害物距離を計測する
+
+基準点の高さの前後に複数の断面 (スラブ) を取り, 断面ごとに中心推定と全周の
+クリアランス計算を行って (高さ × 方向) の表を作る. 高さ方向の索引は全断面で共有する.
+断面ごとの処理は NumPy / OpenCV の中で GIL を解放するので, スレッドで並列に実行する.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pepper_analysis.pipeline import CORRECT_PARAM, TOLERANCE, clearance_profile, estimate_circle
+
+
+def slice_heights(base_z, sweep_height, sweep_step):
+    """base_z を中心に高さ sweep_height の範囲を sweep_step 間隔で分けた断面の高さを返す"""
+    half = int(round(sweep_height / 2 / sweep_step))
+    return base_z + np.arange(-half, half + 1) * sweep_step
+
+
+def _measure_slice(z_index, base_point, target_z, kdtree, num_angles, tolerance, correct_param, circle_params):
+    world_circle = estimate_circle(z_index, base_point, target_z, kdtree=kdtree, tolerance=tolerance, **circle_params)
+    if world_circle is None:
+        return None, np.full(num_angles, np.nan)
+    _, clearance = clearance_profile(z_index, world_circle, target_z, num_angles=num_angles, tolerance=tolerance, correct_param=correct_param)
+    return world_circle, clearance
+
+
+def height_sweep(z_index, base_point, heights, kdtree=None, num_angles=360, max_workers=None, tolerance=TOLERANCE, correct_param=CORRECT_PARAM, **circle_params):
+    """各高さ heights の断面で中心推定と全周のクリアランス計算を行う
+
+    circle_params は pipeline.estimate_circle のキーワード引数 (distance_threshold, dp など).
+    (angles [rad], circles, clearance) を返す. circles は断面ごとの world_circle (求まらなければ None),
+    clearance は (断面数, num_angles) の配列で, 円が求まらなかった断面の行は NaN, 障害物がない方向は inf.
+    """
+    base_point = np.asarray(base_point, dtype=np.float64)
+    angles = np.arange(num_angles) * (2 * np.pi / num_angles)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda z: _measure_slice(z_index, base_point, z, kdtree, num_angles, tolerance, correct_param, circle_params), heights))
+
+    circles = [world_circle for world_circle, _ in results]
+    clearance = np.vstack([row for _, row in results]) if results else np.empty((0, num_angles))
+    return angles, circles, clearance
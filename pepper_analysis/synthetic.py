@@ -0,0 +1,240 @@
+"""ピーマンの株に見立てた合成メッシュの生成 (ベンチマーク・精度評価用)
+
+主茎と果柄 (細い円柱), 果実 (中心と半径が既知の円柱), 葉 (凹凸とノイズのある四角形のシート),
+小さな破片 (1 面だけの孤立した四角形) を四角形の面でつないだメッシュを作る.
+頂点数はおおよそ n_vertices になるように各部品に割り振るので, 1 万 〜 1000 万頂点まで同じ形で大きさだけ変えられる.
+Blender は使わず, 頂点座標と面は NumPy 配列で返す.
+"""
+import numpy as np
+
+# 部品ごとの頂点数の割合
+FRUIT_SHARE = 0.35
+STEM_SHARE = 0.15
+LEAF_SHARE = 0.45 # 残り (約 0.05) は破片
+DEBRIS_VERTICES = 4 # 破片 1 個あたりの頂点数 (四角形 1 面)
+# 株の形 [m]
+PLANT_HEIGHT = 0.6
+STEM_RADIUS = 0.005
+PEDUNCLE_RADIUS = 0.003
+FRUIT_RADIUS = (0.015, 0.022)
+FRUIT_LENGTH = (0.06, 0.1)
+FRUIT_DISTANCE = (0.06, 0.09) # 主茎の中心から果実の中心までの水平距離
+LEAF_LENGTH = (0.08, 0.15)
+LEAF_WIDTH = (0.03, 0.06)
+LEAVES_PER_FRUIT = 3
+# make_plant(enclosure=True) で株を囲む円筒
+ENCLOSURE_RADIUS = 0.25 # [m] 葉や破片より外側
+ENCLOSURE_VERTICES = 5000 # 頂点の間隔が約 14 mm (スラブの幅 20 mm, 果実の直径 30 mm 以上より細かい)
+# make_slices の断面
+SLICE_SPACING = 0.1 # [m] 断面を置く高さの間隔 (スラブの許容誤差より十分大きくする)
+SLICE_POINTS = (100, 600) # 果実の断面の点の数の範囲
+SLICE_VISIBLE_ARC = (0.5, 1.0) # スキャンで見えている円周の割合の範囲
+SLICE_CLUTTER = 200 # 葉・茎の点の数
+
+
+class SyntheticPlant:
+    """make_plant / make_slices で作ったメッシュと果実の正解値
+
+    coords は (N, 3) の float32, faces は四角形の頂点のインデックス (F, 4) の int32.
+    fruit_centers (K, 2), fruit_radii (K,), fruit_z (K, 2) は果実の軸の XY 座標, 半径, 高さの範囲.
+    seed_points (K, 3) は果実の高さの中央で, 中心から seed_angles (K,) [rad] の方向 (ランダム) の表面に置いた基準点.
+    """
+
+    def __init__(self, coords, faces, fruit_centers, fruit_radii, fruit_z, seed_points, seed_angles):
+        self.coords = coords
+        self.faces = faces
+        self.fruit_centers = fruit_centers
+        self.fruit_radii = fruit_radii
+        self.fruit_z = fruit_z
+        self.seed_points = seed_points
+        self.seed_angles = seed_angles
+
+    def __len__(self):
+        return len(self.coords)
+
+    def surface_point(self, fruit, angle):
+        """果実 fruit の高さの中央で, 中心から angle [rad] の方向の表面の点 (3,) を返す"""
+        center = self.fruit_centers[fruit]
+        radius = self.fruit_radii[fruit]
+        z = self.fruit_z[fruit].mean()
+        return np.array([center[0] + radius * np.cos(angle), center[1] + radius * np.sin(angle), z])
+
+    def nearest_vertex(self, point):
+        """point に最も近い頂点のインデックスを返す"""
+        return int(np.argmin(np.linalg.norm(self.coords - np.asarray(point, dtype=np.float32), axis=1)))
+
+    def polygon_edges(self):
+        """(各ループの面のインデックス, 各ループの辺のインデックス, 辺の数) を返す (islands.polygon_islands 用)"""
+        a = self.faces
+        b = np.roll(self.faces, -1, axis=1)
+        pairs = np.stack([np.minimum(a, b), np.maximum(a, b)], axis=-1).reshape(-1, 2).astype(np.int64)
+        keys = pairs[:, 0] * len(self.coords) + pairs[:, 1]
+        unique_keys, edge_index = np.unique(keys, return_inverse=True)
+        polygon_index = np.repeat(np.arange(len(self.faces)), self.faces.shape[1])
+        return polygon_index, edge_index.reshape(-1), len(unique_keys)
+
+
+def _grid_faces(rows, cols, wrap=False):
+    """rows × cols の格子に並べた頂点をつなぐ四角形の面を返す. wrap なら各行の末尾と先頭もつなぐ"""
+    spans = cols if wrap else cols - 1
+    r = np.arange(rows - 1)[:, None] * cols
+    k = np.arange(spans)[None, :]
+    a = r + k
+    b = r + (k + 1) % cols
+    return np.stack([a, b, b + cols, a + cols], axis=-1).reshape(-1, 4)
+
+
+def _tube(rng, start, end, radius, n, noise):
+    """start から end までの半径 radius の円柱 (側面のみ) の頂点と面を返す"""
+    start = np.asarray(start, dtype=np.float64)
+    axis = np.asarray(end, dtype=np.float64) - start
+    length = np.linalg.norm(axis)
+    axis /= length
+    # 軸に垂直な 2 方向
+    helper = np.array([1.0, 0.0, 0.0]) if abs(axis[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+    u = np.cross(axis, helper)
+    u /= np.linalg.norm(u)
+    v = np.cross(axis, u)
+
+    # 円周方向と軸方向の頂点の間隔がそろうように分割する
+    segments = int(np.clip(np.sqrt(n * 2 * np.pi * radius / length), 8, n // 2))
+    rings = max(2, n // segments)
+    t = np.arange(segments) * (2 * np.pi / segments)
+    h = np.linspace(0.0, length, rings)
+    ring = radius * (np.cos(t)[:, None] * u + np.sin(t)[:, None] * v)
+    points = (start + h[:, None, None] * axis + ring[None, :, :]).reshape(-1, 3)
+    points += rng.normal(0.0, noise, points.shape)
+    return points, _grid_faces(rings, segments, wrap=True)
+
+
+def _leaf(rng, origin, direction, length, width, n, noise):
+    """origin から direction の方向に伸びる, 反りと凹凸のある葉のシートの頂点と面を返す"""
+    direction = np.asarray(direction, dtype=np.float64)
+    direction /= np.linalg.norm(direction)
+    side = np.cross(direction, [0.0, 0.0, 1.0])
+    side /= np.linalg.norm(side)
+    normal = np.cross(side, direction)
+
+    cols = max(2, int(np.sqrt(n * width / length)))
+    rows = max(2, n // cols)
+    s = np.linspace(0.0, 1.0, rows)[:, None]
+    w = np.linspace(-0.5, 0.5, cols)[None, :]
+    # 先端ほど細く, 垂れ下がり, 表面に細かい凹凸がある
+    half_width = np.sin(np.pi * np.clip(s, 0.05, 1.0)) * width
+    bend = -0.3 * length * s ** 2 + 0.002 * np.sin(40 * s) * np.cos(25 * w)
+    points = (origin
+              + (s * length)[..., None] * direction
+              + (w * half_width)[..., None] * side
+              + bend[..., None] * normal).reshape(-1, 3)
+    points += rng.normal(0.0, noise, points.shape)
+    return points, _grid_faces(rows, cols)
+
+
+def make_plant(n_vertices=100000, num_fruits=4, seed=0, noise=0.0005, enclosure=False):
+    """頂点数がおおよそ n_vertices の株のメッシュを作り, SyntheticPlant を返す
+
+    同じ seed なら同じ形になり, n_vertices を変えても部品の配置は変わらない (分割の細かさだけが変わる).
+    enclosure=True なら株を囲む円筒 (ENCLOSURE_VERTICES 頂点) を最後に加え, どの果実からどの方向を見ても
+    障害物があるようにする (障害物のない方向があると止まる元のスクリプトと比べるときに使う). 株の部分は変わらない.
+    """
+    layout = np.random.default_rng(seed)
+    rng = np.random.default_rng([seed, n_vertices])
+    parts = []
+
+    # 主茎
+    num_leaves = LEAVES_PER_FRUIT * num_fruits
+    stem_vertices = int(n_vertices * STEM_SHARE)
+    parts.append(_tube(rng, [0.0, 0.0, 0.0], [0.0, 0.0, PLANT_HEIGHT], STEM_RADIUS, stem_vertices // 2, noise))
+
+    # 果実と果柄
+    fruit_vertices = int(n_vertices * FRUIT_SHARE) // num_fruits
+    peduncle_vertices = stem_vertices // 2 // num_fruits
+    fruit_centers = np.empty((num_fruits, 2))
+    fruit_radii = np.empty(num_fruits)
+    fruit_z = np.empty((num_fruits, 2))
+    seed_points = np.empty((num_fruits, 3))
+    seed_angles = np.empty(num_fruits)
+    for i in range(num_fruits):
+        angle = 2 * np.pi * i / num_fruits + layout.uniform(-0.3, 0.3)
+        distance = layout.uniform(*FRUIT_DISTANCE)
+        center = distance * np.array([np.cos(angle), np.sin(angle)])
+        radius = layout.uniform(*FRUIT_RADIUS)
+        fruit_length = layout.uniform(*FRUIT_LENGTH)
+        top = layout.uniform(0.2, PLANT_HEIGHT - 0.05)
+        bottom = top - fruit_length
+
+        parts.append(_tube(rng, [center[0], center[1], bottom], [center[0], center[1], top], radius, fruit_vertices, noise))
+        parts.append(_tube(rng, [0.0, 0.0, top + 0.03], [center[0], center[1], top], PEDUNCLE_RADIUS, peduncle_vertices, noise))
+
+        fruit_centers[i] = center
+        fruit_radii[i] = radius
+        fruit_z[i] = bottom, top
+        # 果実の表面のランダムな方向 (実際にクリックする位置のように方向を偏らせない)
+        seed_angles[i] = layout.uniform(0, 2 * np.pi)
+        seed_points[i, :2] = center + radius * np.array([np.cos(seed_angles[i]), np.sin(seed_angles[i])])
+        seed_points[i, 2] = (bottom + top) / 2
+
+    # 葉
+    leaf_vertices = int(n_vertices * LEAF_SHARE) // num_leaves
+    for _ in range(num_leaves):
+        angle = layout.uniform(0, 2 * np.pi)
+        z = layout.uniform(0.1, PLANT_HEIGHT)
+        direction = [np.cos(angle), np.sin(angle), layout.uniform(-0.2, 0.6)]
+        origin = [STEM_RADIUS * np.cos(angle), STEM_RADIUS * np.sin(angle), z]
+        parts.append(_leaf(rng, origin, direction, layout.uniform(*LEAF_LENGTH), layout.uniform(*LEAF_WIDTH), leaf_vertices, noise))
+
+    # 破片 (小さな孤立した四角形)
+    used = sum(len(points) for points, _ in parts)
+    num_debris = max(0, n_vertices - used) // DEBRIS_VERTICES
+    if num_debris:
+        centers = rng.uniform([-0.15, -0.15, 0.0], [0.15, 0.15, PLANT_HEIGHT], (num_debris, 1, 3))
+        corners = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=np.float64) * 0.002
+        points = (centers + corners + rng.normal(0.0, noise, (num_debris, DEBRIS_VERTICES, 3))).reshape(-1, 3)
+        faces = np.arange(num_debris * DEBRIS_VERTICES).reshape(-1, 4)
+        parts.append((points, faces))
+
+    # 株を囲む円筒
+    if enclosure:
+        parts.append(_tube(rng, [0.0, 0.0, 0.0], [0.0, 0.0, PLANT_HEIGHT], ENCLOSURE_RADIUS, ENCLOSURE_VERTICES, noise))
+
+    # 部品をつなげる (面のインデックスを部品の先頭の位置だけずらす)
+    offsets = np.cumsum([0] + [len(points) for points, _ in parts])
+    coords = np.concatenate([points for points, _ in parts]).astype(np.float32)
+    faces = np.concatenate([faces + offset for (_, faces), offset in zip(parts, offsets)]).astype(np.int32)
+    return SyntheticPlant(coords, faces, fruit_centers, fruit_radii, fruit_z, seed_points, seed_angles)
+
+
+def make_slices(num_slices=1000, seed=0, noise=0.0005):
+    """果実の断面 (一部が欠けたノイズ付きの円周と, 近くの葉・茎の点) を num_slices 個作り, SyntheticPlant を返す
+
+    断面 i は高さ i * SLICE_SPACING に置き, 中心は XY の原点の近く. 面は持たない (faces は空).
+    seed_points は make_plant と同じく中心からランダムな方向の表面に置く. 中心推定の精度評価に使う.
+    """
+    rng = np.random.default_rng(seed)
+    fruit_centers = rng.uniform(-0.005, 0.005, (num_slices, 2))
+    fruit_radii = rng.uniform(*FRUIT_RADIUS, num_slices)
+    z = np.arange(num_slices) * SLICE_SPACING
+    parts = []
+    for center, radius, height in zip(fruit_centers, fruit_radii, z):
+        # 果実の断面 (見えている円弧)
+        n = rng.integers(*SLICE_POINTS)
+        t = rng.uniform(0, 2 * np.pi) + rng.uniform(0, 2 * np.pi * rng.uniform(*SLICE_VISIBLE_ARC), n)
+        ring = center + radius * np.column_stack([np.cos(t), np.sin(t)])
+
+        # 葉 (果実の外を通る線分) と茎 (果実の横の小さな塊)
+        leaf_start = center + rng.uniform(-2, 2, 2) * radius
+        leaf = leaf_start + rng.uniform(0, 1, (SLICE_CLUTTER, 1)) * rng.normal(0, radius, 2)
+        stem_angle = rng.uniform(0, 2 * np.pi)
+        stem_center = center + (radius + rng.uniform(0.005, 0.02)) * np.array([np.cos(stem_angle), np.sin(stem_angle)])
+        stem = stem_center + rng.normal(0, STEM_RADIUS / 2, (SLICE_CLUTTER // 4, 2))
+
+        points = np.vstack([ring, leaf, stem])
+        points += rng.normal(0.0, noise, points.shape)
+        heights = height + rng.uniform(-0.004, 0.004, (len(points), 1))
+        parts.append(np.hstack([points, heights]))
+
+    coords = np.concatenate(parts).astype(np.float32)
+    seed_angles = rng.uniform(0, 2 * np.pi, num_slices)
+    seed_offsets = fruit_radii[:, None] * np.column_stack([np.cos(seed_angles), np.sin(seed_angles)])
+    seed_points = np.column_stack([fruit_centers + seed_offsets, z])
+    return SyntheticPlant(coords, np.empty((0, 4), dtype=np.int32), fruit_centers, fruit_radii, np.column_stack([z, z]), seed_points, seed_angles)
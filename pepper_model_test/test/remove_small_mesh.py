@@ -1,5 +1,11 @@
 import bpy
 import bmesh
+import numpy as np
+import sys
+
+LIB_PATH = "c:/Users/hikou/OneDrive/ドキュメント/Blender/blender_scripts" # pepper_analysis パッケージがあるディレクトリ
+sys.path.append(LIB_PATH)
+from pepper_analysis.islands import face_islands
 
 # --- 設定 ---
 # この数以下のポリゴン数で構成される、リンクしたメッシュの塊を削除します
@@ -23,59 +29,30 @@ def remove_small_islands():
         print("メッシュオブジェクトを選択してください。")
         return
 
-    # BMeshを作成してメッシュデータを取得
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-    bm.verts.ensure_lookup_table()
-    bm.edges.ensure_lookup_table()
-    bm.faces.ensure_lookup_table()
+    # 辺でつながった面のアイランドを配列でまとめて求める（面ごとのラベルとアイランドごとの面の数）
+    labels, island_sizes = face_islands(obj.data)
 
-    # すべての面を「未訪問」としてセットアップ
-    unvisited_faces = set(bm.faces)
-    faces_to_delete = []
+    # 面の数がしきい値以下のアイランドに属する面
+    faces_to_delete = np.flatnonzero(island_sizes[labels] <= THRESHOLD)
 
-    # 未訪問の面がなくなるまでループ
-    while unvisited_faces:
-        # ランダムに開始面を取得
-        start_face = unvisited_faces.pop()
-        
-        # 連結している面のグループ（アイランド）を探す
-        island = {start_face}
-        # これからチェックする面のリスト
-        faces_to_check = [start_face]
-        
-        while faces_to_check:
-            current_face = faces_to_check.pop()
-            
-            # 現在の面にリンクしているすべての面をループ
-            for edge in current_face.edges:
-                for linked_face in edge.link_faces:
-                    # まだ訪問しておらず、アイランドにも含まれていない面なら追加
-                    if linked_face in unvisited_faces and linked_face not in island:
-                        unvisited_faces.remove(linked_face)
-                        island.add(linked_face)
-                        faces_to_check.append(linked_face)
-        
-        # 見つかったアイランドのポリゴン数がしきい値以下かチェック
-        if len(island) <= THRESHOLD:
-            # 削除リストに追加
-            faces_to_delete.extend(list(island))
+    if faces_to_delete.size:
+        print(f"{faces_to_delete.size} 個の面を削除します...")
+        # BMeshで面を一括削除
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        bmesh.ops.delete(bm, geom=[bm.faces[i] for i in faces_to_delete.tolist()], context='FACES')
 
-    if faces_to_delete:
-        print(f"{len(faces_to_delete)} 個の面を削除します...")
-        # BMeshで面を削除
-        bmesh.ops.delete(bm, geom=faces_to_delete, context='FACES')
-        
         # メッシュデータを更新
         bm.to_mesh(obj.data)
         obj.data.update()
         print("削除が完了しました。")
+
+        # BMeshを解放
+        bm.free()
     else:
         print("削除対象の面は見つかりませんでした。")
-        
-    # BMeshを解放
-    bm.free()
-    
+
     # 編集モードに戻る
     bpy.ops.object.mode_set(mode='EDIT')
 
@@ -0,0 +1,76 @@
+"""中心推定のワールド座標を synthetic.make_plant の正解と比べる
+
+投影画像は反転・回転 (または反転だけ) しているので, 画像から求めた中心をワールド座標に戻すときに
+x, y を取り違えると, 基準点が果実の中心から 0°, 90°, ... の方向にあるときに半径の √2 倍ほどずれる.
+パイプラインの各方法と, 結果を表示するスクリプトの両方を確かめる.
+"""
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin, disk_cache
+from pepper_analysis.pipeline import estimate_circle
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_plant
+
+SCRIPTS = [
+    "0729_nouken_analysis/script/center_point_estimation.py",
+    "0729_nouken_analysis/script/peduncle_center_point_estimation.py",
+    "0729_nouken_analysis/script/obst_dist_measure_angle.py",
+]
+SEED_ANGLES = [0, 90, 180, 270] # [degree] 果実の中心から見た基準点の方向 (x, y を取り違えると大きくずれる方向)
+MAX_ERROR = 0.008 # [m] 中心の誤差の上限 (取り違えたときの誤差は半径の √2 倍で 20 mm 以上)
+CENTER_PATTERN = re.compile(r"x= (\S+) \[mm\], y= (\S+) \[mm\], r= (\S+) \[mm\]")
+
+
+@pytest.fixture(scope="module")
+def plant():
+    return make_plant(20000)
+
+
+def seed_cases(plant):
+    return [(fruit, angle) for fruit in range(len(plant.fruit_centers)) for angle in SEED_ANGLES]
+
+
+@pytest.mark.parametrize("method", ["hough", "pyramid", "ransac"])
+def test_pipeline_center_matches_ground_truth(plant, method):
+    z_index = SlabIndex(plant.coords, axis=2)
+    for fruit, angle in seed_cases(plant):
+        seed_point = plant.coords[plant.nearest_vertex(plant.surface_point(fruit, np.radians(angle)))].astype(np.float64)
+        with contextlib.redirect_stdout(io.StringIO()):
+            circle = estimate_circle(z_index, seed_point, seed_point[2], method=method)
+        assert circle is not None, (fruit, angle)
+        error = np.hypot(circle[0] - plant.fruit_centers[fruit, 0], circle[1] - plant.fruit_centers[fruit, 1])
+        assert error < MAX_ERROR, (fruit, angle, error)
+
+
+@pytest.mark.parametrize("path", SCRIPTS)
+def test_script_center_matches_ground_truth(monkeypatch, tmp_path, plant, path):
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", str(tmp_path))
+    # スクリプトが書き出す画像は tmp_path に置く
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    blender_standin.install()
+    try:
+        for fruit, angle in seed_cases(plant):
+            seed_vertex = plant.nearest_vertex(plant.surface_point(fruit, np.radians(angle)))
+            blender_standin.new_mesh_object("Plant", plant.coords, plant.faces, select=[seed_vertex], select_history=[seed_vertex])
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                blender_standin.run_script(os.path.join(ROOT, path))
+            found = CENTER_PATTERN.findall(output.getvalue())
+            assert found, (fruit, angle, output.getvalue())
+            x, y, _ = (float(value) / 1000 for value in found[-1])
+            error = np.hypot(x - plant.fruit_centers[fruit, 0], y - plant.fruit_centers[fruit, 1])
+            assert error < MAX_ERROR, (fruit, angle, error)
+    finally:
+        blender_standin.uninstall()
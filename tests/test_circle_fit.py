@@ -0,0 +1,40 @@
+"""circle_fitting_batch が点群ごとの circle_fitting と同じ円を返すことを確かめる"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import circle_fit
+from pepper_analysis.circle_fit import circle_fitting, circle_fitting_batch
+
+
+def point_sets(seed=0, num_sets=200):
+    """円弧の一部にノイズを加えた点群 (点の数はばらばら) と, 解けない点群 (点が少ない, 一直線, 1 点に重なる)"""
+    rng = np.random.default_rng(seed)
+    sets = []
+    for _ in range(num_sets):
+        n = int(rng.integers(0, 200))
+        t = rng.uniform(0, rng.uniform(0.5, 2) * np.pi, n)
+        center = rng.uniform(-1, 1, 2)
+        radius = rng.uniform(0.01, 0.03)
+        sets.append(center + radius * np.column_stack([np.cos(t), np.sin(t)]) + rng.normal(0, 1e-4, (n, 2)))
+    sets.append(np.column_stack([np.linspace(0, 1, 10), np.linspace(0, 2, 10)]))
+    sets.append(np.ones((5, 2)))
+    sets.append(np.zeros((2, 2)))
+    return sets
+
+
+@pytest.mark.parametrize("max_rows", [64, circle_fit.MAX_BATCH_ROWS])
+def test_batch_matches_single_fit(monkeypatch, max_rows):
+    monkeypatch.setattr(circle_fit, "MAX_BATCH_ROWS", max_rows)
+    sets = point_sets()
+    offsets = np.concatenate([[0], np.cumsum([len(points) for points in sets])])
+
+    result = circle_fitting_batch(np.concatenate(sets), offsets)
+    expected = np.array([circle_fitting(points) or (np.nan, np.nan, np.nan) for points in sets])
+
+    np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
@@ -0,0 +1,115 @@
+"""crop の一括処理が元のスクリプトの頂点ごとのループと同じ頂点を切り抜くことを確かめる"""
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin, crop
+from pepper_analysis.blender_standin import bmesh
+from pepper_analysis.blender_standin.mathutils import Vector
+from pepper_analysis.mesh_access import read_vertex_coords
+from pepper_analysis.synthetic import make_plant
+
+CROP_DEPTH = 0.035 # [m] extract_points.py と同じ
+
+
+@pytest.fixture(scope="module")
+def plant():
+    return make_plant(5000)
+
+
+@pytest.fixture
+def standin():
+    blender_standin.install()
+    yield
+    blender_standin.uninstall()
+
+
+def original_behind(bm, base_vertex, angle, depth):
+    """元の extract_points.py のループで, 削除する頂点の BMVert のリストを返す"""
+    target_x = base_vertex.co.x
+    target_y = base_vertex.co.y
+    dir_vec = Vector((math.cos(angle), math.sin(angle)))
+    behind = []
+    for v in bm.verts:
+        vec = Vector((target_x - v.co.x, target_y - v.co.y))
+        distance = (vec.project(dir_vec)).length
+        if distance >= depth and vec.project(dir_vec).dot(dir_vec) > 0:
+            behind.append(v)
+    return behind
+
+
+@pytest.mark.parametrize("angle", [0, 45, 90, 200, 315])
+def test_behind_mask_matches_original_loop(standin, plant, angle):
+    mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.verts.ensure_lookup_table()
+    base = plant.nearest_vertex(plant.seed_points[0])
+    expected = np.zeros(len(plant), dtype=bool)
+    expected[[v.index for v in original_behind(bm, bm.verts[base], math.radians(angle), CROP_DEPTH)]] = True
+    bm.free()
+
+    actual = crop.behind_mask(plant.coords, plant.coords[base].astype(np.float64), math.radians(angle), CROP_DEPTH)
+    assert 0 < expected.sum() < len(plant)
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_delete_vertices_matches_original_loop(standin, plant):
+    base = plant.nearest_vertex(plant.seed_points[1])
+    mask = crop.behind_mask(plant.coords, plant.coords[base].astype(np.float64), 0.0, CROP_DEPTH)
+
+    # 元のスクリプトと同じく 1 頂点ずつ bm.verts.remove する
+    expected_mesh = blender_standin.new_mesh_object("Expected", plant.coords, plant.faces).data
+    bm = bmesh.new()
+    bm.from_mesh(expected_mesh)
+    bm.verts.ensure_lookup_table()
+    for v in [bm.verts[i] for i in np.flatnonzero(mask).tolist()]:
+        bm.verts.remove(v)
+    bm.to_mesh(expected_mesh)
+    bm.free()
+
+    mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data
+    assert crop.delete_vertices(mesh, mask) == mask.sum()
+    np.testing.assert_array_equal(read_vertex_coords(mesh), read_vertex_coords(expected_mesh))
+    assert len(mesh.polygons) == len(expected_mesh.polygons)
+    assert len(mesh.edges) == len(expected_mesh.edges)
+
+
+def element_flags(elements, name):
+    values = np.empty(len(elements), dtype=bool)
+    elements.foreach_get(name, values)
+    return values
+
+
+def test_hide_and_reveal_vertices(standin, plant):
+    mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces, select=np.ones(len(plant), dtype=bool)).data
+    base = plant.nearest_vertex(plant.seed_points[2])
+    mask = crop.behind_mask(plant.coords, plant.coords[base].astype(np.float64), 0.0, CROP_DEPTH)
+
+    assert crop.hide_vertices(mesh, mask) == mask.sum()
+    assert len(mesh.vertices) == len(plant)
+    np.testing.assert_array_equal(element_flags(mesh.vertices, "hide"), mask)
+    np.testing.assert_array_equal(element_flags(mesh.vertices, "select"), ~mask)
+    # 隠した頂点を 1 つでも含む辺と面も隠す
+    edge_vertices = np.empty(len(mesh.edges) * 2, dtype=np.int64)
+    mesh.edges.foreach_get("vertices", edge_vertices)
+    np.testing.assert_array_equal(element_flags(mesh.edges, "hide"), mask[edge_vertices].reshape(-1, 2).any(axis=1))
+    np.testing.assert_array_equal(element_flags(mesh.polygons, "hide"), mask[plant.faces].any(axis=1))
+    keep = np.empty(len(plant), dtype=bool)
+    mesh.attributes[crop.KEEP_ATTRIBUTE].data.foreach_get("value", keep)
+    np.testing.assert_array_equal(keep, ~mask)
+
+    # 範囲を変えて隠し直せる
+    narrower = crop.behind_mask(plant.coords, plant.coords[base].astype(np.float64), 0.0, 2 * CROP_DEPTH)
+    crop.hide_vertices(mesh, narrower)
+    np.testing.assert_array_equal(element_flags(mesh.vertices, "hide"), narrower)
+
+    crop.reveal_vertices(mesh)
+    for elements in (mesh.vertices, mesh.edges, mesh.polygons):
+        assert not element_flags(elements, "hide").any()
+    assert mesh.attributes.get(crop.KEEP_ATTRIBUTE) is None
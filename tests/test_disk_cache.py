@@ -0,0 +1,57 @@
+"""disk_cache のキーが標本に入らない頂点の編集も検出し, 索引を保存・再利用することを確かめる"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin, disk_cache
+from pepper_analysis.synthetic import make_plant
+
+
+@pytest.fixture
+def standin(monkeypatch, tmp_path):
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(disk_cache, "_memory_cache", disk_cache.OrderedDict())
+    blender_standin.install()
+    yield
+    blender_standin.uninstall()
+
+
+@pytest.fixture(scope="module")
+def plant():
+    return make_plant(10000)
+
+
+def test_key_changes_when_unsampled_vertex_moves(standin, plant):
+    sampled = set(disk_cache._sample_indices(len(plant)).tolist())
+    moved = next(i for i in range(len(plant)) if i not in sampled)
+    coords = plant.coords.copy()
+    coords[moved, 0] += 0.001
+
+    key, _, _ = disk_cache.load_mesh_cached("Plant", blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data)
+    edited_key, edited_coords, _ = disk_cache.load_mesh_cached("Plant", blender_standin.new_mesh_object("Plant", coords, plant.faces).data)
+
+    assert edited_key != key
+    np.testing.assert_array_equal(edited_coords, coords)
+
+
+def test_mesh_and_array_fingerprints_agree(standin, plant):
+    mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data
+    assert disk_cache.mesh_fingerprint("Plant", mesh) == disk_cache.array_fingerprint("Plant", plant.coords)
+
+
+def test_slab_index_is_saved_and_reused(standin, plant):
+    mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data
+    key, coords, _ = disk_cache.load_mesh_cached("Plant", mesh)
+    index = disk_cache.cached_slab_index(key, coords)
+    assert os.path.exists(disk_cache._entry_path(key, "order_2.npy"))
+
+    # メモリ上のキャッシュを捨てても, 保存した索引から同じ結果になる
+    disk_cache._memory_cache.clear()
+    key, coords, _ = disk_cache.load_mesh_cached("Plant", mesh)
+    reloaded = disk_cache.cached_slab_index(key, coords)
+    assert reloaded is not index
+    np.testing.assert_array_equal(reloaded.order, index.order)
@@ -0,0 +1,72 @@
+"""アイランドの検出で, scipy と NumPy の union-find が同じ分割を返すことを確かめる"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin, islands
+from pepper_analysis.synthetic import make_plant
+
+
+def canonical(labels):
+    """ラベルを最初に現れた順の番号に付け替える (同じ分割なら同じ配列になる)"""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    return np.argsort(np.argsort(first))[inverse.reshape(-1)]
+
+
+@pytest.fixture(params=["scipy", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "scipy" and islands._csgraph_components is None:
+        pytest.skip("scipy がない")
+    if request.param == "numpy":
+        monkeypatch.setattr(islands, "_csgraph_components", None)
+    return request.param
+
+
+def random_graph(seed, n=2000, num_edges=1500):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, n, num_edges), rng.integers(0, n, num_edges)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_connected_components_match_between_backends(monkeypatch, seed):
+    if islands._csgraph_components is None:
+        pytest.skip("scipy がない")
+    a, b = random_graph(seed)
+    expected = canonical(islands.connected_components(2000, a, b))
+    monkeypatch.setattr(islands, "_csgraph_components", None)
+    actual = canonical(islands.connected_components(2000, a, b))
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_connected_components_small_graph(backend):
+    # 鎖 0-1-2, 3-4 と孤立した 5, 自己ループの 6
+    labels = islands.connected_components(7, [1, 2, 4, 6], [0, 1, 3, 6])
+    np.testing.assert_array_equal(canonical(labels), [0, 0, 0, 1, 1, 2, 3])
+
+
+def test_plant_islands(backend):
+    plant = make_plant(10000)
+    polygon_index, edge_index, n_edges = plant.polygon_edges()
+    labels, sizes = islands.polygon_islands(len(plant.faces), n_edges, polygon_index, edge_index)
+
+    # 部品 (茎, 果実, 果柄, 葉) と破片 (1 面ずつ) がそれぞれ 1 つのアイランドになる
+    num_debris = int((sizes == 1).sum())
+    assert len(sizes) == 1 + 2 * 4 + 3 * 4 + num_debris
+    assert sizes.sum() == len(plant.faces)
+
+
+def test_face_islands_reads_mesh(backend):
+    plant = make_plant(10000)
+    blender_standin.install()
+    try:
+        mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data
+        labels, sizes = islands.face_islands(mesh)
+    finally:
+        blender_standin.uninstall()
+    polygon_index, edge_index, n_edges = plant.polygon_edges()
+    expected, _ = islands.polygon_islands(len(plant.faces), n_edges, polygon_index, edge_index)
+    np.testing.assert_array_equal(canonical(labels), canonical(expected))
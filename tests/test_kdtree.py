@@ -0,0 +1,50 @@
+"""PointKDTree.query_cylinder が全頂点を調べた円柱内の頂点と同じになることを確かめる (バックエンドごと)"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import kdtree
+from pepper_analysis.blender_standin.mathutils.kdtree import KDTree as StandinKDTree
+from pepper_analysis.synthetic import make_plant
+
+
+@pytest.fixture(scope="module")
+def plant():
+    return make_plant(20000)
+
+
+@pytest.fixture(params=["mathutils", "scipy", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "scipy" and kdtree._ScipyKDTree is None:
+        pytest.skip("scipy がない")
+    monkeypatch.setattr(kdtree, "_BlenderKDTree", StandinKDTree if request.param == "mathutils" else None)
+    if request.param == "numpy":
+        monkeypatch.setattr(kdtree, "_ScipyKDTree", None)
+    return request.param
+
+
+def brute_force_cylinder(coords, center, radius, tolerance, axis):
+    plane = [i for i in range(3) if i != axis]
+    in_slab = np.abs(coords[:, axis] - np.float32(center[axis])) < tolerance
+    offset = coords[:, plane].astype(np.float64) - np.asarray(center, dtype=np.float64)[plane]
+    return np.flatnonzero(in_slab & (np.hypot(offset[:, 0], offset[:, 1]) < radius))
+
+
+@pytest.mark.parametrize("axis", [0, 2])
+def test_query_cylinder_matches_brute_force(plant, backend, axis):
+    tree = kdtree.PointKDTree(plant.coords)
+    assert tree.backend == backend
+    for center in plant.seed_points:
+        for radius, tolerance in ((0.05, 0.01), (0.01, 0.05), (0.2, 0.001)):
+            expected = brute_force_cylinder(plant.coords, center, radius, tolerance, axis)
+            assert len(expected) > 0
+            np.testing.assert_array_equal(np.sort(tree.query_cylinder(center, radius, tolerance, axis=axis)), expected)
+
+
+def test_empty_cylinder(plant, backend):
+    tree = kdtree.PointKDTree(plant.coords)
+    assert len(tree.query_cylinder([10.0, 10.0, 10.0], 0.05, 0.01)) == 0
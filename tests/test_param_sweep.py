@@ -0,0 +1,41 @@
+"""param_sweep の使い回しがパイプラインと同じ結果を返し, 呼び出し側の書き換えで壊れないことを確かめる"""
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis.param_sweep import SliceSweep
+from pepper_analysis.pipeline import estimate_circle
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_plant
+
+
+@pytest.fixture(scope="module")
+def slice_sweep():
+    plant = make_plant(20000)
+    return SliceSweep(SlabIndex(plant.coords, axis=2), plant.seed_points[0])
+
+
+def test_same_circle_as_pipeline(slice_sweep):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for param2 in (20, 30, 40):
+            expected = estimate_circle(slice_sweep.z_index, slice_sweep.base_point, slice_sweep.target_z, param2=param2)
+            assert slice_sweep.run(param2=param2) == expected
+    assert slice_sweep.reused["edges"] >= 2
+
+
+def test_results_are_not_shared_with_caller(slice_sweep):
+    first = slice_sweep.run()
+    first[0] = 1e9
+    assert slice_sweep.run()[0] != 1e9
+
+    for stage in ("points", "projection", "edges", "hough"):
+        for result in slice_sweep._cache[stage].values():
+            assert result is None or not result.flags.writeable, stage
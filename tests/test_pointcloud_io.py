@@ -0,0 +1,103 @@
+"""pointcloud_io で書き出した PLY / OBJ の頂点座標をそのまま読み戻せることを確かめる"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis.pointcloud_io import load_ply, load_point_cloud
+
+COORDS = np.random.default_rng(0).uniform(-1, 1, (50, 3)).astype(np.float32)
+
+
+def write_ply(path, file_format, properties, vertices, before=()):
+    """properties ([(名前, PLY の型, NumPy の型)]) の vertex 要素を持つ PLY を書く. before は vertex より前の要素 (名前, 個数, プロパティ)"""
+    lines = ["ply", f"format {file_format} 1.0", "comment test"]
+    for name, count, props in before:
+        lines.append(f"element {name} {count}")
+        lines += [f"property {ply_type} {prop}" for prop, ply_type, _ in props]
+    lines.append(f"element vertex {len(vertices)}")
+    lines += [f"property {ply_type} {name}" for name, ply_type, _ in properties]
+    lines.append("end_header")
+    header = ("\n".join(lines) + "\n").encode("ascii")
+
+    def body(props, rows):
+        if file_format == "ascii":
+            return "".join(" ".join(str(row[name]) for name, _, _ in props) + "\n" for row in rows).encode("ascii")
+        byte_order = "<" if file_format == "binary_little_endian" else ">"
+        return rows.astype([(name, byte_order + dtype) for name, _, dtype in props]).tobytes()
+
+    with open(path, "wb") as f:
+        f.write(header)
+        for _, count, props in before:
+            f.write(body(props, np.zeros(count, dtype=[(name, dtype) for name, _, dtype in props])))
+        f.write(body(properties, vertices))
+
+
+def structured(properties, coords):
+    """coords を properties の型の構造化配列の x, y, z に入れる (他のプロパティは 0)"""
+    rows = np.zeros(len(coords), dtype=[(name, dtype) for name, _, dtype in properties])
+    for i, axis in enumerate("xyz"):
+        rows[axis] = coords[:, i]
+    return rows
+
+
+XYZ_FLOAT = [("x", "float", "f4"), ("y", "float", "f4"), ("z", "float", "f4")]
+
+
+@pytest.mark.parametrize("file_format", ["binary_little_endian", "binary_big_endian", "ascii"])
+def test_float_xyz_round_trip(tmp_path, file_format):
+    path = str(tmp_path / "cloud.ply")
+    write_ply(path, file_format, XYZ_FLOAT, structured(XYZ_FLOAT, COORDS))
+
+    coords = load_ply(path)
+    assert coords.dtype == np.float32 and coords.shape == COORDS.shape
+    np.testing.assert_array_equal(coords, COORDS)
+
+
+def test_native_float_xyz_is_not_copied(tmp_path):
+    path = str(tmp_path / "cloud.ply")
+    native = "binary_little_endian" if sys.byteorder == "little" else "binary_big_endian"
+    write_ply(path, native, XYZ_FLOAT, structured(XYZ_FLOAT, COORDS))
+
+    coords = load_ply(path)
+    assert isinstance(coords.base, np.memmap) or isinstance(coords, np.memmap)
+    np.testing.assert_array_equal(coords, COORDS)
+
+
+@pytest.mark.parametrize("properties", [
+    # 大きさは float32 の x, y, z と同じ 12 バイトだが整数
+    [("x", "int", "i4"), ("y", "int", "i4"), ("z", "int", "i4")],
+    [("x", "double", "f8"), ("y", "double", "f8"), ("z", "double", "f8")],
+    [("nx", "float", "f4"), ("x", "float", "f4"), ("y", "float", "f4"), ("z", "float", "f4"), ("red", "uchar", "u1")],
+])
+@pytest.mark.parametrize("file_format", ["binary_little_endian", "binary_big_endian", "ascii"])
+def test_other_vertex_layouts_are_converted(tmp_path, file_format, properties):
+    expected = np.round(COORDS * 1000) if properties[0][2] == "i4" else COORDS
+    path = str(tmp_path / "cloud.ply")
+    write_ply(path, file_format, properties, structured(properties, expected))
+
+    coords = load_ply(path)
+    assert coords.dtype == np.float32
+    np.testing.assert_array_equal(coords, expected.astype(np.float32))
+
+
+@pytest.mark.parametrize("file_format", ["binary_little_endian", "binary_big_endian", "ascii"])
+def test_elements_before_vertex_are_skipped(tmp_path, file_format):
+    path = str(tmp_path / "cloud.ply")
+    camera = ("camera", 2, [("view_px", "float", "f4"), ("view_py", "float", "f4"), ("id", "short", "i2")])
+    write_ply(path, file_format, XYZ_FLOAT, structured(XYZ_FLOAT, COORDS), before=[camera])
+
+    np.testing.assert_array_equal(load_ply(path), COORDS)
+
+
+def test_obj_round_trip(tmp_path):
+    path = str(tmp_path / "cloud.obj")
+    with open(path, "w") as f:
+        f.write("# test\no cloud\n")
+        f.writelines(f"v {x!r} {y!r} {z!r}\n" for x, y, z in COORDS.tolist())
+        f.write("vn 0 0 1\nf 1 2 3\n")
+
+    np.testing.assert_array_equal(load_point_cloud(path), COORDS)
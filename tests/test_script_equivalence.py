@@ -0,0 +1,116 @@
+"""書き換える前のスクリプトと配列版が, 同じ合成メッシュに対して同じ結果を出力することを確かめる
+
+blender_standin で bpy, bmesh, mathutils を置き換え, 最初のコミットから取り出した元のスクリプトと
+現在のスクリプトを同じ選択状態で実行し, center_point_estimation.py は cv2.imwrite に渡された画像を,
+obst_dist_measure_angle.py は出力した中心と障害物距離を比べる. 元のスクリプトの既知の不具合は blender_standin.BASELINE_FIXES で直してから比べる.
+基準点は synthetic.make_plant のランダムな方向の seed_points.
+"""
+import contextlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin, disk_cache
+from pepper_analysis.synthetic import make_plant
+
+CENTER_SCRIPT = "0729_nouken_analysis/script/center_point_estimation.py"
+OBST_SCRIPT = "0729_nouken_analysis/script/obst_dist_measure_angle.py"
+# 元のスクリプトの使っていない import (配列版では削除済み)
+UNUSED_IMPORTS = ("import matplotlib.pyplot as plt",)
+# obst_dist_measure_angle.py が出力する中心と 4 方向の障害物距離 [mm]
+OBST_PATTERNS = [
+    re.compile(r"x= (\S+) \[mm\], y= (\S+) \[mm\], r= (\S+) \[mm\]"),
+    re.compile(r"left_obst_dist= (\S+) \[mm\]"),
+    re.compile(r"right_obst_dist= (\S+) \[mm\]"),
+    re.compile(r"front_obst_dist= (\S+) \[mm\]"),
+    re.compile(r"behind_obst_dist= (\S+) \[mm\]"),
+]
+OBST_TOLERANCE = 1e-3 # [mm] 元のスクリプトは mathutils (float32 の座標) で計算するので, わずかに値が違う
+
+
+def _has_git_history():
+    if shutil.which("git") is None:
+        return False
+    try:
+        blender_standin.baseline_revision(ROOT)
+    except subprocess.CalledProcessError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not _has_git_history(), reason="git の履歴がないため元のスクリプトを取り出せない")
+
+
+@pytest.fixture(scope="module")
+def plant():
+    # 元の obst_dist_measure_angle.py は障害物のない方向があると止まるので, 株を囲む円筒を加える
+    return make_plant(20000, enclosure=True)
+
+
+def run_and_capture(monkeypatch, tmp_path, plant, seed_vertex, path):
+    """スクリプトを実行し, (cv2.imwrite に渡された画像のリスト, 標準出力) を返す (画像は書かず, 一時ファイルは tmp_path に置く)"""
+    images = []
+    monkeypatch.setattr(cv2, "imwrite", lambda filename, image, *args: images.append(image.copy()) or True)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", str(tmp_path))
+    blender_standin.install()
+    blender_standin.new_mesh_object("Plant", plant.coords, plant.faces, select=[seed_vertex], select_history=[seed_vertex])
+    output = io.StringIO()
+    try:
+        with warnings.catch_warnings(), contextlib.redirect_stdout(output):
+            warnings.simplefilter("error", RuntimeWarning)
+            blender_standin.run_script(path)
+    finally:
+        blender_standin.uninstall()
+    return images, output.getvalue()
+
+
+def run_original_and_current(monkeypatch, tmp_path, plant, fruit, script, replace_lines):
+    """元のスクリプト (replace_lines の修正を当てる) と現在のスクリプトを同じ基準点で実行し, それぞれの結果を返す"""
+    seed_vertex = plant.nearest_vertex(plant.seed_points[fruit])
+    original = blender_standin.script_at_revision(ROOT, script, remove_lines=UNUSED_IMPORTS, replace_lines=replace_lines)
+    try:
+        expected = run_and_capture(monkeypatch, tmp_path, plant, seed_vertex, original)
+    finally:
+        os.remove(original)
+    actual = run_and_capture(monkeypatch, tmp_path, plant, seed_vertex, os.path.join(ROOT, script))
+    return expected, actual
+
+
+@pytest.mark.parametrize("fruit", [0, 1, 2, 3])
+def test_same_image_as_original(monkeypatch, tmp_path, plant, fruit):
+    (expected, expected_output), (actual, actual_output) = run_original_and_current(monkeypatch, tmp_path, plant, fruit, CENTER_SCRIPT, blender_standin.BASELINE_FIXES[CENTER_SCRIPT])
+
+    assert "No circles detected." not in expected_output + actual_output
+    assert len(actual) == len(expected) == 1
+    np.testing.assert_array_equal(actual[0], expected[0])
+
+
+def printed_values(output):
+    """obst_dist_measure_angle.py の出力から [x, y, r, left, right, front, behind] [mm] を取り出す"""
+    values = []
+    for pattern in OBST_PATTERNS:
+        found = pattern.findall(output)
+        assert found, (pattern.pattern, output)
+        last = found[-1]
+        values.extend(float(value) for value in (last if isinstance(last, tuple) else (last,)))
+    return values
+
+
+@pytest.mark.parametrize("fruit", [0, 1, 2, 3])
+def test_same_distances_as_original(monkeypatch, tmp_path, plant, fruit):
+    (_, expected_output), (_, actual_output) = run_original_and_current(monkeypatch, tmp_path, plant, fruit, OBST_SCRIPT, blender_standin.BASELINE_FIXES[OBST_SCRIPT])
+
+    np.testing.assert_allclose(printed_values(actual_output), printed_values(expected_output), rtol=0, atol=OBST_TOLERANCE)
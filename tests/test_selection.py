@@ -0,0 +1,64 @@
+"""selection.slab_mask が元のスクリプトの頂点ごとの判定と同じ頂点を選ぶことを確かめる"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis import blender_standin
+from pepper_analysis.blender_standin import bmesh
+from pepper_analysis.selection import slab_mask
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_plant
+
+TOLERANCES = [0.001, 0.01, 0.05] # [m]
+
+
+@pytest.fixture(scope="module")
+def plant():
+    return make_plant(10000)
+
+
+def original_slab(plant, base, axis, tolerance):
+    """元の select_vertices_at_same_height.py と同じく BMesh の頂点を 1 つずつ判定する"""
+    blender_standin.install()
+    try:
+        mesh = blender_standin.new_mesh_object("Plant", plant.coords, plant.faces).data
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bm.verts.ensure_lookup_table()
+        target = bm.verts[base].co[axis]
+        selected = np.array([abs(v.co[axis] - target) < tolerance for v in bm.verts])
+        bm.free()
+    finally:
+        blender_standin.uninstall()
+    return selected
+
+
+@pytest.mark.parametrize("normal, axis", [("z", 2), ("X", 0), (1, 1)])
+@pytest.mark.parametrize("tolerance", TOLERANCES)
+def test_axis_slab_matches_original_loop(plant, normal, axis, tolerance):
+    base = plant.nearest_vertex(plant.seed_points[0])
+    expected = original_slab(plant, base, axis, tolerance)
+    assert 0 < expected.sum() < len(plant)
+
+    np.testing.assert_array_equal(slab_mask(plant.coords, plant.coords[base], normal, tolerance), expected)
+    index = SlabIndex(plant.coords, axis=axis)
+    np.testing.assert_array_equal(slab_mask(plant.coords, plant.coords[base], normal, tolerance, slab_index=index), expected)
+
+
+def test_index_on_other_axis_is_ignored(plant):
+    point = plant.seed_points[1]
+    expected = slab_mask(plant.coords, point, "x", 0.01)
+    np.testing.assert_array_equal(slab_mask(plant.coords, point, "x", 0.01, slab_index=SlabIndex(plant.coords, axis=2)), expected)
+
+
+@pytest.mark.parametrize("normal", [(1.0, 1.0, 0.0), (0.3, -0.2, 2.0), (0.0, 0.0, 5.0)])
+def test_vector_slab_matches_brute_force(plant, normal):
+    point = plant.seed_points[2]
+    unit = np.asarray(normal) / np.linalg.norm(normal)
+    expected = np.array([abs(np.dot(co - point, unit)) < 0.01 for co in plant.coords.astype(np.float64)])
+    assert expected.any()
+    np.testing.assert_array_equal(slab_mask(plant.coords, point, normal, 0.01), expected)
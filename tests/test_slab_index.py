@@ -0,0 +1,54 @@
+"""SlabIndex の問い合わせが全頂点を調べた結果と同じになることを確かめる"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from pepper_analysis.mesh_access import collect_points_near_base
+from pepper_analysis.slab_index import SlabIndex
+from pepper_analysis.synthetic import make_plant
+
+TOLERANCES = [0.0005, 0.01, 0.1] # [m]
+
+
+@pytest.fixture(scope="module")
+def plant():
+    return make_plant(20000)
+
+
+def brute_force_mask(coords, axis, target, tolerance):
+    return np.abs(coords[:, axis] - np.float32(target)) < tolerance
+
+
+@pytest.mark.parametrize("axis", [0, 1, 2])
+@pytest.mark.parametrize("tolerance", TOLERANCES)
+def test_query_matches_brute_force(plant, axis, tolerance):
+    index = SlabIndex(plant.coords, axis=axis)
+    values = plant.coords[:, axis]
+    # 頂点の座標ちょうどと, 範囲の端がちょうど頂点に重なる高さも調べる
+    targets = np.concatenate([np.random.default_rng(axis).uniform(values.min() - 0.05, values.max() + 0.05, 20),
+                              values[:: len(values) // 10], values[:: len(values) // 10] + np.float32(tolerance)])
+    for target in targets:
+        expected = brute_force_mask(plant.coords, axis, target, tolerance)
+        assert np.array_equal(np.sort(index.query(target, tolerance)), np.flatnonzero(expected)), target
+        assert np.array_equal(index.query_mask(target, tolerance), expected), target
+
+
+def test_from_arrays_gives_same_result(plant):
+    index = SlabIndex(plant.coords)
+    restored = SlabIndex.from_arrays(plant.coords, index.order.copy(), index.sorted_values.copy())
+    for target in plant.seed_points[:, 2]:
+        assert np.array_equal(restored.query(target, 0.01), index.query(target, 0.01))
+
+
+@pytest.mark.parametrize("axis", [0, 2])
+def test_collect_points_near_base_with_index(plant, axis):
+    index = SlabIndex(plant.coords, axis=axis)
+    for base_point in plant.seed_points:
+        expected = collect_points_near_base(plant.coords, base_point, base_point[axis], 0.01, 0.05, axis=axis)
+        actual = collect_points_near_base(plant.coords, base_point, base_point[axis], 0.01, 0.05, axis=axis, slab_index=index)
+        assert len(expected) > 0
+        np.testing.assert_array_equal(np.unique(actual, axis=0), np.unique(expected, axis=0))